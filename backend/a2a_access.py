@@ -0,0 +1,89 @@
+"""
+Zero-copy accessors over a2a-sdk message and response objects.
+Text parts, metadata and results are read straight off the pydantic models
+instead of model_dump()-ing whole messages per part or per response. Returned
+strings are the objects the model already holds, so reading a multi-megabyte
+report does not build a dict tree around it or duplicate it.
+
+Duck-typed on purpose: nothing from a2a is imported here, so the MCP server
+can use these helpers without paying the a2a import cost at startup.
+"""
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+def iter_parts(message: Any) -> Iterator[Any]:
+    """The concrete part objects (TextPart, FilePart, DataPart) of a message or artifact."""
+    for part in getattr(message, "parts", None) or ():
+        yield getattr(part, "root", part)
+
+def iter_texts(message: Any) -> Iterator[str]:
+    for part in iter_parts(message):
+        text = getattr(part, "text", None)
+        if text is not None:
+            yield text
+
+def first_text(message: Any, default: str = "") -> str:
+    return next(iter_texts(message), default)
+
+def metadata_of(obj: Any) -> Mapping[str, Any]:
+    """Metadata dict of a message/part/task, read-only view when absent."""
+    return getattr(obj, "metadata", None) or EMPTY
+
+def response_result(response: Any) -> Any:
+    """The Message or Task in a SendMessageResponse, or None for a JSON-RPC error."""
+    return getattr(getattr(response, "root", response), "result", None)
+
+def response_error(response: Any) -> Optional[str]:
+    error = getattr(getattr(response, "root", response), "error", None)
+    if error is None:
+        return None
+    return getattr(error, "message", None) or str(error)
+
+def response_error_code(response: Any) -> Optional[int]:
+    """JSON-RPC error code of an error response, else None."""
+    return getattr(getattr(getattr(response, "root", response), "error", None), "code", None)
+
+def result_message(result: Any) -> Any:
+    """
+    The object whose parts carry the answer: the Message itself, or for a
+    Task its first artifact, else its status message.
+    """
+    if result is None or getattr(result, "kind", None) == "message":
+        return result
+    artifacts = getattr(result, "artifacts", None)
+    if artifacts:
+        return artifacts[0]
+    status = getattr(result, "status", None)
+    return getattr(status, "message", None)
+
+def response_text(response: Any, default: str = "") -> str:
+    """First text part of the answer in a SendMessageResponse."""
+    return first_text(result_message(response_result(response)), default)
+
+def summarize(message: Any, max_text: int = 200) -> Optional[Dict[str, Any]]:
+    """
+    Event-sized view of a message: ids, role, kinds, text previews and file URIs.
+
+    Only the first max_text characters of each text part are copied.
+    """
+    if message is None:
+        return None
+    parts = []
+    for part in iter_parts(message):
+        text = getattr(part, "text", None) or ""
+        summary = {
+            "kind": getattr(part, "kind", None),
+            "text": text[:max_text] + "..." if len(text) > max_text else text,
+        }
+        uri = getattr(getattr(part, "file", None), "uri", None)
+        if uri:
+            summary["uri"] = uri
+        parts.append(summary)
+    role = getattr(message, "role", None)
+    return {
+        "message_id": getattr(message, "message_id", None) or getattr(message, "artifact_id", None),
+        "role": getattr(role, "value", role),
+        "parts": parts,
+    }
@@ -1,136 +1,47 @@
+"""
+Colocated A2A Server - Researcher and Writer in one process
+Port: 8000 (A2A_SERVER_PORT)
+Skill: research_topic
+Serves the Researcher over A2A (same card skill, events, /queue and /tenants
+as researcher_agent.py) with the Writer running next to it. The Researcher's
+draft_report calls go to the Writer's request handler through the in-process
+A2A transport (backend/colocated.py): same A2A messages, tasks, events and
+error replies as over HTTP, without the HTTP hop or JSON serialization.
+Events of the colocated hop carry transport "in-process".
+
+Deploy this instead of writer_agent.py + researcher_agent.py when both agents
+share a host; callers (the MCP server) find it through the agent registry, or
+with A2A_AGENT_URLS=http://localhost:8000.
+"""
 import os
-import uvicorn
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 
-# A2A SDK imports
-from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
-from a2a.types import (
-    AgentCapabilities,
-    AgentCard,
-    AgentSkill,
-)
+import researcher_agent
+import writer_agent
+from colocated import local_agents
+from event_broadcaster import init_event_queue
+from lifecycle import serve
+from registry_client import public_url
 
 # Load environment variables
 load_dotenv()
 
-# Initialize ASYNC OpenAI client
-api_key = os.getenv("OPENAI_API_KEY")
-openai_client = AsyncOpenAI(api_key=api_key) if api_key else None
+A2A_SERVER_PORT = int(os.getenv("A2A_SERVER_PORT", "8000"))
+
+if __name__ == '__main__':
+    # Initialize event queue (shared by both agents' events)
+    init_event_queue()
 
-class ResearchAndDraftAgent:
-    """Agent that researches a topic and drafts a markdown report."""
-    
-    def __init__(self, topic: str):
-        self.topic = topic
-    
-    async def invoke(self) -> str:
-        if not openai_client:
-            raise ValueError("OPENAI_API_KEY not found.")
-        
-        # Step 1: Research (using async client)
-        print(f"[Agent] Researching: {self.topic}")
-        research_response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a senior researcher. Provide 4-5 key bullet points about the requested topic."},
-                {"role": "user", "content": f"Research topic: {self.topic}"}
-            ]
-        )
-        notes = research_response.choices[0].message.content
-        
-        # Step 2: Draft (using async client)
-        print(f"[Agent] Drafting report...")
-        draft_response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a technical writer. Create a markdown report based on the input."},
-                {"role": "user", "content": f"Topic: {self.topic}\nNotes:\n{notes}"}
-            ]
-        )
-        report = draft_response.choices[0].message.content
-        
-        print(f"[Agent] Report completed!")
-        return report
+    # The Writer is not exposed over HTTP; its card url only labels the local endpoint.
+    # Its handler is not drain-wrapped: Researcher tasks in flight still need it while draining.
+    local_agents.add(writer_agent.agent_card("local://writer/"), writer_agent.request_handler())
 
-class ResearchAndDraftAgentExecutor(AgentExecutor):
-    """AgentExecutor for the research and draft agent."""
-    
-    async def execute(
-        self,
-        context: RequestContext,
-        event_queue: EventQueue,
-    ) -> None:
-        # Extract topic from context.message
-        topic = ""
-        
-        if hasattr(context, 'message') and context.message:
-            print(f"[Executor] Found message with {len(context.message.parts)} parts")
-            for part in context.message.parts:
-                # Part is a Pydantic RootModel - access via root or model_dump()
-                part_dict = part.model_dump() if hasattr(part, 'model_dump') else {}
-                print(f"[Executor] Part: {part_dict}")
-                
-                # Extract text from the part dict
-                if 'text' in part_dict and part_dict['text']:
-                    topic = part_dict['text']
-                    print(f"[Executor] Extracted topic: '{topic}'")
-                    break
-        
-        if not topic:
-            print(f"[Executor] ERROR: No topic found in message!")
-            await event_queue.enqueue_event(new_agent_text_message("Error: No topic provided in request"))
-            return
-        
-        try:
-            agent = ResearchAndDraftAgent(topic)
-            result = await agent.invoke()
-            await event_queue.enqueue_event(new_agent_text_message(result))
-            print(f"[Executor] Successfully enqueued result (length: {len(result)})")
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            await event_queue.enqueue_event(new_agent_text_message(f"Error: {str(e)}"))
-    
-    async def cancel(
-        self, context: RequestContext, event_queue: EventQueue
-    ) -> None:
-        raise Exception('cancel not supported')
+    app = researcher_agent.build_app(researcher_agent.agent_card(
+        public_url(A2A_SERVER_PORT),
+        name='protocol-native-research-and-draft',
+        description='An agent that researches a topic and drafts a markdown report (Writer colocated in process).',
+    ))
 
-if __name__ == '__main__':
-    skill = AgentSkill(
-        id='research_and_draft_report',
-        name='Research and Draft',
-        description='Research a topic and draft a markdown report.',
-        tags=['research', 'drafting'],
-        examples=['Research quantum computing', 'Write a report on AI agents'],
-    )
-    
-    agent_card = AgentCard(
-        name='protocol-native-writer',
-        description='An agent that researches a topic and drafts a markdown report.',
-        url='http://localhost:8000/',
-        version='0.1.0',
-        default_input_modes=['text'],
-        default_output_modes=['text'],
-        capabilities=AgentCapabilities(streaming=False),
-        skills=[skill],
-    )
-    
-    request_handler = DefaultRequestHandler(
-        agent_executor=ResearchAndDraftAgentExecutor(),
-        task_store=InMemoryTaskStore(),
-    )
-    
-    server = A2AStarletteApplication(
-        agent_card=agent_card,
-        http_handler=request_handler,
-    )
-    
-    print("Starting A2A Server on port 8000...")
-    uvicorn.run(server.build(), host='0.0.0.0', port=8000)
+    print(f"Starting colocated A2A Server (Researcher + Writer) on port {A2A_SERVER_PORT}...")
+    print("Events published to gateway (viewers: ws://localhost:9000/events)")
+    serve(app, A2A_SERVER_PORT, researcher_agent.lifecycle)
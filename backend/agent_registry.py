@@ -0,0 +1,161 @@
+"""
+Agent Registry - local service discovery for the A2A agents
+Port: 8500
+Agents post their AgentCard and current load on startup and then every few
+seconds (registry_client.announce). Entries that stop heartbeating expire.
+Callers long-poll GET /routes?version=N&wait=S: the response comes back as
+soon as the table differs from version N, or after S seconds unchanged, so
+callers hold a current skill -> endpoints table without fetching cards per
+request. Only membership and card changes make a new version; load changes in
+heartbeats do not wake the pollers (callers poll each agent's /load instead),
+so the load in /routes is as of the last version.
+
+POST   /agents            {"card": <AgentCard JSON>, "load": {"in_flight": .., "queue_depth": ..}}
+DELETE /agents?url=...&instance=...   (a successor on the same url keeps its entry)
+GET    /routes?version=N&wait=S
+
+AGENT_REGISTRY_HOST=127.0.0.1   AGENT_REGISTRY_PORT=8500
+AGENT_TTL_S=15              an agent is dropped this long after its last heartbeat
+"""
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+from lifecycle import Lifecycle, serve
+from serialization import dumps
+
+AGENT_REGISTRY_HOST = os.getenv("AGENT_REGISTRY_HOST", "127.0.0.1")
+AGENT_REGISTRY_PORT = int(os.getenv("AGENT_REGISTRY_PORT", "8500"))
+AGENT_TTL_S = float(os.getenv("AGENT_TTL_S", "15"))
+MAX_WAIT_S = 60.0
+
+@dataclass
+class Registration:
+    card: Dict[str, Any]
+    load: Dict[str, Any]
+    seen: float
+    # Announcing processes by instance id -> last heartbeat; two while a successor takes over a url
+    instances: Dict[str, float] = field(default_factory=dict)
+
+class Registry:
+    """Registered agents keyed by card url, with a version bumped when membership or a card changes."""
+
+    def __init__(self, ttl_s: float = AGENT_TTL_S):
+        self.ttl_s = ttl_s
+        self.agents: Dict[str, Registration] = {}
+        self.version = 0
+        self._changed = asyncio.Event()
+        self._encoded: Optional[bytes] = None  # routes response for the current version
+
+    def _bump(self):
+        self.version += 1
+        self._encoded = None
+        # Wake current waiters; later waiters get a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def register(self, card: Dict[str, Any], load: Dict[str, Any], instance: Optional[str] = None) -> bool:
+        """Add or refresh an agent; True if the routing table changed (a new agent or card, not load)."""
+        url = card["url"]
+        current = self.agents.get(url)
+        now = time.monotonic()
+        instances = current.instances if current is not None else {}
+        if instance is not None:
+            instances[instance] = now
+        if current is not None and current.card == card:
+            # Kept for the next version's table, without waking every long-poller per heartbeat
+            current.seen, current.load = now, load
+            return False
+        if current is None:
+            print(f"[Registry] + {card.get('name')} at {url} "
+                  f"({', '.join(s['id'] for s in card.get('skills', []))})", file=sys.stderr)
+        self.agents[url] = Registration(card, load, now, instances)
+        self._bump()
+        return True
+
+    def deregister(self, url: str, instance: Optional[str] = None) -> bool:
+        """Remove an agent; with `instance`, only once no other live process serves the url."""
+        current = self.agents.get(url)
+        if current is None:
+            return False
+        if instance is not None:
+            current.instances.pop(instance, None)
+            now = time.monotonic()
+            if any(now - seen <= self.ttl_s for seen in current.instances.values()):
+                return False
+        del self.agents[url]
+        print(f"[Registry] - {url}", file=sys.stderr)
+        self._bump()
+        return True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        stale = [url for url, r in self.agents.items() if now - r.seen > self.ttl_s]
+        for url in stale:
+            self.deregister(url)
+        return len(stale)
+
+    def routes(self) -> bytes:
+        """The routing table as JSON, encoded once per version."""
+        if self._encoded is None:
+            skills: Dict[str, list] = {}
+            for url, r in self.agents.items():
+                for skill in r.card.get("skills", []):
+                    skills.setdefault(skill["id"], []).append(url)
+            self._encoded = dumps({
+                "version": self.version,
+                "agents": {url: {"name": r.card.get("name"), "card": r.card, "load": r.load}
+                           for url, r in self.agents.items()},
+                "skills": skills,
+            })
+        return self._encoded
+
+    async def wait_for_change(self, version: int, timeout: float):
+        """Return when the table is not at `version`, or after `timeout` seconds."""
+        if version != self.version:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+registry = Registry()
+
+async def expire_loop():
+    while True:
+        await asyncio.sleep(registry.ttl_s / 3)
+        registry.expire()
+
+# Expires stale agents for the app's lifetime
+lifecycle = Lifecycle("REGISTRY")
+lifecycle.background(expire_loop)
+
+app = FastAPI(lifespan=lifecycle.lifespan)
+
+@app.post("/agents")
+async def register_agent(request: Request):
+    body = await request.json()
+    card = body.get("card") or {}
+    if not card.get("url") or not isinstance(card.get("skills"), list):
+        raise HTTPException(status_code=400, detail="card with url and skills required")
+    changed = registry.register(card, body.get("load") or {}, body.get("instance"))
+    return {"version": registry.version, "changed": changed}
+
+@app.delete("/agents")
+async def deregister_agent(url: str, instance: Optional[str] = None):
+    return {"version": registry.version, "removed": registry.deregister(url, instance)}
+
+@app.get("/routes")
+async def routes(version: int = -1, wait: float = 0.0):
+    await registry.wait_for_change(version, min(max(wait, 0.0), MAX_WAIT_S))
+    return Response(registry.routes(), media_type="application/json")
+
+if __name__ == "__main__":
+    print(f"Starting Agent Registry on port {AGENT_REGISTRY_PORT}...")
+    serve(app, AGENT_REGISTRY_PORT, lifecycle, host=AGENT_REGISTRY_HOST, log_level="warning")
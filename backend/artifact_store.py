@@ -0,0 +1,180 @@
+"""
+Content-addressed artifact store for large agent outputs.
+A report above ARTIFACT_INLINE_MAX_BYTES is written once, under its sha256,
+to a directory shared by the local agents. A2A replies then carry a FilePart
+reference (file URI, size, hash) instead of the text, the Researcher forwards
+the reference untouched, and only the MCP server reads the bytes back, through
+a read-only mmap, when it builds the tool result. Events carry the reference.
+
+ARTIFACT_DIR=<repo>/.artifacts
+ARTIFACT_INLINE_MAX_BYTES=65536   smaller outputs stay inline as text parts
+ARTIFACT_MAX_BYTES=1073741824     oldest artifacts are pruned past this size
+"""
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlparse
+
+from a2a_access import iter_parts
+
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / ".artifacts"
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    sha256: str
+    size: int
+    uri: str
+    mime_type: str = "text/markdown"
+
+    def to_event(self) -> Dict[str, Any]:
+        """What events carry in place of the content."""
+        return asdict(self)
+
+class ArtifactStore:
+    """Files named by their sha256 under root/<first two hex chars>/."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_DIR, inline_max: int = 65536,
+                 max_bytes: int = 1 << 30):
+        self.root = Path(root).resolve()
+        self.inline_max = inline_max
+        self.max_bytes = max_bytes
+        self._used: Optional[int] = None  # bytes on disk, scanned on first put
+
+    @classmethod
+    def from_env(cls) -> "ArtifactStore":
+        return cls(
+            root=os.getenv("ARTIFACT_DIR", str(DEFAULT_DIR)),
+            inline_max=int(os.getenv("ARTIFACT_INLINE_MAX_BYTES", "65536")),
+            max_bytes=int(os.getenv("ARTIFACT_MAX_BYTES", str(1 << 30))),
+        )
+
+    def path(self, sha256: str) -> Path:
+        if not _SHA256.fullmatch(sha256):
+            raise ValueError(f"not a sha256 digest: {sha256!r}")
+        return self.root / sha256[:2] / sha256
+
+    def put(self, data: Union[str, bytes], mime_type: str = "text/markdown") -> ArtifactRef:
+        """Store data (written once per distinct content) and return its reference."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path(sha256)
+        try:
+            # Already stored: referenced again, so it is the newest for prune()
+            os.utime(path)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so readers in other processes never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self._account(len(data))
+        return ArtifactRef(sha256, len(data), path.as_uri(), mime_type)
+
+    def offload(self, text: str, mime_type: str = "text/markdown") -> Optional[ArtifactRef]:
+        """Store text that is too large to send inline; None if it should stay inline."""
+        if len(text) <= self.inline_max and len(text.encode("utf-8")) <= self.inline_max:
+            return None
+        return self.put(text, mime_type)
+
+    def resolve(self, uri: str) -> Path:
+        """
+        Path of the artifact a URI names. Only the digest in the URI is trusted,
+        so a reference can never point outside the store.
+        """
+        return self.path(Path(urlparse(uri).path).name)
+
+    def exists(self, ref: ArtifactRef) -> bool:
+        """True while the artifact is still on disk (prune() may have removed it)."""
+        try:
+            return self.resolve(ref.uri).stat().st_size == ref.size
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def open(self, ref: ArtifactRef, verify: bool = False) -> mmap.mmap:
+        """Read-only mapping of the artifact; the caller closes it."""
+        path = self.resolve(ref.uri)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size != ref.size:
+                raise ValueError(f"artifact {ref.sha256[:12]} is {size} bytes, expected {ref.size}")
+            if size == 0:
+                raise ValueError("empty artifacts cannot be mapped; use read_text")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if verify and hashlib.sha256(mapped).hexdigest() != ref.sha256:
+            mapped.close()
+            raise ValueError(f"artifact {ref.sha256[:12]} failed its hash check")
+        return mapped
+
+    def read_text(self, ref: ArtifactRef, verify: bool = False) -> str:
+        """Decode the artifact straight from the mapping (one copy: the str itself)."""
+        if ref.size == 0:
+            self.resolve(ref.uri).stat()  # still fail if it is missing
+            return ""
+        with self.open(ref, verify) as mapped:
+            view = memoryview(mapped)
+            try:
+                return str(view, "utf-8")
+            finally:
+                view.release()
+
+    def _account(self, added: int):
+        if self._used is None:
+            self._used = sum(p.stat().st_size for p in self.root.glob("??/*") if p.is_file())
+        else:
+            self._used += added
+        if self._used > self.max_bytes:
+            self.prune()
+
+    def prune(self):
+        """Delete the least recently put artifacts until under max_bytes. Open mappings stay valid."""
+        files = sorted((p for p in self.root.glob("??/*") if p.is_file()), key=lambda p: p.stat().st_mtime)
+        used = sum(p.stat().st_size for p in files)
+        for path in files:
+            if used <= self.max_bytes:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                used -= size
+            except FileNotFoundError:
+                pass  # pruned by another process
+        self._used = used
+
+def file_part(ref: ArtifactRef) -> Any:
+    """A2A FilePart referencing the artifact, with its hash and size in part metadata."""
+    from a2a.types import FilePart, FileWithUri, Part
+
+    return Part(root=FilePart(
+        file=FileWithUri(uri=ref.uri, mime_type=ref.mime_type, name=f"{ref.sha256[:12]}.md"),
+        metadata={"sha256": ref.sha256, "size": ref.size},
+    ))
+
+def ref_message(ref: ArtifactRef, metadata: Optional[dict] = None) -> Any:
+    """Agent reply carrying an artifact reference instead of inline text."""
+    from uuid import uuid4
+    from a2a.types import Message, Role
+
+    return Message(role=Role.agent, parts=[file_part(ref)], message_id=uuid4().hex, metadata=metadata)
+
+def find_ref(message: Any) -> Optional[ArtifactRef]:
+    """The first artifact FilePart of a message, if any (no a2a import needed)."""
+    for part in iter_parts(message):
+        file = getattr(part, "file", None)
+        uri = getattr(file, "uri", None)
+        meta = getattr(part, "metadata", None) or {}
+        if uri and "sha256" in meta and "size" in meta:
+            return ArtifactRef(meta["sha256"], int(meta["size"]), uri,
+                               getattr(file, "mime_type", None) or "text/markdown")
+    return None
@@ -0,0 +1,247 @@
+"""
+Per-endpoint circuit breakers for A2A hops.
+Each endpoint's breaker watches a rolling window of calls. It opens when
+enough of them fail or run slow, and then rejects calls at once with
+CircuitOpen instead of letting every request wait for a timeout. After
+CIRCUIT_OPEN_S it lets a few probe calls through (half-open). A successful
+probe closes the circuit; a failed one opens it again.
+
+Only the standard library is imported so the MCP server can use it too.
+
+CIRCUIT_WINDOW_S=30          rolling window for error and slow-call rates
+CIRCUIT_MIN_CALLS=5          calls in the window before the breaker may open
+CIRCUIT_ERROR_RATE=0.5       open when this share of calls fails...
+CIRCUIT_SLOW_CALL_S=30       ...or when this share of calls takes longer than this
+CIRCUIT_SLOW_RATE=0.8
+CIRCUIT_OPEN_S=15            how long to reject before probing
+CIRCUIT_HALF_OPEN_CALLS=1    concurrent probes while half-open
+A2A_CALL_TIMEOUT_S=187       a call that takes longer fails (was the 120 s httpx timeout)
+
+The hop timeout must outlast the agent behind it, or a slow upstream that the
+agent would recover from turns into a hop timeout and counts against the
+breaker. The Writer tries each model of its draft route in turn, up to
+LLM_ATTEMPT_TIMEOUT_S each (backend/llm_provider.py), after a 2 s demo pause,
+so A2A_CALL_TIMEOUT_S defaults to 3 x LLM_ATTEMPT_TIMEOUT_S + 2 s plus a margin.
+The MCP server's MCP_CALL_TIMEOUT_S covers the Researcher's own research step
+on top of that (see default_timeout_s).
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Read here rather than imported from llm_provider, which pulls in the OpenAI client
+LLM_ATTEMPT_TIMEOUT_S = float(os.getenv("LLM_ATTEMPT_TIMEOUT_S", "60"))
+DEMO_PAUSE_S = 2.0
+HOP_MARGIN_S = 5.0
+# Models an agent may try in turn: draft_report (long model, primary, fallback), research_topic
+DRAFT_ROUTE_MODELS = 3
+RESEARCH_ROUTE_MODELS = 2
+
+def default_timeout_s(*route_models: int) -> float:
+    """
+    Hop timeout that outlasts the given agents' LLM steps, each trying every
+    model of its route to the attempt timeout after its demo pause.
+    """
+    return sum(LLM_ATTEMPT_TIMEOUT_S * models + DEMO_PAUSE_S for models in route_models) + HOP_MARGIN_S
+
+class HopUnavailable(Exception):
+    """An A2A hop could not be completed; `reason` says why."""
+
+    def __init__(self, endpoint: str, reason: str, detail: str = "", retry_after_s: Optional[float] = None):
+        super().__init__(f"{endpoint} unavailable ({reason}{': ' + detail if detail else ''})")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+class CircuitOpen(HopUnavailable):
+    """Rejected without calling: the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_after_s: float):
+        super().__init__(endpoint, "circuit_open", f"retry after {retry_after_s:.1f}s", retry_after_s)
+
+class CircuitBreaker:
+    """Closed / open / half-open state for one endpoint."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        window_s: float = 30.0,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_s: float = 30.0,
+        slow_rate: float = 0.8,
+        open_s: float = 15.0,
+        half_open_calls: int = 1,
+    ):
+        self.endpoint = endpoint
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_s = slow_call_s
+        self.slow_rate = slow_rate
+        self.open_s = open_s
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        self.calls: Deque[Tuple[float, bool, bool]] = deque()  # (finished at, ok, slow)
+        self.rejected = 0
+
+    def _trim(self, now: float):
+        while self.calls and now - self.calls[0][0] > self.window_s:
+            self.calls.popleft()
+
+    def rates(self) -> Tuple[int, float, float]:
+        """Calls in the window, error rate and slow-call rate."""
+        self._trim(time.monotonic())
+        total = len(self.calls)
+        if not total:
+            return 0, 0.0, 0.0
+        return (total, sum(1 for _, ok, _ in self.calls if not ok) / total,
+                sum(1 for _, _, slow in self.calls if slow) / total)
+
+    def retry_after(self) -> float:
+        return max(self.opened_at + self.open_s - time.monotonic(), 0.0)
+
+    def allows(self) -> bool:
+        """Whether a call would be let through right now (no state change)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.retry_after() <= 0
+        return self.probes < self.half_open_calls
+
+    def acquire(self) -> Optional[str]:
+        """
+        Admit one call or raise CircuitOpen. Returns the new state if admitting
+        the call changed it (open -> half-open).
+        """
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpen(self.endpoint, self.retry_after())
+            self.state, self.probes = HALF_OPEN, 0
+            transition = HALF_OPEN
+        else:
+            transition = None
+        if self.state == HALF_OPEN:
+            if self.probes >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpen(self.endpoint, 0.0)
+            self.probes += 1
+        return transition
+
+    def record(self, ok: bool, latency_s: float, probe: bool) -> Optional[str]:
+        """Record a finished call; returns the new state if it changed."""
+        now = time.monotonic()
+        slow = latency_s > self.slow_call_s
+        if probe and self.state == HALF_OPEN:
+            self.probes -= 1
+            if ok and not slow:
+                self.state = CLOSED
+                self.calls.clear()
+                return CLOSED
+            return self._open(now)
+        self.calls.append((now, ok, slow))
+        if self.state != CLOSED:
+            return None
+        total, errors, slows = self.rates()
+        if total >= self.min_calls and (errors >= self.error_rate or slows >= self.slow_rate):
+            return self._open(now)
+        return None
+
+    def release(self, probe: bool):
+        """A call was abandoned (cancelled) before it finished."""
+        if probe and self.state == HALF_OPEN:
+            self.probes -= 1
+
+    def _open(self, now: float) -> str:
+        self.state, self.opened_at, self.probes = OPEN, now, 0
+        return OPEN
+
+    def stats(self) -> Dict[str, Any]:
+        total, errors, slows = self.rates()
+        return {
+            "endpoint": self.endpoint,
+            "state": self.state,
+            "calls": total,
+            "error_rate": round(errors, 3),
+            "slow_rate": round(slows, 3),
+            "rejected": self.rejected,
+            "retry_after_s": round(self.retry_after(), 1) if self.state == OPEN else 0.0,
+        }
+
+class Breakers:
+    """One CircuitBreaker per endpoint, created on first use with shared settings."""
+
+    def __init__(self, timeout_s: float = default_timeout_s(DRAFT_ROUTE_MODELS), **settings):
+        self.timeout_s = timeout_s
+        self.settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls, **overrides) -> "Breakers":
+        settings = dict(
+            timeout_s=float(os.getenv("A2A_CALL_TIMEOUT_S", default_timeout_s(DRAFT_ROUTE_MODELS))),
+            window_s=float(os.getenv("CIRCUIT_WINDOW_S", "30")),
+            min_calls=int(os.getenv("CIRCUIT_MIN_CALLS", "5")),
+            error_rate=float(os.getenv("CIRCUIT_ERROR_RATE", "0.5")),
+            slow_call_s=float(os.getenv("CIRCUIT_SLOW_CALL_S", "30")),
+            slow_rate=float(os.getenv("CIRCUIT_SLOW_RATE", "0.8")),
+            open_s=float(os.getenv("CIRCUIT_OPEN_S", "15")),
+            half_open_calls=int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "1")),
+        )
+        settings.update(overrides)
+        return cls(**settings)
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(endpoint, **self.settings)
+        return breaker
+
+    def allows(self, endpoint: str) -> bool:
+        breaker = self._breakers.get(endpoint)
+        return breaker is None or breaker.allows()
+
+    async def call(
+        self,
+        endpoint: str,
+        call: Callable[[], Awaitable[Any]],
+        on_transition: Optional[Callable[[CircuitBreaker, str], Awaitable[None]]] = None,
+    ) -> Any:
+        """
+        Run `call` through the endpoint's breaker with the call timeout.
+        Raises CircuitOpen without calling when the circuit is open, and
+        HopUnavailable when the call times out or fails. `on_transition` is
+        awaited with the breaker and its new state whenever the state changes.
+        """
+        async def changed(state: Optional[str]):
+            if state is not None and on_transition is not None:
+                await on_transition(breaker, state)
+
+        breaker = self.get(endpoint)
+        transition = breaker.acquire()
+        probe = breaker.state == HALF_OPEN
+        await changed(transition)
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(), self.timeout_s)
+        except asyncio.TimeoutError:
+            await changed(breaker.record(False, time.monotonic() - start, probe))
+            raise HopUnavailable(endpoint, "timeout", f"no reply in {self.timeout_s:g}s")
+        except asyncio.CancelledError:
+            breaker.release(probe)
+            raise
+        except Exception as e:
+            await changed(breaker.record(False, time.monotonic() - start, probe))
+            raise HopUnavailable(endpoint, "error", str(e) or type(e).__name__) from e
+        await changed(breaker.record(True, time.monotonic() - start, probe))
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: breaker.stats() for endpoint, breaker in self._breakers.items()}
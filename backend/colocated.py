@@ -0,0 +1,200 @@
+"""
+Colocated mode: agents deployed in one process call each other in process.
+backend/a2a_server.py serves the Researcher and runs the Writer next to it;
+the Writer's request handler is registered here, and the Researcher's A2A
+calls for its skills go through LocalTransport instead of HTTP.
+
+LocalTransport hands the A2A request objects straight to the other agent's
+request handler (same executor, task store, events and error replies as over
+HTTP), so a hop costs neither a loopback round trip nor JSON encoding and
+decoding on both sides. bench_colocated_hop.py measures the difference.
+"""
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+from a2a.client.errors import A2AClientJSONRPCError
+from a2a.client.middleware import ClientCallContext
+from a2a.client.transports.base import ClientTransport
+from a2a.server.context import ServerCallContext
+from a2a.server.request_handlers import RequestHandler
+from a2a.types import (
+    AgentCard,
+    GetTaskPushNotificationConfigParams,
+    InternalError,
+    JSONRPCErrorResponse,
+    Message,
+    MessageSendParams,
+    SendMessageRequest,
+    SendMessageResponse,
+    SendMessageSuccessResponse,
+    Task,
+    TaskIdParams,
+    TaskPushNotificationConfig,
+    TaskQueryParams,
+)
+from a2a.utils.errors import ServerError
+
+from event_broadcaster import a2a_transport
+
+IN_PROCESS = "in-process"
+
+def _jsonrpc_error(e: ServerError) -> A2AClientJSONRPCError:
+    """The error a JSON-RPC client would have received for this ServerError."""
+    return A2AClientJSONRPCError(JSONRPCErrorResponse(id=None, error=e.error if e.error else InternalError()))
+
+class LocalTransport(ClientTransport):
+    """A2A client transport that calls a request handler in this process."""
+
+    def __init__(self, handler: RequestHandler, card: AgentCard):
+        self.handler = handler
+        self.card = card
+
+    def _context(self) -> ServerCallContext:
+        return ServerCallContext(state={"transport": IN_PROCESS})
+
+    async def send_message(
+        self,
+        request: MessageSendParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> Task | Message:
+        # The callee's events (and the tasks the handler spawns) inherit the transport
+        token = a2a_transport.set(IN_PROCESS)
+        try:
+            return await self.handler.on_message_send(request, self._context())
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+        finally:
+            a2a_transport.reset(token)
+
+    async def send_message_streaming(
+        self,
+        request: MessageSendParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> AsyncIterator:
+        try:
+            async for event in self.handler.on_message_send_stream(request, self._context()):
+                yield event
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+
+    async def get_task(
+        self,
+        request: TaskQueryParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> Task:
+        try:
+            return await self.handler.on_get_task(request, self._context())
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+
+    async def cancel_task(
+        self,
+        request: TaskIdParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> Task:
+        try:
+            return await self.handler.on_cancel_task(request, self._context())
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+
+    async def set_task_callback(
+        self,
+        request: TaskPushNotificationConfig,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> TaskPushNotificationConfig:
+        try:
+            return await self.handler.on_set_task_push_notification_config(request, self._context())
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+
+    async def get_task_callback(
+        self,
+        request: GetTaskPushNotificationConfigParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> TaskPushNotificationConfig:
+        try:
+            return await self.handler.on_get_task_push_notification_config(request, self._context())
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+
+    async def resubscribe(
+        self,
+        request: TaskIdParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> AsyncIterator:
+        try:
+            async for event in self.handler.on_resubscribe_to_task(request, self._context()):
+                yield event
+        except ServerError as e:
+            raise _jsonrpc_error(e) from e
+
+    async def get_card(
+        self,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list] = None,
+    ) -> AgentCard:
+        return self.card
+
+    async def close(self) -> None:
+        pass
+
+class LocalA2AClient:
+    """
+    The part of A2AClient the agents use (send_message), over a LocalTransport:
+    the same requests and responses, no httpx client. Not an A2AClient
+    subclass, so nothing depends on that class's private state.
+    """
+
+    def __init__(self, transport: LocalTransport):
+        self.transport = transport
+
+    async def send_message(
+        self,
+        request: SendMessageRequest,
+        *,
+        context: Optional[ClientCallContext] = None,
+    ) -> SendMessageResponse:
+        """Like A2AClient.send_message: JSON-RPC errors come back as error responses, not exceptions."""
+        try:
+            result = await self.transport.send_message(request.params, context=context)
+        except A2AClientJSONRPCError as e:
+            return SendMessageResponse(JSONRPCErrorResponse(error=e.error))
+        return SendMessageResponse(root=SendMessageSuccessResponse(id=request.id, jsonrpc="2.0", result=result))
+
+@dataclass(frozen=True)
+class LocalAgent:
+    card: AgentCard
+    client: LocalA2AClient
+
+class LocalAgents:
+    """Agents served in this process, by skill id."""
+
+    def __init__(self):
+        self.skills: Dict[str, LocalAgent] = {}
+
+    def add(self, card: AgentCard, handler: RequestHandler) -> LocalAgent:
+        agent = LocalAgent(card, LocalA2AClient(LocalTransport(handler, card)))
+        for skill in card.skills:
+            self.skills[skill.id] = agent
+        return agent
+
+    def get(self, skill: str) -> Optional[LocalAgent]:
+        return self.skills.get(skill)
+
+# Filled by backend/a2a_server.py; empty when each agent runs as its own service
+local_agents = LocalAgents()
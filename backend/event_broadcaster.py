@@ -1,15 +1,47 @@
 """
 Event broadcasting utilities for A2A agents.
 Provides structured event emission with transport, hop inference, and A2A schema normalization.
+Events are forwarded to the event gateway (mcp_server/event_server.py) over one
+persistent loopback TCP connection per process.
 """
 from datetime import datetime
 from uuid import uuid4
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal, Tuple
 import asyncio
+import os
+import sys
+from contextvars import ContextVar
 
-# Global event queue for WebSocket broadcasting
+from a2a_access import metadata_of, summarize
+from serialization import dumps
+
+# Event gateway ingest address
+EVENT_GATEWAY_HOST = os.getenv("EVENT_GATEWAY_HOST", "127.0.0.1")
+EVENT_GATEWAY_PORT = int(os.getenv("EVENT_GATEWAY_PORT", "9001"))
+
+# Micro-batching: flush every N events or T milliseconds, whichever comes first
+EVENT_BATCH_MAX = int(os.getenv("EVENT_BATCH_MAX", "64"))
+EVENT_BATCH_INTERVAL_MS = float(os.getenv("EVENT_BATCH_INTERVAL_MS", "10"))
+
+# Artificial pauses that let the dashboard animate each step (DEMO_DELAYS=0 disables them)
+DEMO_DELAYS = os.getenv("DEMO_DELAYS", "1") != "0"
+
+# A2A message metadata key carrying the caller's API key; never copied into events
+API_KEY_METADATA = "api_key"
+SECRET_METADATA_KEYS = frozenset({API_KEY_METADATA})
+# Older clients sent the key as a text part with this prefix
+LEGACY_KEY_PREFIX = "__API_KEY__:"
+
+# Transport of the A2A hop in progress: "in-process" while a colocated agent is
+# called through colocated.LocalTransport (the callee's events inherit it)
+a2a_transport: ContextVar[str] = ContextVar("a2a_transport", default="http")
+
+# Global event queue drained by publish_to_gateway
 event_queue: asyncio.Queue = None
 
+# Readiness signal: set while publish_to_gateway holds a live gateway connection
+gateway_ready: asyncio.Event = asyncio.Event()
+
 def init_event_queue():
     """Initialize the global event queue."""
     global event_queue
@@ -20,62 +52,194 @@ def get_event_queue():
     """Get the global event queue."""
     return event_queue
 
-def infer_hop(source: str, event_type: str, direction: str) -> str:
-    """Infer the hop based on source, event type, and direction."""
-    hop_map = {
-        ("WRITER", "rpc_request", "in"): "researcher→writer",
-        ("WRITER", "rpc_response", "out"): "writer→researcher",
-        ("WRITER", "openai_call", "out"): "writer→openai",
-        ("WRITER", "openai_response", "in"): "openai→writer",
-        ("RESEARCHER", "rpc_request", "in"): "mcp→researcher",
-        ("RESEARCHER", "rpc_response", "out"): "researcher→mcp",
-        ("RESEARCHER", "openai_call", "out"): "researcher→openai",
-        ("RESEARCHER", "openai_response", "in"): "openai→researcher",
-        ("RESEARCHER", "a2a_outgoing", "out"): "researcher→writer",
-        ("RESEARCHER", "a2a_incoming", "in"): "writer→researcher",
-    }
-    return hop_map.get((source, event_type, direction), "unknown")
+async def demo_pause(seconds: float):
+    """Sleep for visualization only; a no-op when DEMO_DELAYS=0 (load tests)."""
+    if DEMO_DELAYS:
+        await asyncio.sleep(seconds)
+
+def enqueue_event(event: Dict[str, Any]):
+    """Queue a pre-built event for the gateway publisher (non-blocking)."""
+    if event_queue is None:
+        print(f"[EventBroadcaster] WARNING: event_queue is None! Event type: {event.get('type')}", file=sys.stderr)
+        return
+    event_queue.put_nowait(event)
+
+async def next_batch(max_batch: int, flush_interval: float) -> List[Dict[str, Any]]:
+    """
+    Collect up to ``max_batch`` events, waiting at most ``flush_interval``
+    seconds after the first one arrives. Events keep their queue (FIFO) order.
+    """
+    loop = asyncio.get_running_loop()
+    batch = [await event_queue.get()]
+    deadline = loop.time() + flush_interval
+    while len(batch) < max_batch:
+        try:
+            batch.append(event_queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(event_queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def publish_to_gateway(
+    source: str,
+    retry_delay: float = 1.0,
+    max_batch: int = EVENT_BATCH_MAX,
+    flush_interval: float = EVENT_BATCH_INTERVAL_MS / 1000,
+):
+    """
+    Forward queued events to the event gateway.
 
-def normalize_a2a_payload(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Extract and normalize A2A message schema."""
+    Connects eagerly and keeps a single persistent connection open,
+    reconnecting on failure; ``gateway_ready`` is set while connected.
+    Events are micro-batched: one frame (a JSON array) is written every
+    ``max_batch`` events or ``flush_interval`` seconds, whichever comes first.
+    A single FIFO queue and connection per process keeps per-trace ordering
+    strict. A batch is only dropped once it has been written, so nothing is
+    lost while the gateway is restarting.
+    """
+    writer = None
+    pending = None
+    warned = False
+    try:
+        while True:
+            if writer is None:
+                try:
+                    _, writer = await asyncio.open_connection(EVENT_GATEWAY_HOST, EVENT_GATEWAY_PORT)
+                    writer.write(dumps({"publisher": source}) + b"\n")
+                    gateway_ready.set()
+                    warned = False
+                    print(f"[EventBroadcaster] Connected to gateway at {EVENT_GATEWAY_HOST}:{EVENT_GATEWAY_PORT}", file=sys.stderr)
+                except OSError as e:
+                    if not warned:
+                        print(f"[EventBroadcaster] Gateway unavailable ({e}); retrying every {retry_delay}s", file=sys.stderr)
+                        warned = True
+                    await asyncio.sleep(retry_delay)
+                    continue
+            if pending is None:
+                pending = await next_batch(max_batch, flush_interval)
+            try:
+                writer.write(dumps(pending) + b"\n")
+                await writer.drain()
+                for _ in pending:
+                    event_queue.task_done()
+                pending = None
+            except OSError as e:
+                print(f"[EventBroadcaster] Lost gateway connection ({e}); reconnecting", file=sys.stderr)
+                gateway_ready.clear()
+                writer.close()
+                writer = None
+    finally:
+        gateway_ready.clear()
+        if writer is not None:
+            writer.close()
+        if pending:
+            # Taken off the queue but never written; keep them ahead of what is still queued
+            log_undelivered(pending)
+
+def log_undelivered(events: Optional[List[Dict[str, Any]]] = None) -> int:
+    """
+    Write events the gateway never received (by default, everything still
+    queued) to stderr as JSON lines, so a shutdown does not drop them silently.
+    """
+    if events is None:
+        events = []
+        while event_queue is not None and not event_queue.empty():
+            events.append(event_queue.get_nowait())
+            event_queue.task_done()
+    for event in events:
+        sys.stderr.write("[EventBroadcaster] undelivered " + dumps(event).decode("utf-8") + "\n")
+    sys.stderr.flush()
+    return len(events)
+
+async def wait_for_gateway(timeout: float) -> bool:
+    """Wait until the publisher holds a live gateway connection; False on timeout."""
+    try:
+        await asyncio.wait_for(gateway_ready.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+async def flush_events(timeout: float) -> bool:
+    """Wait until every queued event has been written to the gateway; False on timeout."""
+    try:
+        await asyncio.wait_for(event_queue.join(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+# Hop labels keyed by (source, event type, direction, peer); filled from the
+# workflow graph by register_hops (see workflow.Workflow.hops)
+HOPS: Dict[Tuple[str, str, str, Optional[str]], str] = {}
+
+def register_hops(table: Dict[Tuple[str, str, str, Optional[str]], str]):
+    """Add the hops of a workflow graph."""
+    HOPS.update(table)
+
+def infer_hop(source: str, event_type: str, direction: str, peer: Optional[str] = None) -> str:
+    """Look up the hop for an event; the peer-specific label wins over the generic one."""
+    return HOPS.get((source, event_type, direction, peer)) or HOPS.get((source, event_type, direction, None), "unknown")
+
+def normalize_a2a_payload(message: Any) -> Optional[Dict[str, Any]]:
+    """
+    Extract and normalize A2A message schema. Credentials are never copied.
+
+    Accepts a2a Message/Artifact objects (read in place, see a2a_access) or
+    already-dumped dicts.
+    """
     if not message:
         return None
     
-    parts = message.get("parts", [])
-    normalized_parts = []
-    for part in parts:
-        text = part.get("text", "")
-        # Truncate long text for logging
-        if len(text) > 200:
-            text = text[:200] + "..."
-        normalized_parts.append({
-            "kind": part.get("kind"),
-            "text": text
-        })
-    
-    return {
-        "message_id": message.get("messageId"),
-        "role": message.get("role"),
-        "parts": normalized_parts
-    }
+    if not isinstance(message, dict):
+        normalized = summarize(message)
+        metadata = metadata_of(message)
+    else:
+        normalized_parts = []
+        for part in message.get("parts", []):
+            text = part.get("text", "")
+            # Truncate long text for logging
+            if len(text) > 200:
+                text = text[:200] + "..."
+            normalized_parts.append({
+                "kind": part.get("kind"),
+                "text": text
+            })
+        normalized = {
+            "message_id": message.get("messageId") or message.get("message_id"),
+            "role": message.get("role"),
+            "parts": normalized_parts
+        }
+        metadata = message.get("metadata")
+    for part in normalized["parts"]:
+        if part["text"].startswith(LEGACY_KEY_PREFIX):
+            part["text"] = LEGACY_KEY_PREFIX + "[redacted]"
+    if metadata:
+        normalized["metadata"] = {k: v for k, v in metadata.items() if k not in SECRET_METADATA_KEYS}
+    return normalized
 
 async def broadcast_event(
     source: Literal["WRITER", "RESEARCHER"],
     event_type: str,
     data: Dict[str, Any],
-    a2a_message: Optional[Dict[str, Any]] = None,
+    a2a_message: Optional[Any] = None,
     latency_ms: Optional[int] = None,
     status: Optional[str] = None,
     error_origin: Optional[Dict[str, Any]] = None
 ):
     """
-    Broadcast a structured event to all WebSocket clients.
+    Broadcast a structured event to the event gateway.
     
     Args:
         source: Event source (WRITER or RESEARCHER)
         event_type: Type of event (rpc_request, a2a_outgoing, etc.)
         data: Event-specific payload
-        a2a_message: Optional A2A message for schema normalization
+        a2a_message: Optional A2A message (object or dict) for schema normalization
         latency_ms: Optional latency in milliseconds
         status: Optional status (pending, success, error)
         error_origin: Optional error origin metadata
@@ -100,8 +264,8 @@ async def broadcast_event(
         direction = "out"
     
     # Determine transport
-    transport = "http"  # A2A agents use HTTP
-    if event_type == "openai_call" or event_type == "openai_response":
+    transport = a2a_transport.get()  # A2A agents use HTTP unless colocated
+    if event_type == "openai_call" or event_type == "openai_response" or event_type.startswith("llm_"):
         transport = "http"  # OpenAI uses HTTP
     
     event = {
@@ -109,7 +273,7 @@ async def broadcast_event(
         "timestamp": datetime.now().isoformat(),
         "source": source,
         "type": event_type,
-        "hop": infer_hop(source, event_type, direction),
+        "hop": infer_hop(source, event_type, direction, data.get("node") or data.get("to") or data.get("from")),
         "direction": direction,
         "transport": transport,
         "data": data,
@@ -0,0 +1,154 @@
+"""
+Health, readiness and load reports for the agents.
+
+GET /healthz  liveness: 200 while the server's event loop answers
+GET /readyz   200 when the agent should get traffic, else 503 naming the failing check:
+              draining, LLM upstream unreachable, task store not answering, or
+              event queue saturated
+GET /load     {"in_flight", "queue_depth", "p95_ms", "draining"}; RoutingTable
+              polls it for load-aware routing (backend/registry_client.py)
+
+The upstream and task-store checks run in the lifespan every
+READY_PROBE_INTERVAL_S, so the endpoints only read cached state. They are plain
+ASGI apps sending pre-built response messages: a reply is encoded once per
+distinct state and re-sent as is, so they can be polled at high frequency.
+
+READY_PROBE_INTERVAL_S=10
+READY_PROBE_TIMEOUT_S=2
+EVENT_QUEUE_SATURATION=10000   queued gateway events beyond which the agent is not ready
+"""
+import asyncio
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from a2a.server.tasks import TaskStore
+
+from event_broadcaster import get_event_queue
+from lifecycle import Lifecycle
+from llm_provider import get_provider
+from serialization import dumps
+
+READY_PROBE_INTERVAL_S = float(os.getenv("READY_PROBE_INTERVAL_S", "10"))
+READY_PROBE_TIMEOUT_S = float(os.getenv("READY_PROBE_TIMEOUT_S", "2"))
+EVENT_QUEUE_SATURATION = int(os.getenv("EVENT_QUEUE_SATURATION", "10000"))
+
+# Looked up in the task store by the readiness probe; never exists
+PROBE_TASK_ID = "readyz-probe"
+
+class Reply:
+    """A JSON response whose ASGI messages are built once."""
+
+    def __init__(self, status: int, payload: Dict[str, Any]):
+        body = dumps(payload)
+        self.start = {"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"cache-control", b"no-store"),
+        ]}
+        self.body = {"type": "http.response.body", "body": body}
+
+class Endpoint:
+    """ASGI app sending whatever Reply `render()` returns (not wrapped in a Request/Response)."""
+
+    def __init__(self, render: Callable[[], Reply]):
+        self.render = render
+
+    async def __call__(self, scope, receive, send):
+        reply = self.render()
+        await send(reply.start)
+        await send(reply.body)
+
+class Health:
+    """Liveness, readiness and load of one agent process, served from cached state."""
+
+    def __init__(
+        self,
+        lifecycle: Lifecycle,
+        task_store: TaskStore,
+        in_flight: Optional[Callable[[], int]] = None,
+        queue_depth: Callable[[], int] = lambda: 0,
+        reachable: Optional[Callable[[float], Awaitable[bool]]] = None,
+        probe_interval_s: float = READY_PROBE_INTERVAL_S,
+        probe_timeout_s: float = READY_PROBE_TIMEOUT_S,
+        saturation: int = EVENT_QUEUE_SATURATION,
+    ):
+        self.lifecycle = lifecycle
+        self.task_store = task_store
+        self.in_flight = in_flight or (lambda: lifecycle.in_flight)
+        self.queue_depth = queue_depth
+        self.reachable = reachable or (lambda timeout_s: get_provider().reachable(timeout_s))
+        self.probe_interval_s = probe_interval_s
+        self.probe_timeout_s = probe_timeout_s
+        self.saturation = saturation
+        # None until the first probe has finished
+        self.llm_ok: Optional[bool] = None
+        self.store_ok: Optional[bool] = None
+        self._alive = Reply(200, {"status": "ok", "agent": lifecycle.name.lower()})
+        self._ready: Dict[Tuple[bool, Optional[bool], Optional[bool], bool], Reply] = {}
+        self._load_state: Optional[Tuple[int, int, float, bool]] = None
+        self._load: Optional[Reply] = None
+        self._p95_at = -1  # lifecycle.completed when p95_ms was computed
+        self._p95_ms = 0.0
+
+    def install(self, app):
+        """Add /healthz, /readyz and /load to a Starlette app; the probes run in `lifecycle`'s lifespan."""
+        app.add_route("/healthz", Endpoint(lambda: self._alive), methods=["GET"])
+        app.add_route("/readyz", Endpoint(self.readiness), methods=["GET"])
+        app.add_route("/load", Endpoint(self.load_report), methods=["GET"])
+        self.lifecycle.background(self.probe)
+
+    async def probe(self):
+        """Refresh the cached upstream and task-store checks every probe_interval_s."""
+        while True:
+            await self.check()
+            await asyncio.sleep(self.probe_interval_s)
+
+    async def check(self):
+        try:
+            self.llm_ok = await self.reachable(self.probe_timeout_s)
+        except Exception as e:
+            # e.g. a malformed base URL: report it, and keep the probe loop running
+            print(f"[{self.lifecycle.name}] LLM upstream probe failed: {e!r}", file=sys.stderr)
+            self.llm_ok = False
+        try:
+            await asyncio.wait_for(self.task_store.get(PROBE_TASK_ID), self.probe_timeout_s)
+            self.store_ok = True
+        except Exception:
+            self.store_ok = False
+
+    def saturated(self) -> bool:
+        queue = get_event_queue()
+        return queue is not None and queue.qsize() >= self.saturation
+
+    def readiness(self) -> Reply:
+        state = (self.lifecycle.draining, self.llm_ok, self.store_ok, self.saturated())
+        reply = self._ready.get(state)
+        if reply is None:
+            draining, llm_ok, store_ok, saturated = state
+            checks = {
+                "draining": draining,
+                "llm": {True: "ok", False: "unreachable", None: "pending"}[llm_ok],
+                "task_store": {True: "ok", False: "failing", None: "pending"}[store_ok],
+                "event_queue": "saturated" if saturated else "ok",
+            }
+            ready = not draining and llm_ok is True and store_ok is True and not saturated
+            reply = self._ready[state] = Reply(200 if ready else 503, {"ready": ready, "checks": checks})
+        return reply
+
+    def p95_ms(self) -> float:
+        """p95 of recent task durations, recomputed only after tasks have finished since the last call."""
+        if self._p95_at != self.lifecycle.completed:
+            ordered = sorted(self.lifecycle.latencies_s)
+            self._p95_ms = round(ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)] * 1000, 1) if ordered else 0.0
+            self._p95_at = self.lifecycle.completed
+        return self._p95_ms
+
+    def load_report(self) -> Reply:
+        state = (self.in_flight(), self.queue_depth(), self.p95_ms(), self.lifecycle.draining)
+        if state != self._load_state:
+            in_flight, queue_depth, p95_ms, draining = state
+            self._load = Reply(200, {"in_flight": in_flight, "queue_depth": queue_depth,
+                                     "p95_ms": p95_ms, "draining": draining})
+            self._load_state = state
+        return self._load
@@ -0,0 +1,119 @@
+"""
+Idempotent tool calls for the MCP server.
+A call is identified by the caller's idempotency key or, without one, by a
+key derived from the caller and the normalized task text within a time bucket.
+A retry of a call that is still running attaches to it instead of starting a
+second pipeline. A retry of a call that finished successfully gets the stored
+result. The running call is shielded from the caller's cancellation so a
+client that times out and retries can still collect it.
+
+IDEMPOTENCY_TTL_S=600            how long completed results are kept
+IDEMPOTENCY_MAX_ENTRIES=1000     completed results kept (LRU beyond this)
+IDEMPOTENCY_BUCKET_S=300         derived keys match the same task within one to two buckets;
+                                 0 disables derived keys (explicit keys still work)
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+@dataclass
+class StoredResult:
+    value: Any
+    created: float
+
+class IdempotentCalls:
+    """In-flight sharing plus a bounded TTL store of completed results."""
+
+    def __init__(self, ttl_s: float = 600.0, max_entries: int = 1000, bucket_s: float = 300.0):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.bucket_s = bucket_s
+        self._done: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self._running: Dict[str, asyncio.Task] = {}
+        self.counters = {"calls": 0, "executed": 0, "joined_in_flight": 0, "served_completed": 0}
+
+    @classmethod
+    def from_env(cls) -> "IdempotentCalls":
+        return cls(
+            ttl_s=float(os.getenv("IDEMPOTENCY_TTL_S", "600")),
+            max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000")),
+            bucket_s=float(os.getenv("IDEMPOTENCY_BUCKET_S", "300")),
+        )
+
+    def keys(self, scope: str, idempotency_key: Optional[str], task: str, now: Optional[float] = None) -> List[str]:
+        """
+        Keys to look up, the first one being where a new call is recorded.
+
+        Derived keys cover the current and the previous time bucket, so a
+        retry just after a bucket boundary still finds the original call.
+        """
+        if idempotency_key:
+            return [self._hash(scope, "key", idempotency_key)]
+        if self.bucket_s <= 0:
+            return []
+        text = " ".join(task.lower().split())
+        bucket = int((time.time() if now is None else now) // self.bucket_s)
+        return [self._hash(scope, "task", text, str(b)) for b in (bucket, bucket - 1)]
+
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[StoredResult]:
+        stored = self._done.get(key)
+        if stored is None:
+            return None
+        if time.monotonic() - stored.created > self.ttl_s:
+            del self._done[key]
+            return None
+        self._done.move_to_end(key)
+        return stored
+
+    async def run(
+        self,
+        keys: List[str],
+        call: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda result: True,
+    ) -> Tuple[Any, str]:
+        """
+        Result of the call for these keys and how it was obtained:
+        "executed", "joined_in_flight" or "served_completed".
+        """
+        self.counters["calls"] += 1
+        for key in keys:
+            stored = self._lookup(key)
+            if stored is not None:
+                self.counters["served_completed"] += 1
+                return stored.value, "served_completed"
+            task = self._running.get(key)
+            if task is not None:
+                self.counters["joined_in_flight"] += 1
+                return await asyncio.shield(task), "joined_in_flight"
+
+        if not keys:
+            self.counters["executed"] += 1
+            return await call(), "executed"
+
+        key = keys[0]
+        task = asyncio.create_task(call())
+        self._running[key] = task
+        self.counters["executed"] += 1
+
+        def finished(task: asyncio.Task):
+            self._running.pop(key, None)
+            if task.cancelled() or task.exception() is not None or not cacheable(task.result()):
+                return
+            self._done[key] = StoredResult(task.result(), time.monotonic())
+            self._done.move_to_end(key)
+            while len(self._done) > self.max_entries:
+                self._done.popitem(last=False)
+
+        task.add_done_callback(finished)
+        return await asyncio.shield(task), "executed"
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "in_flight": len(self._running), "stored": len(self._done)}
@@ -0,0 +1,144 @@
+"""
+Incremental report redrafting for the Writer.
+Keeps recent (notes -> report sections) mappings per topic. When a topic comes
+back with notes that differ by a few bullets, only the sections those bullets
+map to are redrafted; the rest of the previous report is reused verbatim.
+
+WRITER_DRAFT_CACHE_SIZE=128         topics remembered (LRU)
+WRITER_DRAFT_CACHE_TTL_S=3600       how long a draft stays reusable
+WRITER_REDRAFT_MAX_FRACTION=0.5     above this share of changed sections, redraft in full
+"""
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+
+DRAFT_CACHE_SIZE = int(os.getenv("WRITER_DRAFT_CACHE_SIZE", "128"))
+DRAFT_CACHE_TTL_S = float(os.getenv("WRITER_DRAFT_CACHE_TTL_S", "3600"))
+REDRAFT_MAX_FRACTION = float(os.getenv("WRITER_REDRAFT_MAX_FRACTION", "0.5"))
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+def split_bullets(notes: str) -> List[str]:
+    """Notes as a list of bullets; continuation lines are folded into their bullet."""
+    bullets: List[str] = []
+    for line in notes.splitlines():
+        if not line.strip():
+            continue
+        if _BULLET.match(line) or not bullets:
+            bullets.append(_BULLET.sub("", line).strip())
+        else:
+            bullets[-1] += " " + line.strip()
+    return bullets
+
+def split_sections(report: str) -> Tuple[str, List[str]]:
+    """Split a markdown report into its preamble and its `## ` sections (heading included)."""
+    parts = re.split(r"(?m)^(?=## )", report)
+    preamble = parts[0] if not parts[0].startswith("## ") else ""
+    sections = [p for p in parts if p.startswith("## ")]
+    return preamble, sections
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+def assign_section(bullet: str, sections: List[str]) -> int:
+    """Index of the section sharing the most words with the bullet."""
+    words = _words(bullet)
+    scores = [len(words & _words(section)) / (len(words) or 1) for section in sections]
+    return max(range(len(sections)), key=scores.__getitem__)
+
+@dataclass
+class DraftRecord:
+    """A finished report and which section each note bullet fed."""
+    bullets: List[str]
+    preamble: str
+    sections: List[str]
+    bullet_sections: List[int]
+    created: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, notes: str, report: str) -> Optional["DraftRecord"]:
+        bullets = split_bullets(notes)
+        preamble, sections = split_sections(report)
+        if not bullets or not sections:
+            return None
+        return cls(bullets, preamble, sections, [assign_section(b, sections) for b in bullets])
+
+    def report(self) -> str:
+        return self.preamble + "".join(self.sections)
+
+@dataclass
+class RedraftPlan:
+    """Which sections to rewrite and with which notes."""
+    record: DraftRecord
+    bullets: List[str]
+    bullet_sections: List[int]
+    changed: Dict[int, List[str]]   # section index -> bullets removed from it
+
+    def section_notes(self, index: int) -> List[str]:
+        return [b for b, s in zip(self.bullets, self.bullet_sections) if s == index]
+
+def plan_redraft(record: DraftRecord, notes: str) -> Optional[RedraftPlan]:
+    """
+    Diff the new notes against the record at the bullet level.
+
+    Returns None when a full redraft is the better choice: nothing reusable,
+    or too many sections touched.
+    """
+    bullets = split_bullets(notes)
+    if not bullets:
+        return None
+    bullet_sections: List[int] = [-1] * len(bullets)
+    changed: Dict[int, List[str]] = {}
+
+    matcher = SequenceMatcher(a=record.bullets, b=bullets, autojunk=False)
+    for op, a1, a2, b1, b2 in matcher.get_opcodes():
+        if op == "equal":
+            bullet_sections[b1:b2] = record.bullet_sections[a1:a2]
+            continue
+        for old in range(a1, a2):
+            changed.setdefault(record.bullet_sections[old], []).append(record.bullets[old])
+        for new in range(b1, b2):
+            section = assign_section(bullets[new], record.sections)
+            bullet_sections[new] = section
+            changed.setdefault(section, [])
+
+    if len(changed) > REDRAFT_MAX_FRACTION * len(record.sections):
+        return None
+    return RedraftPlan(record, bullets, bullet_sections, changed)
+
+class DraftCache:
+    """LRU of recent drafts keyed by normalized topic, with a TTL."""
+
+    def __init__(self, size: int = DRAFT_CACHE_SIZE, ttl_s: float = DRAFT_CACHE_TTL_S):
+        self.size = size
+        self.ttl_s = ttl_s
+        self._records: "OrderedDict[str, DraftRecord]" = OrderedDict()
+
+    @staticmethod
+    def key(topic: str) -> str:
+        return " ".join(topic.lower().split())
+
+    def get(self, topic: str) -> Optional[DraftRecord]:
+        key = self.key(topic)
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if time.monotonic() - record.created > self.ttl_s:
+            del self._records[key]
+            return None
+        self._records.move_to_end(key)
+        return record
+
+    def put(self, topic: str, record: Optional[DraftRecord]):
+        if record is None:
+            return
+        key = self.key(topic)
+        self._records[key] = record
+        self._records.move_to_end(key)
+        while len(self._records) > self.size:
+            self._records.popitem(last=False)
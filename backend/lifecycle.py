@@ -0,0 +1,216 @@
+"""
+Lifespan, draining and zero-downtime restarts for the agent servers.
+
+Each server owns a Lifecycle: its background tasks (gateway publisher,
+registry heartbeat, routing table watch) start and stop with the app's
+lifespan instead of `@app.on_event` tasks that are killed mid-flight.
+
+serve() replaces uvicorn.run. It binds the port with SO_REUSEPORT (where the
+platform has it), so a new process can start on the same port while the old
+one still serves: start the new one, then SIGTERM the old one. The first
+SIGTERM/SIGINT drains instead of exiting at once:
+1. the listening socket closes (new connections go to the new process) and
+   `until_drain` tasks are cancelled (the registry heartbeat deregisters);
+2. A2A tasks arriving on open connections get an overloaded reply with reason
+   "draining"; tasks in flight get DRAIN_TIMEOUT_S to finish;
+3. the on_drain hooks run, then the server shuts its connections and the
+   lifespan shutdown flushes the event queue to the gateway for up to
+   EVENT_FLUSH_TIMEOUT_S and writes whatever the gateway did not take to the log.
+A second signal exits immediately.
+
+DRAIN_TIMEOUT_S=30           deadline for tasks in flight
+EVENT_FLUSH_TIMEOUT_S=5      deadline for handing queued events to the gateway
+"""
+import asyncio
+import os
+import socket
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple
+
+import uvicorn
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.utils import new_agent_text_message
+
+from event_broadcaster import flush_events, get_event_queue, log_undelivered
+
+DRAIN_TIMEOUT_S = float(os.getenv("DRAIN_TIMEOUT_S", "30"))
+EVENT_FLUSH_TIMEOUT_S = float(os.getenv("EVENT_FLUSH_TIMEOUT_S", "5"))
+
+# Callers retry elsewhere (or on the next process) after this long
+DRAIN_RETRY_AFTER_S = 1
+
+# Time left for responses to be written once the drain is over
+SHUTDOWN_GRACE_S = 2.0
+
+# Durations of the most recent tasks, for the p95 in load reports (backend/health.py)
+LATENCY_WINDOW = 200
+
+class Lifecycle:
+    """Background tasks, A2A tasks in flight and the drain state of one server process."""
+
+    def __init__(self, name: str, drain_timeout_s: float = DRAIN_TIMEOUT_S, flush_timeout_s: float = EVENT_FLUSH_TIMEOUT_S):
+        self.name = name
+        self.drain_timeout_s = drain_timeout_s
+        self.flush_timeout_s = flush_timeout_s
+        self.draining = False
+        self.in_flight = 0
+        self.completed = 0
+        self.latencies_s: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._background: List[Tuple[Callable[[], Awaitable[Any]], bool]] = []
+        self._tasks: List[Tuple[asyncio.Task, bool]] = []
+        self._on_drain: List[Callable[[], Awaitable[Any]]] = []
+        self._drained: Optional[asyncio.Task] = None
+
+    def background(self, factory: Callable[[], Awaitable[Any]], until_drain: bool = False):
+        """Run `factory()` as a task for the app's lifetime (or until the drain starts)."""
+        self._background.append((factory, until_drain))
+
+    def on_drain(self, hook: Callable[[], Awaitable[Any]]):
+        """Await `hook()` at the end of the drain, before the server shuts its connections."""
+        self._on_drain.append(hook)
+
+    def executor(self, inner: AgentExecutor) -> AgentExecutor:
+        """Wrap an agent executor so tasks are counted and refused while draining."""
+        return DrainingExecutor(inner, self)
+
+    def started(self) -> float:
+        self.in_flight += 1
+        self._idle.clear()
+        return time.monotonic()
+
+    def finished(self, started_at: float):
+        self.in_flight -= 1
+        self.completed += 1
+        self.latencies_s.append(time.monotonic() - started_at)
+        if self.in_flight == 0:
+            self._idle.set()
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """Starlette lifespan: start the background tasks, drain and flush on the way out."""
+        self.draining, self._drained = False, None
+        self._idle = asyncio.Event()  # bound to this loop
+        if self.in_flight == 0:
+            self._idle.set()
+        self._tasks = [(asyncio.create_task(factory()), until_drain) for factory, until_drain in self._background]
+        try:
+            yield
+        finally:
+            await self.drain()
+            await self.flush()
+
+    def drain(self) -> Awaitable[bool]:
+        """Stop taking tasks and wait for those in flight; True if all finished in time."""
+        if self._drained is None:
+            self._drained = asyncio.ensure_future(self._drain())
+        return self._drained
+
+    async def _drain(self) -> bool:
+        self.draining = True
+        print(f"[{self.name}] Draining: {self.in_flight} task(s) in flight, "
+              f"deadline {self.drain_timeout_s:g}s", file=sys.stderr)
+        await self._cancel([task for task, until_drain in self._tasks if until_drain])
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.drain_timeout_s)
+            drained = True
+        except asyncio.TimeoutError:
+            print(f"[{self.name}] Drain deadline passed with {self.in_flight} task(s) in flight", file=sys.stderr)
+            drained = False
+        for hook in self._on_drain:
+            await hook()
+        return drained
+
+    async def flush(self):
+        """Hand queued events to the gateway, stop the remaining tasks, log what is left."""
+        if get_event_queue() is not None and not await flush_events(self.flush_timeout_s):
+            print(f"[{self.name}] Gateway did not take every queued event in "
+                  f"{self.flush_timeout_s:g}s", file=sys.stderr)
+        await self._cancel([task for task, _ in self._tasks])
+        undelivered = log_undelivered()
+        print(f"[{self.name}] Stopped" + (f"; {undelivered} undelivered event(s) logged" if undelivered else ""),
+              file=sys.stderr)
+
+    @staticmethod
+    async def _cancel(tasks: List[asyncio.Task]):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+class DrainingExecutor(AgentExecutor):
+    """Counts the wrapped executor's tasks; replies overloaded (draining) once the drain starts."""
+
+    def __init__(self, inner: AgentExecutor, lifecycle: Lifecycle):
+        self.inner = inner
+        self.lifecycle = lifecycle
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        if self.lifecycle.draining:
+            message = new_agent_text_message(
+                f"Error: {self.lifecycle.name.title()} draining; retry after {DRAIN_RETRY_AFTER_S}s")
+            message.metadata = {"error": "overloaded", "reason": "draining", "retry_after_s": DRAIN_RETRY_AFTER_S}
+            await event_queue.enqueue_event(message)
+            return
+        started_at = self.lifecycle.started()
+        try:
+            await self.inner.execute(context, event_queue)
+        finally:
+            self.lifecycle.finished(started_at)
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await self.inner.cancel(context, event_queue)
+
+def listen_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """A listening socket that another process can bind too (SO_REUSEPORT, where available)."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # proto as getaddrinfo gives it: asyncio only sets TCP_NODELAY on IPPROTO_TCP sockets,
+    # and without it keep-alive responses stall on delayed ACKs
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn.Server whose first exit signal drains the Lifecycle before shutting down."""
+
+    def __init__(self, config: uvicorn.Config, lifecycle: Lifecycle):
+        super().__init__(config)
+        self.lifecycle = lifecycle
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.drain_requested = False
+
+    async def serve(self, sockets=None):
+        self.loop = asyncio.get_running_loop()
+        await super().serve(sockets)
+
+    def handle_exit(self, sig, frame):
+        if self.drain_requested or self.loop is None or not self.started:
+            super().handle_exit(sig, frame)
+            return
+        self.drain_requested = True
+        # Runs in the signal handler; schedule the drain on the loop
+        self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.drain_then_exit()))
+
+    async def drain_then_exit(self):
+        # New connections go to the next process bound to the port (or are refused)
+        for server in self.servers:
+            server.close()
+        await self.lifecycle.drain()
+        self.should_exit = True
+
+def serve(app, port: int, lifecycle: Lifecycle, host: str = "0.0.0.0", **config):
+    """Run `app` on `port` until an exit signal has drained it (replaces uvicorn.run)."""
+    server = DrainingServer(
+        uvicorn.Config(app, host=host, port=port, timeout_graceful_shutdown=SHUTDOWN_GRACE_S, **config),
+        lifecycle,
+    )
+    server.run(sockets=[listen_socket(host, port)])
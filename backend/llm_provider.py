@@ -0,0 +1,415 @@
+"""
+Pluggable LLM provider layer for the agents.
+Selects where chat completions go (real OpenAI or the local mock server) so the
+pipeline can be benchmarked offline, and which model serves each skill.
+
+LLM_PROVIDER=openai (default) | mock
+MOCK_LLM_URL=http://127.0.0.1:8900/v1
+
+Routing (ModelRouter): each skill has a RoutePolicy. Research goes to a fast,
+cheap model; drafting picks a model by input length. If the primary model has
+not answered by its observed latency percentile the request is hedged, and
+errors or timeouts fall back down the list. Decisions are emitted as events.
+
+LLM_HEDGE=model (default) | same | off
+  model: hedge to the next model in the plan at the primary's p95 (the
+         router's behaviour before LLM_HEDGE existed, so it stays the default)
+  same:  opt-in; send a duplicate to the same model at its p90 for that prompt size
+Hedges draw from HEDGE_TOKEN_BUDGET_PER_MIN and are capped at HEDGE_MAX_RATE of
+calls; hedge rate and win rate are reported on llm_route events.
+"""
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type
+
+import httpx
+from openai import AsyncOpenAI
+
+from event_broadcaster import broadcast_event
+from prompts import count_message_tokens
+
+class LLMProvider(ABC):
+    """Hands out OpenAI-compatible async clients."""
+
+    name = "base"
+    base_url = "https://api.openai.com/v1"
+
+    @abstractmethod
+    def client(self, api_key: Optional[str] = None) -> Optional[AsyncOpenAI]:
+        """Client for this request, or None if no credentials are available."""
+
+    async def reachable(self, timeout_s: float) -> bool:
+        """True if the upstream answers within `timeout_s` (any status but 5xx; keys are per request)."""
+        try:
+            async with httpx.AsyncClient(timeout=timeout_s) as client:
+                response = await client.get(f"{self.base_url.rstrip('/')}/models")
+            return response.status_code < 500
+        except httpx.HTTPError:
+            return False
+
+class OpenAIProvider(LLMProvider):
+    """Real OpenAI. Uses the request's API key if given, else OPENAI_API_KEY."""
+
+    name = "openai"
+
+    def __init__(self):
+        self.base_url = os.getenv("OPENAI_BASE_URL", self.base_url)  # as AsyncOpenAI resolves it
+        api_key = os.getenv("OPENAI_API_KEY")
+        self.default_client = AsyncOpenAI(api_key=api_key) if api_key else None
+
+    def client(self, api_key: Optional[str] = None) -> Optional[AsyncOpenAI]:
+        if api_key:
+            return AsyncOpenAI(api_key=api_key)
+        return self.default_client
+
+class MockProvider(LLMProvider):
+    """Local mock server (backend/mock_llm_server.py). Ignores API keys."""
+
+    name = "mock"
+
+    def __init__(self):
+        self.base_url = os.getenv("MOCK_LLM_URL", "http://127.0.0.1:8900/v1")
+        self.default_client = AsyncOpenAI(api_key="mock", base_url=self.base_url)
+
+    def client(self, api_key: Optional[str] = None) -> Optional[AsyncOpenAI]:
+        return self.default_client
+
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    "openai": OpenAIProvider,
+    "mock": MockProvider,
+}
+
+_provider: Optional[LLMProvider] = None
+
+def register_provider(name: str, provider_cls: Type[LLMProvider]):
+    """Make a provider selectable via LLM_PROVIDER."""
+    PROVIDERS[name] = provider_cls
+
+def get_provider() -> LLMProvider:
+    """The process-wide provider, chosen by LLM_PROVIDER on first use."""
+    global _provider
+    if _provider is None:
+        name = os.getenv("LLM_PROVIDER", "openai")
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown LLM_PROVIDER '{name}'. Choose from: {', '.join(PROVIDERS)}")
+        _provider = PROVIDERS[name]()
+        print(f"[LLMProvider] Using provider: {name}")
+    return _provider
+
+@dataclass
+class RoutePolicy:
+    """Which models serve a skill, in preference order."""
+    primary: str
+    fallbacks: List[str] = field(default_factory=list)
+    long_model: Optional[str] = None   # used instead of primary for long inputs
+    long_threshold: int = 0            # input length (chars) that counts as long
+
+@dataclass
+class RoutePlan:
+    skill: str
+    models: List[str]  # first entry is the primary, the rest are hedge/fallback targets
+    reason: str
+
+SKILL_ROUTES: Dict[str, RoutePolicy] = {
+    "research_topic": RoutePolicy(
+        primary=os.getenv("RESEARCH_MODEL", "gpt-4.1-nano"),
+        fallbacks=[os.getenv("RESEARCH_FALLBACK_MODEL", "gpt-4o-mini")],
+    ),
+    "draft_report": RoutePolicy(
+        primary=os.getenv("DRAFT_MODEL", "gpt-4o-mini"),
+        long_model=os.getenv("DRAFT_LONG_MODEL", "gpt-4.1-mini"),
+        long_threshold=int(os.getenv("DRAFT_LONG_THRESHOLD", "4000")),
+        fallbacks=[os.getenv("DRAFT_FALLBACK_MODEL", "gpt-4.1-nano")],
+    ),
+}
+DEFAULT_ROUTE = RoutePolicy(primary="gpt-4o-mini")
+
+# Per-attempt timeout; a hung completion counts as an error and triggers fallback
+LLM_ATTEMPT_TIMEOUT_S = float(os.getenv("LLM_ATTEMPT_TIMEOUT_S", "60"))
+# Hedge deadline used until a model has enough latency samples for a percentile
+HEDGE_DEFAULT_DEADLINE_S = float(os.getenv("HEDGE_DEFAULT_DEADLINE_S", "15"))
+HEDGE_MIN_SAMPLES = 20
+
+def size_bucket(prompt_tokens: int) -> int:
+    """Power-of-two prompt size bucket, so latency is compared between similar prompts."""
+    return prompt_tokens.bit_length()
+
+class LatencyTracker:
+    """Rolling window of completion latencies per (model, prompt size bucket)."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Dict[Tuple[str, int], Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, bucket: int, latency_s: float):
+        self.samples[(model, bucket)].append(latency_s)
+
+    def percentile(self, model: str, bucket: int, pct: float) -> Optional[float]:
+        values = self.samples.get((model, bucket))
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(int(pct / 100 * len(ordered)), len(ordered) - 1)]
+
+    def hedge_deadline(self, model: str, bucket: int, pct: float) -> float:
+        """Seconds to wait on a model before hedging: its percentile once known."""
+        if len(self.samples.get((model, bucket), ())) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DEADLINE_S
+        return self.percentile(model, bucket, pct)
+
+@dataclass
+class HedgePolicy:
+    """When and how far a slow completion may be hedged."""
+    mode: str = "model"                  # model | same | off
+    percentile: float = 95.0             # latency percentile that triggers the hedge
+    token_budget_per_min: int = 50_000   # prompt + completion tokens hedges may spend per minute
+    max_rate: float = 0.2                # at most this fraction of calls get hedged
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        mode = os.getenv("LLM_HEDGE", "model")
+        if mode not in ("model", "same", "off"):
+            raise ValueError(f"Unknown LLM_HEDGE '{mode}'. Choose from: model, same, off")
+        return cls(
+            mode=mode,
+            percentile=float(os.getenv("HEDGE_PERCENTILE", "90" if mode == "same" else "95")),
+            token_budget_per_min=int(os.getenv("HEDGE_TOKEN_BUDGET_PER_MIN", "50000")),
+            max_rate=float(os.getenv("HEDGE_MAX_RATE", "0.2")),
+        )
+
+class HedgeBudget:
+    """Token spend of hedge requests over a sliding 60 s window, plus hedge counters."""
+
+    WINDOW_S = 60.0
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self.spent: Deque[Tuple[float, int]] = deque()
+        self.spent_total = 0
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def _expire(self, now: float):
+        while self.spent and now - self.spent[0][0] > self.WINDOW_S:
+            self.spent_total -= self.spent.popleft()[1]
+
+    def try_spend(self, tokens: int) -> bool:
+        """Reserve tokens for one hedge; False if the budget or hedge rate cap is exhausted."""
+        now = time.monotonic()
+        self._expire(now)
+        # The rate cap only applies once there are enough calls to measure a rate
+        over_rate = self.calls >= HEDGE_MIN_SAMPLES and (self.hedged + 1) / self.calls > self.policy.max_rate
+        if over_rate or self.spent_total + tokens > self.policy.token_budget_per_min:
+            self.denied += 1
+            return False
+        self.spent.append((now, tokens))
+        self.spent_total += tokens
+        self.hedged += 1
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        self._expire(time.monotonic())
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedges_denied": self.denied,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            "hedge_win_rate": round(self.hedge_wins / self.hedged, 4) if self.hedged else 0.0,
+            "hedge_tokens_last_min": self.spent_total,
+        }
+
+class ModelRouter:
+    """Chooses models per skill and runs completions with hedging and fallback."""
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        routes: Dict[str, RoutePolicy] = SKILL_ROUTES,
+        hedge: Optional[HedgePolicy] = None,
+    ):
+        self.provider = provider
+        self.routes = routes
+        self.hedge = hedge or HedgePolicy.from_env()
+        self.budget = HedgeBudget(self.hedge)
+        self.tracker = LatencyTracker()
+
+    def plan(self, skill: str, input_length: int = 0) -> RoutePlan:
+        policy = self.routes.get(skill, DEFAULT_ROUTE)
+        if policy.long_model and input_length > policy.long_threshold:
+            primary, reason = policy.long_model, f"input {input_length} chars > {policy.long_threshold}"
+        else:
+            primary, reason = policy.primary, "default"
+        models = [primary] + [m for m in [policy.primary] + policy.fallbacks if m != primary]
+        return RoutePlan(skill=skill, models=list(dict.fromkeys(models)), reason=reason)
+
+    def hedge_metrics(self) -> Dict[str, Any]:
+        """Hedge rate, win rate and budget use since startup."""
+        return {"mode": self.hedge.mode, **self.budget.metrics()}
+
+    async def _attempt(
+        self, client: AsyncOpenAI, model: str, bucket: int, messages: List[dict], max_tokens: Optional[int],
+    ) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        limits = {"max_tokens": max_tokens} if max_tokens else {}
+        try:
+            response = await asyncio.wait_for(
+                client.chat.completions.create(model=model, messages=messages, **limits),
+                LLM_ATTEMPT_TIMEOUT_S,
+            )
+        except asyncio.TimeoutError:
+            # A hung call is a slow sample
+            self.tracker.record(model, bucket, LLM_ATTEMPT_TIMEOUT_S)
+            raise
+        except asyncio.CancelledError:
+            # A hedge loser cancelled past the hedge deadline is the slow tail that triggered
+            # the hedge: keep its elapsed time as a lower bound, or the percentile drifts low.
+            # One cancelled before then (a hedge that lost to the primary) says nothing.
+            elapsed_s = time.perf_counter() - start
+            if elapsed_s >= self.tracker.hedge_deadline(model, bucket, self.hedge.percentile):
+                self.tracker.record(model, bucket, elapsed_s)
+            raise
+        latency_s = time.perf_counter() - start
+        self.tracker.record(model, bucket, latency_s)
+        return response, latency_s
+
+    async def _emit(self, source: Optional[str], event_type: str, data: Dict[str, Any], **kwargs):
+        if source:
+            await broadcast_event(source, event_type, data, **kwargs)
+
+    async def complete(
+        self,
+        source: Optional[str],
+        plan: RoutePlan,
+        messages: List[dict],
+        api_key: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Run the completion for ``plan`` and return (response, model used).
+
+        If the running model is slower than its latency percentile for this
+        prompt size, a hedge is launched (next model or same model, per
+        LLM_HEDGE) when the token budget allows. The first successful answer
+        wins and the other attempt is cancelled. Failed attempts fall back to
+        the next untried model, which gets its own hedge deadline.
+        """
+        client = self.provider.client(api_key)
+        if not client:
+            raise ValueError("OPENAI_API_KEY not found in env or request.")
+
+        prompt_tokens = count_message_tokens(messages)
+        bucket = size_bucket(prompt_tokens)
+        remaining = list(plan.models)
+        pending: Dict[asyncio.Task, str] = {}
+        hedge_task: Optional[asyncio.Task] = None
+        failures: List[Dict[str, str]] = []
+        hedged = False
+        # The model whose latency decides when to hedge: each launched (non-hedge) attempt
+        # gets its own deadline, measured from its own start, and one hedge
+        current = remaining.pop(0)
+        hedge_armed = True
+        self.budget.calls += 1
+
+        def launch(model: str) -> asyncio.Task:
+            task = asyncio.create_task(self._attempt(client, model, bucket, messages, max_tokens))
+            pending[task] = model
+            return task
+
+        def hedge_target() -> Optional[str]:
+            if self.hedge.mode == "same":
+                return current
+            if self.hedge.mode == "model" and remaining:
+                return remaining[0]
+            return None
+
+        launch(current)
+        started = time.perf_counter()
+        try:
+            while pending:
+                timeout = None
+                if hedge_armed and hedge_target():
+                    deadline = self.tracker.hedge_deadline(current, bucket, self.hedge.percentile)
+                    timeout = max(deadline - (time.perf_counter() - started), 0)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged, hedge_armed = True, False
+                    target = hedge_target()
+                    # Charge the prompt plus the completion cap (or an equally sized reply)
+                    if not self.budget.try_spend(prompt_tokens + (max_tokens or prompt_tokens)):
+                        await self._emit(source, "llm_hedge", {
+                            "skill": plan.skill,
+                            "slow_model": current,
+                            "skipped": "hedge budget exhausted",
+                            **self.budget.metrics(),
+                        })
+                        continue
+                    await self._emit(source, "llm_hedge", {
+                        "skill": plan.skill,
+                        "slow_model": current,
+                        "hedge_model": target,
+                        "mode": self.hedge.mode,
+                        "after_ms": int((time.perf_counter() - started) * 1000),
+                        "prompt_bucket": bucket,
+                    })
+                    if self.hedge.mode == "model":
+                        remaining.pop(0)
+                    hedge_task = launch(target)
+                    continue
+
+                for task in done:
+                    model = pending.pop(task)
+                    if task.exception() is None:
+                        response, latency_s = task.result()
+                        if task is hedge_task:
+                            self.budget.hedge_wins += 1
+                        p = self.tracker.percentile(model, bucket, self.hedge.percentile)
+                        metrics = self.budget.metrics()
+                        await self._emit(source, "llm_route", {
+                            "skill": plan.skill,
+                            "model": model,
+                            "reason": plan.reason,
+                            "hedged": hedged,
+                            "hedge_won": task is hedge_task,
+                            "fallbacks": failures,
+                            "latency_percentile": self.hedge.percentile,
+                            "model_percentile_ms": int(p * 1000) if p is not None else None,
+                            "hedge_rate": metrics["hedge_rate"],
+                            "hedge_win_rate": metrics["hedge_win_rate"],
+                        }, latency_ms=int(latency_s * 1000), status="success")
+                        return response, model
+
+                    error = task.exception()
+                    failures.append({"model": model, "error": type(error).__name__})
+                    await self._emit(source, "llm_fallback", {
+                        "skill": plan.skill,
+                        "failed_model": model,
+                        "error": str(error) or type(error).__name__,
+                        "next_model": remaining[0] if remaining else None,
+                    }, status="error")
+
+                if not pending:
+                    if not remaining:
+                        raise error
+                    current = remaining.pop(0)
+                    launch(current)
+                    started, hedge_armed = time.perf_counter(), True
+            raise RuntimeError(f"No model available for skill '{plan.skill}'")
+        finally:
+            for task in pending:
+                task.cancel()
+
+_router: Optional[ModelRouter] = None
+
+def get_router() -> ModelRouter:
+    """The process-wide model router on top of the configured provider."""
+    global _router
+    if _router is None:
+        _router = ModelRouter(get_provider())
+    return _router
@@ -0,0 +1,224 @@
+"""
+Mock LLM Server - OpenAI chat completions stand-in
+Port: 8900
+Deterministic responses for offline benchmarking: configurable latency
+distribution, token rate, SSE streaming, 429/5xx fault injection, max_tokens
+and prompt-prefix caching reported as cached_tokens.
+
+Run:  python backend/mock_llm_server.py --latency lognormal --latency-ms 400 --error-rate 0.02
+Point agents at it with LLM_PROVIDER=mock (MOCK_LLM_URL defaults to http://127.0.0.1:8900/v1).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+@dataclass
+class MockConfig:
+    latency: str = "fixed"          # fixed | uniform | lognormal
+    latency_ms: float = 200.0       # base (fixed/uniform) or median (lognormal) time to first token
+    jitter_ms: float = 100.0        # uniform: +/- range, lognormal: tail spread
+    tokens_per_sec: float = 0.0     # 0 = return all tokens instantly
+    completion_tokens: int = 120
+    rate_limit_rate: float = 0.0    # fraction of requests answered with 429
+    error_rate: float = 0.0         # fraction of requests answered with 500/503
+    seed: int = 0
+    history: int = 4096             # distinct request bodies and prefixes remembered (LRU)
+
+config = MockConfig()
+# How many times each recent request body has been seen, so retries differ deterministically
+_seen: "OrderedDict[str, int]" = OrderedDict()
+# Recently served message-prefix digests, to report cached_tokens like provider prompt caching
+_prefixes: "OrderedDict[str, None]" = OrderedDict()
+stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+app = FastAPI()
+
+def remember(recent: OrderedDict, key: str, value: Any):
+    """Store key as the most recent entry, dropping the oldest past config.history (memory stays flat in long runs)."""
+    recent[key] = value
+    recent.move_to_end(key)
+    while len(recent) > config.history:
+        recent.popitem(last=False)
+
+def request_rng(body: dict) -> random.Random:
+    """RNG seeded from the config seed, request content and repeat count."""
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    count = _seen.get(digest, 0) + 1
+    remember(_seen, digest, count)
+    return random.Random(f"{config.seed}:{digest}:{count}")
+
+def sample_latency(rng: random.Random) -> float:
+    """Time to first token, in seconds."""
+    if config.latency == "uniform":
+        ms = rng.uniform(config.latency_ms - config.jitter_ms, config.latency_ms + config.jitter_ms)
+    elif config.latency == "lognormal":
+        # Parameterized so the median is latency_ms and the tail grows with jitter_ms
+        sigma = config.jitter_ms / max(config.latency_ms, 1.0)
+        ms = config.latency_ms * rng.lognormvariate(0.0, sigma)
+    else:
+        ms = config.latency_ms
+    return max(ms, 0.0) / 1000
+
+def generate_tokens(messages: List[dict], rng: random.Random) -> List[str]:
+    """Deterministic, shape-appropriate output: research bullets, a markdown report or one section."""
+    user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    first_line = user.split("\n", 1)[0]
+    if first_line.startswith("Research topic:"):
+        topic = first_line.replace("Research topic:", "").strip()
+        lines = [f"- Key point {i + 1} about {topic}: finding {rng.randint(100, 999)}." for i in range(5)]
+    elif first_line.startswith("Section:"):
+        heading = first_line.replace("Section:", "").strip()
+        lines = [heading, f"Revised analysis {rng.randint(100, 999)}.", ""]
+    else:
+        topic = first_line.replace("Topic:", "").strip() or "Report"
+        lines = [f"# {topic}", ""]
+        for i in range(3):
+            lines += [f"## Section {i + 1}", f"Analysis {rng.randint(100, 999)} of {topic}.", ""]
+    text = "\n".join(lines).strip()
+
+    # Pad to the configured completion size (one word ~ one token)
+    missing = config.completion_tokens - len(text.split())
+    if missing > 0:
+        text += "\n" + " ".join(f"detail{rng.randint(0, 99)}" for _ in range(missing))
+    return re.findall(r"\S+\s*", text)
+
+def error_response(status: int, message: str, error_type: str) -> JSONResponse:
+    headers = {"retry-after": "1"} if status == 429 else None
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": error_type, "code": None}},
+        headers=headers,
+    )
+
+def cached_prompt_tokens(messages: List[dict]) -> int:
+    """Tokens in the longest run of leading messages seen in an earlier request."""
+    digest = hashlib.sha256()
+    cached, hit = 0, True
+    for message in messages:
+        digest.update(json.dumps(message, sort_keys=True).encode())
+        prefix = digest.hexdigest()
+        if hit and prefix in _prefixes:
+            cached += len(str(message.get("content", "")).split())
+        else:
+            hit = False
+        remember(_prefixes, prefix, None)
+    return cached
+
+def usage(messages: List[dict], completion_tokens: int, cached_tokens: int) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "mock"}]}
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    rng = request_rng(body)
+    stats["requests"] += 1
+
+    roll = rng.random()
+    if roll < config.rate_limit_rate:
+        stats["rate_limited"] += 1
+        return error_response(429, "Rate limit reached (mock)", "rate_limit_exceeded")
+    if roll < config.rate_limit_rate + config.error_rate:
+        stats["errors"] += 1
+        status = rng.choice([500, 503])
+        return error_response(status, "Upstream failure (mock)", "server_error")
+
+    messages = body.get("messages", [])
+    model = body.get("model", "gpt-4o-mini")
+    tokens = generate_tokens(messages, rng)
+    max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+    finish_reason = "stop"
+    if max_tokens and len(tokens) > max_tokens:
+        tokens, finish_reason = tokens[:max_tokens], "length"
+    cached_tokens = cached_prompt_tokens(messages)
+    completion_id = f"chatcmpl-mock-{rng.getrandbits(48):012x}"
+    created = int(time.time())
+    per_token = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+    await asyncio.sleep(sample_latency(rng))
+
+    if body.get("stream"):
+        async def stream():
+            for token in tokens:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if per_token:
+                    await asyncio.sleep(per_token)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                "usage": usage(messages, len(tokens), cached_tokens),
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    if per_token:
+        await asyncio.sleep(per_token * len(tokens))
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": finish_reason,
+        }],
+        "usage": usage(messages, len(tokens), cached_tokens),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default=config.latency)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--tokens-per-sec", type=float, default=config.tokens_per_sec)
+    parser.add_argument("--completion-tokens", type=int, default=config.completion_tokens)
+    parser.add_argument("--rate-limit-rate", type=float, default=config.rate_limit_rate)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--seed", type=int, default=config.seed)
+    parser.add_argument("--history", type=int, default=config.history)
+    args = parser.parse_args()
+
+    for field in vars(config):
+        setattr(config, field, getattr(args, field))
+
+    print(f"Starting Mock LLM Server on port {args.port}... ({config})")
+    uvicorn.run(app, host='127.0.0.1', port=args.port, log_level="warning")
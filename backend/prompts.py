@@ -0,0 +1,192 @@
+"""
+Prompt assembly for the agents' LLM calls.
+Every prompt is built as a stable prefix (system instructions, then anything
+shared between requests) followed by the per-request part, so providers that
+cache prompt prefixes can reuse as much of it as possible. Prompts are token
+counted locally before sending; notes are trimmed to fit the skill's budget.
+
+RESEARCH_PROMPT_MAX_TOKENS=1000   DRAFT_PROMPT_MAX_TOKENS=6000
+RESEARCH_COMPLETION_MAX_TOKENS=600   DRAFT_COMPLETION_MAX_TOKENS=2000
+"""
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from incremental_draft import split_bullets
+
+RESEARCH_SYSTEM = "You are a senior researcher. Provide 4-5 key bullet points about the requested topic."
+DRAFT_SYSTEM = "You are a technical writer. Create a markdown report based on the input."
+SECTION_SYSTEM = (
+    "You are a technical writer. Rewrite one section of a markdown report so it reflects "
+    "the notes given. Keep its '## ' heading and return only that section."
+)
+
+@dataclass
+class TokenBudget:
+    prompt: int       # max tokens sent
+    completion: int   # max_tokens requested
+
+BUDGETS: Dict[str, TokenBudget] = {
+    "research_topic": TokenBudget(
+        prompt=int(os.getenv("RESEARCH_PROMPT_MAX_TOKENS", "1000")),
+        completion=int(os.getenv("RESEARCH_COMPLETION_MAX_TOKENS", "600")),
+    ),
+    "draft_report": TokenBudget(
+        prompt=int(os.getenv("DRAFT_PROMPT_MAX_TOKENS", "6000")),
+        completion=int(os.getenv("DRAFT_COMPLETION_MAX_TOKENS", "2000")),
+    ),
+}
+
+# Chat format overhead per message and for priming the reply (OpenAI cookbook figures)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_PIECE = re.compile(r" ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+_counter: Optional[Callable[[str], int]] = None
+
+def _approximate_count(text: str) -> int:
+    """BPE-like estimate: one token per pre-token piece, long words split every ~6 chars."""
+    return sum(1 + (len(piece.strip()) - 1) // 6 if piece.strip() else 1 for piece in _PIECE.findall(text))
+
+def _encoder() -> Callable[[str], int]:
+    """tiktoken's o200k_base (gpt-4o / gpt-4.1) when available, else the local estimate."""
+    global _counter
+    if _counter is None:
+        try:
+            import tiktoken
+
+            encode = tiktoken.get_encoding(os.getenv("PROMPT_ENCODING", "o200k_base")).encode
+            _counter = lambda text: len(encode(text))
+        except Exception as e:
+            print(f"[Prompts] tiktoken unavailable ({type(e).__name__}); using approximate token counts",
+                  file=sys.stderr)
+            _counter = _approximate_count
+    return _counter
+
+def count_tokens(text: str) -> int:
+    return _encoder()(text)
+
+def count_message_tokens(messages: List[dict]) -> int:
+    count = _encoder()
+    return sum(TOKENS_PER_MESSAGE + count(m["content"]) for m in messages) + TOKENS_PER_REPLY
+
+def _longest_fit(cuts: Sequence[int], text: str, max_tokens: int) -> int:
+    """Index into cuts of the first cut that no longer fits (binary search)."""
+    count = _encoder()
+    lo, hi = 0, len(cuts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if count(text[:cuts[mid]]) <= max_tokens:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut text at the last word boundary that fits max_tokens, or mid-word if no boundary does."""
+    if _encoder()(text) <= max_tokens:
+        return text
+    cuts = [m.start() for m in re.finditer(r" ", text)]
+    fit = _longest_fit(cuts, text, max_tokens)
+    if fit:
+        return text[:cuts[fit - 1]]
+    # No word boundary fits (e.g. a URL or one long token): hard cut by characters
+    cuts = range(1, len(text) + 1)
+    fit = _longest_fit(cuts, text, max_tokens)
+    return text[:cuts[fit - 1]] if fit else ""
+
+def trim_notes(notes: str, topic: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Fit notes into max_tokens, returning (notes, bullets dropped).
+
+    Exact duplicate bullets go first, then the bullets sharing the fewest
+    words with the topic; surviving bullets keep their original order. If a
+    single bullet is still too long it is cut at a word boundary.
+    """
+    count = _encoder()
+    if count(notes) <= max_tokens:
+        return notes, 0
+    bullets = list(dict.fromkeys(split_bullets(notes)))
+    topic_words = set(re.findall(r"[a-z0-9]+", topic.lower()))
+    relevance = {b: len(topic_words & set(re.findall(r"[a-z0-9]+", b.lower()))) for b in bullets}
+    kept = list(bullets)
+    # Lowest relevance first; among ties, later bullets go first
+    for bullet in sorted(reversed(bullets), key=relevance.__getitem__):
+        if len(kept) == 1 or count("\n".join(f"- {b}" for b in kept)) <= max_tokens:
+            break
+        kept.remove(bullet)
+    text = truncate("\n".join(f"- {b}" for b in kept), max_tokens)
+    return text, len(split_bullets(notes)) - len(kept)
+
+@dataclass
+class Prompt:
+    skill: str
+    messages: List[dict]
+    prompt_tokens: int    # counted locally
+    max_tokens: int       # completion cap
+    trimmed_bullets: int = 0
+
+def _build(skill: str, messages: List[dict], trimmed: int = 0) -> Prompt:
+    budget = BUDGETS[skill]
+    return Prompt(skill, messages, count_message_tokens(messages), budget.completion, trimmed)
+
+def research_prompt(topic: str) -> Prompt:
+    topic = truncate(topic, BUDGETS["research_topic"].prompt - count_message_tokens([
+        {"role": "system", "content": RESEARCH_SYSTEM},
+        {"role": "user", "content": "Research topic: "},
+    ]))
+    return _build("research_topic", [
+        {"role": "system", "content": RESEARCH_SYSTEM},
+        {"role": "user", "content": f"Research topic: {topic}"},
+    ])
+
+def draft_prompt(topic: str, notes: str) -> Prompt:
+    header = f"Topic: {topic}\nNotes:\n"
+    fixed = count_message_tokens([{"role": "system", "content": DRAFT_SYSTEM}, {"role": "user", "content": header}])
+    notes, trimmed = trim_notes(notes, topic, max(BUDGETS["draft_report"].prompt - fixed, 1))
+    return _build("draft_report", [
+        {"role": "system", "content": DRAFT_SYSTEM},
+        {"role": "user", "content": header + notes},
+    ], trimmed)
+
+def section_prompt(topic: str, report: str, section: str, notes: List[str], removed: List[str]) -> Prompt:
+    """
+    Rewrite one section. The report comes before the section-specific
+    message, so concurrent rewrites of the same report share that prefix.
+    Within the draft budget, notes get up to half of it and the report is
+    cut to whatever the rest of the prompt leaves.
+    """
+    budget = BUDGETS["draft_report"].prompt
+    heading = section.split("\n", 1)[0]
+    notes_text, trimmed = trim_notes("\n".join(f"- {b}" for b in notes), topic, max(budget // 2, 1))
+    removed_text = truncate("\n".join(f"- {b}" for b in removed), max(budget // 4, 1))
+    header = f"Topic: {topic}\nCurrent report:\n"
+    instruction = (
+        f"Section: {heading}\nNotes:\n{notes_text or '(none)'}\nNotes no longer valid:\n{removed_text or '(none)'}"
+    )
+    fixed = count_message_tokens([
+        {"role": "system", "content": SECTION_SYSTEM},
+        {"role": "user", "content": header},
+        {"role": "user", "content": instruction},
+    ])
+    report = truncate(report, max(budget - fixed, 0))
+    return _build("draft_report", [
+        {"role": "system", "content": SECTION_SYSTEM},
+        {"role": "user", "content": header + report},
+        {"role": "user", "content": instruction},
+    ], trimmed)
+
+def usage_breakdown(response: Any, prompt: Prompt) -> Dict[str, Any]:
+    """Prompt, completion and cached token counts for one call, plus the local estimate."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "estimated_prompt_tokens": prompt.prompt_tokens,
+        "max_tokens": prompt.max_tokens,
+        "trimmed_bullets": prompt.trimmed_bullets,
+    }
@@ -0,0 +1,249 @@
+"""
+Client side of the agent registry (backend/agent_registry.py).
+Agents announce their AgentCard and load with `announce`, which re-registers
+every AGENT_HEARTBEAT_S and deregisters on shutdown. Callers keep a
+RoutingTable of skill -> endpoints. The table is refreshed by long-polling the
+registry, so a request never waits for a card fetch. If the registry is not
+running, cards are fetched once from A2A_AGENT_URLS instead. While the table is
+watched, each endpoint's /load (backend/health.py) is polled every
+AGENT_LOAD_POLL_S. The load in the registry table is only as of its last
+membership or card change, so it is a starting point until the first poll.
+
+Only the standard library is imported at module level (httpx is imported on
+first use) so the MCP server keeps its startup budget.
+
+AGENT_REGISTRY_URL=http://localhost:8500
+AGENT_HEARTBEAT_S=5
+AGENT_LOAD_POLL_S=1              0 routes on the registry table's load and this process's calls
+AGENT_PUBLIC_HOST=localhost      host written into the advertised AgentCard url
+A2A_AGENT_URLS=http://localhost:8001,http://localhost:8002   fallback without a registry
+"""
+import asyncio
+import itertools
+import os
+import sys
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from uuid import uuid4
+
+AGENT_REGISTRY_URL = os.getenv("AGENT_REGISTRY_URL", "http://localhost:8500").rstrip("/")
+AGENT_HEARTBEAT_S = float(os.getenv("AGENT_HEARTBEAT_S", "5"))
+AGENT_PUBLIC_HOST = os.getenv("AGENT_PUBLIC_HOST", "localhost")
+AGENT_LOAD_POLL_S = float(os.getenv("AGENT_LOAD_POLL_S", "1"))
+
+# Where an agent serves its AgentCard (a2a.utils.constants.AGENT_CARD_WELL_KNOWN_PATH)
+AGENT_CARD_PATH = "/.well-known/agent-card.json"
+# Where an agent reports its current load
+LOAD_PATH = "/load"
+
+def public_url(port: int) -> str:
+    """The url an agent advertises on its AgentCard, matching the port it listens on."""
+    return f"http://{AGENT_PUBLIC_HOST}:{port}/"
+
+@dataclass
+class Endpoint:
+    url: str
+    name: str
+    card: Dict[str, Any]  # AgentCard JSON, as served by the agent
+    load: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def reported_load(self) -> int:
+        return int(self.load.get("in_flight", 0)) + int(self.load.get("queue_depth", 0))
+
+    @property
+    def draining(self) -> bool:
+        return bool(self.load.get("draining"))
+
+class RoutingTable:
+    """Cached skill -> endpoints map, kept current by a long-poll watch."""
+
+    def __init__(self, registry_url: str = AGENT_REGISTRY_URL, fallback_urls: Optional[List[str]] = None,
+                 wait_s: float = 30.0, retry_s: float = 2.0, load_poll_s: float = AGENT_LOAD_POLL_S):
+        self.registry_url = registry_url
+        self.fallback_urls = fallback_urls or []
+        self.wait_s = wait_s
+        self.retry_s = retry_s
+        self.load_poll_s = load_poll_s
+        self.version = -1  # anything the registry is not at, so the first poll returns at once
+        self.skills: Dict[str, List[Endpoint]] = {}
+        self._static: Optional[Dict[str, List[Endpoint]]] = None
+        self._outstanding: Counter = Counter()
+        self._turn = itertools.count()
+        self._watcher: Optional[asyncio.Task] = None
+        # Set after the first poll, successful or not, so callers wait for at most one round trip
+        self.polled = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, default_fallback: str = "http://localhost:8001,http://localhost:8002") -> "RoutingTable":
+        spec = os.getenv("A2A_AGENT_URLS", default_fallback)
+        return cls(fallback_urls=[url.strip() for url in spec.split(",") if url.strip()])
+
+    def start(self):
+        """Start the watch task on the running loop (idempotent)."""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self.watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+
+    def apply(self, table: Dict[str, Any]):
+        """Replace the cached table with a registry /routes response."""
+        # Polled load is fresher than the table's, which is as of its version
+        polled = {e.url: e.load for es in self.skills.values() for e in es} if self.load_poll_s > 0 else {}
+        agents = {url: Endpoint(url, entry["name"], entry["card"], polled.get(url, entry.get("load", {})))
+                  for url, entry in table["agents"].items()}
+        self.skills = {skill: [agents[url] for url in urls] for skill, urls in table["skills"].items()}
+        self.version = table["version"]
+
+    async def watch(self):
+        """Long-poll the registry for table changes (and poll endpoint load); keeps the last table while it is down."""
+        poller = asyncio.create_task(self.poll_load()) if self.load_poll_s > 0 else None
+        try:
+            await self._watch()
+        finally:
+            if poller is not None:
+                poller.cancel()
+                await asyncio.gather(poller, return_exceptions=True)
+
+    async def _watch(self):
+        import httpx
+        warned = False
+        async with httpx.AsyncClient(timeout=self.wait_s + 5) as client:
+            while True:
+                try:
+                    response = await client.get(f"{self.registry_url}/routes",
+                                                params={"version": self.version, "wait": self.wait_s})
+                    response.raise_for_status()
+                    self.apply(response.json())
+                    self.polled.set()
+                    warned = False
+                except (httpx.HTTPError, ValueError, KeyError) as e:
+                    self.polled.set()
+                    if not warned:
+                        print(f"[Routing] Registry unavailable at {self.registry_url} ({e}); "
+                              f"retrying every {self.retry_s}s", file=sys.stderr)
+                        warned = True
+                    await asyncio.sleep(self.retry_s)
+
+    async def poll_load(self):
+        """Refresh every known endpoint's load from its /load every load_poll_s."""
+        import httpx
+        async with httpx.AsyncClient(timeout=self.load_poll_s) as client:
+            while True:
+                await self.refresh_load(client)
+                await asyncio.sleep(self.load_poll_s)
+
+    async def refresh_load(self, client):
+        """One round of /load requests; an endpoint that does not answer keeps its last load."""
+        import httpx
+
+        async def fetch(endpoint: Endpoint):
+            try:
+                response = await client.get(endpoint.url.rstrip("/") + LOAD_PATH)
+                response.raise_for_status()
+                endpoint.load = response.json()
+            except (httpx.HTTPError, ValueError):
+                pass  # unreachable endpoints are the circuit breakers' business
+
+        known = {e.url: e for table in (self.skills, self._static or {}) for es in table.values() for e in es}
+        await asyncio.gather(*(fetch(e) for e in known.values()))
+
+    async def endpoints(self, skill: str, sync_timeout: float = 1.0) -> List[Endpoint]:
+        """Endpoints serving `skill`, from the registry or else the fallback cards."""
+        if not self.polled.is_set() and self._watcher is not None:
+            try:
+                await asyncio.wait_for(self.polled.wait(), sync_timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self.skills.get(skill):
+            return self.skills[skill]
+        return (await self._fallback()).get(skill, [])
+
+    async def _fallback(self) -> Dict[str, List[Endpoint]]:
+        """Fetch the AgentCards at the fallback urls once and index them by skill."""
+        if self._static is None:
+            import httpx
+            static: Dict[str, List[Endpoint]] = {}
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                for url in self.fallback_urls:
+                    try:
+                        response = await client.get(url.rstrip("/") + AGENT_CARD_PATH)
+                        response.raise_for_status()
+                        card = response.json()
+                    except (httpx.HTTPError, ValueError) as e:
+                        print(f"[Routing] No AgentCard at {url}: {e}", file=sys.stderr)
+                        continue
+                    endpoint = Endpoint(card.get("url", url), card.get("name", url), card)
+                    for skill in card.get("skills", []):
+                        static.setdefault(skill["id"], []).append(endpoint)
+            if not static:
+                return {}  # nothing reachable yet; try again on the next call
+            self._static = static
+        return self._static
+
+    def forget(self, url: str):
+        """Drop fallback cards after a failed call so the next call fetches them again."""
+        if self._static is not None and any(e.url == url for es in self._static.values() for e in es):
+            self._static = None
+
+    @asynccontextmanager
+    async def route(self, skill: str, usable: Optional[Callable[[str], bool]] = None) -> AsyncIterator[Endpoint]:
+        """
+        Pick the least loaded endpoint for `skill` and count the call against
+        it until the block exits. Load is what the agent last reported plus
+        this process's own calls in flight; equal loads go to the lower
+        recent p95, then rotate. Draining endpoints and those for which
+        `usable(url)` is false (e.g. an open circuit) are skipped unless no
+        other endpoint is left.
+        """
+        endpoints = await self.endpoints(skill)
+        if not endpoints:
+            raise LookupError(f"no agent serves skill '{skill}'")
+        endpoints = [e for e in endpoints if not e.draining and (usable is None or usable(e.url))] or endpoints
+        turn = next(self._turn) % len(endpoints)
+        rotated = endpoints[turn:] + endpoints[:turn]
+        endpoint = min(rotated, key=lambda e: (e.reported_load + self._outstanding[e.url], e.load.get("p95_ms") or 0))
+        self._outstanding[endpoint.url] += 1
+        try:
+            yield endpoint
+        finally:
+            self._outstanding[endpoint.url] -= 1
+            if not self._outstanding[endpoint.url]:
+                del self._outstanding[endpoint.url]
+
+async def announce(card: Dict[str, Any], load: Callable[[], Dict[str, Any]],
+                   registry_url: str = AGENT_REGISTRY_URL, interval_s: float = AGENT_HEARTBEAT_S):
+    """
+    Keep this agent registered: post its AgentCard JSON and current load every
+    `interval_s` (the registry expires agents that stop), deregister on cancel.
+    """
+    import httpx
+    registered = warned = False
+    # Identifies this process: a successor bound to the same port (and url) keeps its registration
+    instance = uuid4().hex
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        try:
+            while True:
+                try:
+                    response = await client.post(f"{registry_url}/agents",
+                                                 json={"card": card, "load": load(), "instance": instance})
+                    response.raise_for_status()
+                    if not registered:
+                        print(f"[Registry] Registered {card['name']} at {card['url']}", file=sys.stderr)
+                    registered, warned = True, False
+                except httpx.HTTPError as e:
+                    if not warned:
+                        print(f"[Registry] Registry unavailable at {registry_url} ({e}); "
+                              f"retrying every {interval_s}s", file=sys.stderr)
+                    registered, warned = False, True
+                await asyncio.sleep(interval_s)
+        finally:
+            try:
+                await client.request("DELETE", f"{registry_url}/agents", params={"url": card["url"], "instance": instance})
+            except httpx.HTTPError:
+                pass
@@ -1,20 +1,20 @@
 """
 Researcher Agent - A2A Server with Event Broadcasting
-Port: 8001
+Port: 8001 (RESEARCHER_PORT)
 Skill: research_topic
-Researches topic, calls Writer Agent via A2A, returns final report
-Broadcasts structured events via WebSocket
+Runs the research_and_draft workflow (backend/workflow.py): researches the
+topic, has the agent with the draft_report skill (the Writer) draft it via A2A,
+and returns the final report
+Publishes structured events to the event gateway
 """
 import os
-import uvicorn
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 import httpx
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
 import time
 import traceback as tb
 import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple, Union
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
@@ -29,39 +29,143 @@ from a2a.types import (
     MessageSendParams,
     SendMessageRequest,
 )
-from a2a.client import A2AClient, A2ACardResolver
+from a2a.client import A2AClient
+from starlette.responses import JSONResponse
 from uuid import uuid4
 
-from event_broadcaster import init_event_queue, broadcast_event, get_event_queue
+import a2a_access
+from artifact_store import ArtifactRef, ArtifactStore, find_ref, ref_message
+from circuit_breaker import Breakers, CircuitBreaker, CircuitOpen, HopUnavailable
+from colocated import IN_PROCESS, LocalA2AClient, local_agents
+from event_broadcaster import a2a_transport, init_event_queue, broadcast_event, publish_to_gateway, demo_pause, register_hops
+from health import Health
+from lifecycle import Lifecycle, serve
+from llm_provider import get_router
+from prompts import usage_breakdown
+from topic_cache import TOPIC_CACHE_ENABLED, SemanticTopicCache
+from scheduler import Overloaded, Scheduler
+from tenants import TenantRegistry, outgoing_metadata, read_message, tenant_id
+from registry_client import RoutingTable, announce, public_url
+from workflow import RESEARCH_AND_DRAFT, A2ANode, LLMNode, Node, WorkflowEngine, memoizable
 
 load_dotenv()
 
-api_key = os.getenv("OPENAI_API_KEY")
-openai_client = AsyncOpenAI(api_key=api_key) if api_key else None
+# Runs the workflow graph; event hops come from the same graph
+workflows = WorkflowEngine.from_env()
+register_hops(RESEARCH_AND_DRAFT.hops())
 
-WRITER_AGENT_URL = "http://localhost:8002"
+RESEARCHER_PORT = int(os.getenv("RESEARCHER_PORT", "8001"))
 
-# WebSocket connections
-active_connections: List[WebSocket] = []
+# Skill -> endpoints, kept current by the agent registry
+routes = RoutingTable.from_env()
+
+# Per-endpoint circuit breakers: a down or hanging Writer fails fast instead of holding workers
+breakers = Breakers.from_env()
+
+# Last good report per topic and tenant, served (marked degraded) when a hop is unavailable
+DEGRADED_REPORT_MAX_AGE_S = float(os.getenv("DEGRADED_REPORT_MAX_AGE_S", "86400"))
+
+def report_cache() -> SemanticTopicCache:
+    return SemanticTopicCache(
+        threshold=float(os.getenv("TOPIC_CACHE_THRESHOLD", "0.9")),
+        size=int(os.getenv("DEGRADED_REPORT_CACHE_SIZE", "1000")),
+        ttl_s=DEGRADED_REPORT_MAX_AGE_S,
+    )
+
+# Bounded worker pool with priority classes and per-tenant fair queueing
+scheduler = Scheduler.from_env()
+
+# Per-tenant quotas, metrics and caches. Slots are held while queued, so by default a
+# tenant may have every worker busy plus a share of the queue before its quota rejects
+tenants = TenantRegistry.from_env(default_concurrency=scheduler.workers + max(scheduler.max_queue // 4, 1))
+
+# Reports above ARTIFACT_INLINE_MAX_BYTES are returned by reference
+artifacts = ArtifactStore.from_env()
+
+# Background tasks, tasks in flight and draining on shutdown
+lifecycle = Lifecycle("RESEARCHER")
 
 class ResearcherAgent:
-    """Researches topics and delegates drafting to Writer Agent via A2A."""
+    """Runs the nodes of the Researcher's workflow for one request."""
     
-    def __init__(self, topic: str, api_key: str = None):
+    def __init__(self, topic: str, api_key: str = None, tenant: str = "anonymous"):
         self.topic = topic
         self.api_key = api_key
+        self.tenant = tenant
+        # Reuses research notes for near-duplicate phrasings of a topic, per tenant
+        self.topic_cache = (
+            tenants.cache(tenant, "topics", SemanticTopicCache.from_env) if TOPIC_CACHE_ENABLED else None
+        )
+        # Why the result is a cached stand-in, if it is one
+        self.degraded = None
+    
+    async def run(self) -> Union[str, ArtifactRef]:
+        """Run the workflow; fall back to the last good report when a hop is unavailable."""
+        reports = tenants.cache(self.tenant, "reports", report_cache)
+        try:
+            report = await workflows.run(RESEARCH_AND_DRAFT, {"topic": self.topic}, self.run_node, scope=self.tenant)
+        except HopUnavailable as e:
+            hit = reports.get(self.topic)
+            if hit is not None and isinstance(hit.notes, ArtifactRef) and not artifacts.exists(hit.notes):
+                # The report's artifact was pruned from the store since it was cached
+                reports.discard(hit.matched_topic)
+                hit = None
+            if hit is None:
+                raise
+            self.degraded = e.reason
+            print(f"[Researcher] {e}; serving the cached report for '{hit.matched_topic}'")
+            await broadcast_event(
+                "RESEARCHER",
+                "degraded_response",
+                {
+                    "topic": self.topic,
+                    "matched_topic": hit.matched_topic,
+                    "similarity": round(hit.similarity, 3),
+                    "reason": e.reason,
+                    "endpoint": e.endpoint,
+                    "tenant": self.tenant
+                },
+                status="success"
+            )
+            return hit.notes
+        if memoizable(report):
+            # Only real reports are fallbacks; an error text would be served as a success
+            reports.put(self.topic, report)
+        return report
+    
+    async def run_node(self, node: Node, inputs: dict) -> Union[str, ArtifactRef]:
+        """Execute one workflow node (called by the workflow engine)."""
+        if isinstance(node, LLMNode):
+            return await self.run_llm(node, inputs)
+        return await self.call_skill(node, node.message(inputs))
     
-    async def research(self) -> str:
-        """Generate research notes using OpenAI."""
-        client = openai_client
+    async def run_llm(self, node: LLMNode, inputs: dict) -> str:
+        """Run an LLM node, e.g. generate research notes."""
         if self.api_key:
             print(f"[Researcher] Using provided API key for request")
-            client = AsyncOpenAI(api_key=self.api_key)
-            
-        if not client:
-            raise ValueError("OPENAI_API_KEY not found in env or request.")
         
-        print(f"[Researcher] Researching: {self.topic}")
+        cache = self.topic_cache if node.topic_cached else None
+        hit = cache.get(self.topic) if cache is not None else None
+        if hit:
+            print(f"[Researcher] Reusing notes for '{hit.matched_topic}' (similarity {hit.similarity:.2f})")
+            await broadcast_event(
+                "RESEARCHER",
+                "cache_hit",
+                {
+                    "topic": self.topic,
+                    "matched_topic": hit.matched_topic,
+                    "similarity": round(hit.similarity, 3),
+                    "tenant": self.tenant,
+                    **cache.stats()
+                },
+                status="success"
+            )
+            return hit.notes
+        
+        print(f"[Researcher] Running {node.id}: {self.topic}")
+        router = get_router()
+        prompt = node.prompt(inputs)
+        plan = router.plan(prompt.skill, sum(len(m["content"]) for m in prompt.messages if m["role"] == "user"))
         
         # Broadcast OpenAI call event
         start_time = time.time()
@@ -69,22 +173,23 @@ class ResearcherAgent:
             "RESEARCHER",
             "openai_call",
             {
-                "model": "gpt-4o-mini",
-                "purpose": "research_topic",
-                "topic": self.topic
+                "model": plan.models[0],
+                "purpose": prompt.skill,
+                "topic": self.topic,
+                "prompt_tokens": prompt.prompt_tokens
             },
             status="pending"
         )
         
         # Artificial delay for visualization
-        await asyncio.sleep(2.0)
+        await demo_pause(2.0)
         
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a senior researcher. Provide 4-5 key bullet points about the requested topic."},
-                {"role": "user", "content": f"Research topic: {self.topic}"}
-            ]
+        response, model = await router.complete(
+            "RESEARCHER",
+            plan,
+            prompt.messages,
+            api_key=self.api_key,
+            max_tokens=prompt.max_tokens
         )
         notes = response.choices[0].message.content
         
@@ -95,47 +200,33 @@ class ResearcherAgent:
             "RESEARCHER",
             "openai_response",
             {
+                "model": model,
                 "tokens": response.usage.total_tokens if response.usage else 0,
-                "content_length": len(notes)
+                "content_length": len(notes),
+                "usage": usage_breakdown(response, prompt)
             },
             latency_ms=latency,
             status="success"
         )
         
-        print(f"[Researcher] Research completed (length: {len(notes)})")
+        tenants.record_tokens(self.tenant, response.usage.total_tokens if response.usage else 0)
+        if cache is not None:
+            cache.put(self.topic, notes)
+        
+        print(f"[Researcher] {node.id} completed (length: {len(notes)})")
         return notes
     
-    async def call_writer_agent(self, notes: str) -> str:
-        """Call Writer Agent via A2A protocol to draft the report."""
-        print(f"[Researcher] Calling Writer Agent via A2A...")
+    async def call_skill(self, node: A2ANode, content: str) -> Union[str, ArtifactRef]:
+        """Call the agent serving node.skill via A2A (returns text, or a reference if large)."""
+        print(f"[Researcher] Calling {node.agent} ({node.skill}) via A2A...")
         
-        async with httpx.AsyncClient(timeout=120.0) as httpx_client:
-            # Fetch Writer's AgentCard
-            resolver = A2ACardResolver(
-                httpx_client=httpx_client,
-                base_url=WRITER_AGENT_URL,
-            )
-            writer_card = await resolver.get_agent_card()
-            print(f"[Researcher] Found Writer Agent: {writer_card.name}")
-            
-            # Initialize A2A Client for Writer
-            writer_client = A2AClient(
-                httpx_client=httpx_client,
-                agent_card=writer_card
-            )
-            
-            # Construct message for Writer
-            content = f"Topic: {self.topic}\nNotes:\n{notes}"
-            
-            parts = [{'kind': 'text', 'text': content}]
-            if self.api_key:
-                parts.append({'kind': 'text', 'text': f"__API_KEY__:{self.api_key}"})
-            
+        async with self.connect(node.skill) as (url, card, client):
             send_message_payload = {
                 'message': {
                     'role': 'user',
-                    'parts': parts,
+                    'parts': [{'kind': 'text', 'text': content}],
                     'messageId': uuid4().hex,
+                    'metadata': outgoing_metadata(self.tenant, self.api_key),
                 },
             }
             
@@ -149,33 +240,77 @@ class ResearcherAgent:
                 "RESEARCHER",
                 "a2a_outgoing",
                 {
-                    "to": "WRITER",
-                    "to_url": WRITER_AGENT_URL,
+                    "to": node.agent,
+                    "to_url": card.url,
+                    "skill": node.skill,
                     "content_length": len(content)
                 },
-                a2a_message=send_message_payload['message'],
+                a2a_message=request.params.message,
                 status="pending"
             )
             
             # Send via A2A
-            print(f"[Researcher] Sending A2A message to Writer...")
+            print(f"[Researcher] Sending A2A message to {node.agent}...")
             start_time = time.time()
-            response = await writer_client.send_message(request)
-            latency = int((time.time() - start_time) * 1000)
             
-            # Extract report from response
-            response_dict = response.model_dump(mode='json', exclude_none=True)
+            async def circuit_changed(breaker: CircuitBreaker, state: str):
+                await broadcast_event(
+                    "RESEARCHER",
+                    "circuit_state",
+                    {"to": node.agent, "skill": node.skill, **breaker.stats()},
+                    status="error" if state == "open" else "success"
+                )
             
-            # Broadcast A2A incoming event
-            result_message = None
-            if 'result' in response_dict:
-                result_message = response_dict['result']
+            try:
+                response = await breakers.call(url, lambda: client.send_message(request), circuit_changed)
+            except HopUnavailable as e:
+                if not isinstance(e, CircuitOpen):
+                    routes.forget(url)
+                # Typed failure: callers can tell a fast rejection from a timeout or an error
+                await broadcast_event(
+                    "RESEARCHER",
+                    "hop_unavailable",
+                    {
+                        "to": node.agent,
+                        "to_url": url,
+                        "skill": node.skill,
+                        "reason": e.reason,
+                        "retry_after_s": e.retry_after_s,
+                        "circuit": breakers.get(url).stats()
+                    },
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    status="error"
+                )
+                raise
+            latency = int((time.time() - start_time) * 1000)
+            
+            # Read the report off the response in place (no model_dump of a large report)
+            result = a2a_access.response_result(response)
+            if result is None:
+                # A JSON-RPC error reply: keep its code and message instead of a generic parse failure
+                error = a2a_access.response_error(response) or "no result in the response"
+                code = a2a_access.response_error_code(response)
+                await broadcast_event(
+                    "RESEARCHER",
+                    "a2a_incoming",
+                    {
+                        "from": node.agent,
+                        "latency_ms": latency,
+                        "status": "error",
+                        "error": error,
+                        "error_code": code
+                    },
+                    latency_ms=latency,
+                    status="error"
+                )
+                raise RuntimeError(f"{node.agent.title()} failed: {error}" + (f" (code {code})" if code is not None else ""))
+            result_message = a2a_access.result_message(result)
                 
             await broadcast_event(
                 "RESEARCHER",
                 "a2a_incoming",
                 {
-                    "from": "WRITER",
+                    "from": node.agent,
                     "latency_ms": latency,
                     "status": "success"
                 },
@@ -184,14 +319,47 @@ class ResearcherAgent:
                 status="success"
             )
             
-            if result_message and 'parts' in result_message:
-                parts = result_message['parts']
-                if len(parts) > 0:
-                    report = parts[0].get('text', '')
-                    print(f"[Researcher] Received report from Writer (length: {len(report)})")
-                    return report
+            metadata = a2a_access.metadata_of(result_message)
+            if metadata.get('error') == 'overloaded':
+                raise Overloaded(f"{node.agent.lower()} overloaded", metadata.get('retry_after_s', 1))
+            
+            if metadata.get('error') or (a2a_access.first_text(result_message) or "").startswith("Error:"):
+                # A failure reply is not a draft: raise so it is neither memoized nor kept as a report
+                raise RuntimeError(f"{node.agent.title()} failed: {a2a_access.first_text(result_message)}")
+            
+            # An artifact reference is forwarded as is; the MCP server resolves it
+            artifact = find_ref(result_message)
+            if artifact:
+                print(f"[Researcher] Received reference from {node.agent} ({artifact.size} bytes)")
+                return artifact
+            
+            report = a2a_access.first_text(result_message)
+            if report:
+                print(f"[Researcher] Received reply from {node.agent} (length: {len(report)})")
+                return report
             
-            raise ValueError("Failed to extract report from Writer Agent response")
+            raise ValueError(f"Failed to extract a reply from the {node.agent} response")
+
+    @asynccontextmanager
+    async def connect(self, skill: str) -> AsyncIterator[Tuple[str, AgentCard, Union[A2AClient, LocalA2AClient]]]:
+        """An A2A client for the agent serving `skill`: in process when colocated, else over HTTP."""
+        local = local_agents.get(skill)
+        if local is not None:
+            # Colocated mode (a2a_server.py): no HTTP, no serialization; events say "in-process"
+            token = a2a_transport.set(IN_PROCESS)
+            try:
+                yield local.card.url, local.card, local.client
+            finally:
+                a2a_transport.reset(token)
+            return
+        
+        # The least loaded agent advertising the skill, from the cached routing table
+        # (skipping endpoints whose circuit is open while another one is available)
+        async with routes.route(skill, usable=breakers.allows) as endpoint, \
+                httpx.AsyncClient(timeout=120.0) as httpx_client:
+            card = AgentCard.model_validate(endpoint.card)
+            print(f"[Researcher] Routed {skill} to {card.name} at {endpoint.url}")
+            yield endpoint.url, card, A2AClient(httpx_client=httpx_client, agent_card=card)
 
 class ResearcherAgentExecutor(AgentExecutor):
     """Executor for Researcher Agent."""
@@ -201,21 +369,15 @@ class ResearcherAgentExecutor(AgentExecutor):
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
-        # Extract topic and API key
+        # Extract topic, API key (message metadata) and tenant
         topic = ""
         api_key = None
-        message_dict = None
+        metadata = {}
         
         if hasattr(context, 'message') and context.message:
-            message_dict = context.message.model_dump()
-            for part in context.message.parts:
-                part_dict = part.model_dump() if hasattr(part, 'model_dump') else {}
-                if 'text' in part_dict:
-                    text = part_dict['text']
-                    if text.startswith("__API_KEY__:"):
-                        api_key = text.replace("__API_KEY__:", "").strip()
-                    else:
-                        topic = text
+            texts, api_key, metadata = read_message(context.message)
+            topic = texts[-1] if texts else ""
+        tenant = tenant_id(metadata, api_key)
         
         # Broadcast RPC request received (from MCP)
         await broadcast_event(
@@ -224,9 +386,11 @@ class ResearcherAgentExecutor(AgentExecutor):
             {
                 "agent": "RESEARCHER",
                 "skill": "research_topic",
-                "content_length": len(topic)
+                "content_length": len(topic),
+                "tenant": tenant,
+                "queue_depth": scheduler.depth()
             },
-            a2a_message=message_dict,
+            a2a_message=context.message,
             status="success"
         )
         
@@ -234,18 +398,32 @@ class ResearcherAgentExecutor(AgentExecutor):
             await event_queue.enqueue_event(new_agent_text_message("Error: No topic provided"))
             return
         
-        print(f"[Researcher] Received topic: '{topic}'")
-        if api_key:
-            print(f"[Researcher] Received dynamic API key")
+        print(f"[Researcher] Received topic: '{topic}' (tenant {tenant})")
+        
+        priority = metadata.get("priority", "interactive")
+        queued_at = time.monotonic()
+        agent = ResearcherAgent(topic, api_key, tenant)
+        
+        async def run_job() -> Union[str, ArtifactRef]:
+            wait_ms = int((time.monotonic() - queued_at) * 1000)
+            await broadcast_event(
+                "RESEARCHER",
+                "job_dequeued",
+                {
+                    "tenant": tenant,
+                    "priority": priority,
+                    "queue_depth": scheduler.depth()
+                },
+                latency_ms=wait_ms,
+                status="success"
+            )
+            return await agent.run()
         
         try:
-            agent = ResearcherAgent(topic, api_key)
-            
-            # Step 1: Research
-            notes = await agent.research()
-            
-            # Step 2: Call Writer Agent via A2A
-            report = await agent.call_writer_agent(notes)
+            # Quota slots are held while queued, so one tenant cannot fill the queue
+            async with tenants.admit(tenant):
+                report = await scheduler.submit(run_job, tenant, priority)
+            artifact = report if isinstance(report, ArtifactRef) else artifacts.offload(report)
             
             # Broadcast RPC response sent (to MCP)
             await broadcast_event(
@@ -253,15 +431,45 @@ class ResearcherAgentExecutor(AgentExecutor):
                 "rpc_response",
                 {
                     "agent": "RESEARCHER",
-                    "result_length": len(report),
+                    "result_length": artifact.size if artifact else len(report),
+                    "artifact": artifact.to_event() if artifact else None,
+                    "degraded": agent.degraded,
                     "status": "success"
                 },
                 status="success"
             )
             
-            # Return final report
-            await event_queue.enqueue_event(new_agent_text_message(report))
+            # Return final report, by reference when it is large
+            message = ref_message(artifact) if artifact else new_agent_text_message(report)
+            if agent.degraded:
+                message.metadata = {**(message.metadata or {}), "degraded": agent.degraded}
+            await event_queue.enqueue_event(message)
             print(f"[Researcher] Workflow complete!")
+        
+        except Overloaded as e:
+            print(f"[Researcher] Rejected ({tenant}, {priority}): {e}")
+            await broadcast_event(
+                "RESEARCHER",
+                "job_rejected",
+                {
+                    "tenant": tenant,
+                    "priority": priority,
+                    "reason": e.reason,
+                    "retry_after_s": e.retry_after_s,
+                    "queue_depth": scheduler.depth()
+                },
+                status="error"
+            )
+            message = new_agent_text_message(f"Error: Researcher overloaded ({e.reason}); retry after {e.retry_after_s}s")
+            message.metadata = {"error": "overloaded", "retry_after_s": e.retry_after_s}
+            await event_queue.enqueue_event(message)
+        
+        except HopUnavailable as e:
+            # Already reported as a hop_unavailable event; no cached report to fall back on
+            print(f"[Researcher] {e}")
+            message = new_agent_text_message(f"Error: {e}")
+            message.metadata = {"error": "unavailable", "reason": e.reason, "retry_after_s": e.retry_after_s}
+            await event_queue.enqueue_event(message)
             
         except Exception as e:
             error_stack = tb.format_exc()
@@ -290,10 +498,12 @@ class ResearcherAgentExecutor(AgentExecutor):
     ) -> None:
         raise Exception('cancel not supported')
 
-if __name__ == '__main__':
-    # Initialize event queue
-    init_event_queue()
-    
+def agent_card(
+    url: str,
+    name: str = 'protocol-native-researcher',
+    description: str = 'An agent that researches topics and coordinates with Writer Agent.',
+) -> AgentCard:
+    """The Researcher's AgentCard, served at `url`."""
     skill = AgentSkill(
         id='research_topic',
         name='Research Topic',
@@ -302,106 +512,63 @@ if __name__ == '__main__':
         examples=['Research quantum computing'],
     )
     
-    agent_card = AgentCard(
-        name='protocol-native-researcher',
-        description='An agent that researches topics and coordinates with Writer Agent.',
-        url='http://localhost:8001/',
+    return AgentCard(
+        name=name,
+        description=description,
+        url=url,
         version='0.1.0',
         default_input_modes=['text'],
-        default_output_modes=['text'],
+        default_output_modes=['text', 'file'],
         capabilities=AgentCapabilities(streaming=False),
         skills=[skill],
     )
-    
+
+def build_app(card: AgentCard):
+    """The Researcher's Starlette app: A2A endpoints, health probes, /queue and /tenants; background tasks run in its lifespan."""
+    task_store = InMemoryTaskStore()
     request_handler = DefaultRequestHandler(
-        agent_executor=ResearcherAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        agent_executor=lifecycle.executor(ResearcherAgentExecutor()),
+        task_store=task_store,
     )
     
     server_app = A2AStarletteApplication(
-        agent_card=agent_card,
+        agent_card=card,
         http_handler=request_handler,
     )
     
+    # Forward events to the gateway over a single persistent connection, publish
+    # the card and load to the registry (until draining) and follow its routing table
+    lifecycle.background(lambda: publish_to_gateway("RESEARCHER"))
+    lifecycle.background(lambda: announce(
+        card.model_dump(mode="json", by_alias=True, exclude_none=True),
+        lambda: {"in_flight": scheduler.in_flight, "queue_depth": scheduler.depth()},
+    ), until_drain=True)
+    lifecycle.background(routes.watch)
+    
     # Get the Starlette app
-    app = server_app.build()
+    app = server_app.build(lifespan=lifecycle.lifespan)
     
-    # Background task to broadcast events to WebSocket clients
-    async def broadcast_to_websockets():
-        import asyncio
-        from event_broadcaster import get_event_queue
-        
-        print(f"[Researcher] Broadcast task STARTING...", file=sys.stderr)
-        
-        try:
-            while True:
-                eq = get_event_queue()
-                if eq is None:
-                    print("[Researcher] Waiting for event queue initialization...", file=sys.stderr)
-                    await asyncio.sleep(1)
-                    continue
-                
-                if not eq.empty():
-                    event = await eq.get()
-                    print(f"[Researcher] Processing event from queue: {event['type']}", file=sys.stderr)
-                    
-                    # Broadcast to all connected clients
-                    if not active_connections:
-                        print(f"[Researcher] No active connections to receive event", file=sys.stderr)
-                    
-                    disconnected = []
-                    for connection in active_connections:
-                        try:
-                            await connection.send_json(event)
-                            print(f"[Researcher] Sent event to client: {event['type']}", file=sys.stderr)
-                        except Exception as e:
-                            print(f"[Researcher] Failed to send to client: {e}", file=sys.stderr)
-                            disconnected.append(connection)
-                    
-                    # Remove disconnected clients
-                    for conn in disconnected:
-                        if conn in active_connections:
-                            active_connections.remove(conn)
-                
-                await asyncio.sleep(0.01)  # Check frequently
-        except Exception as e:
-            print(f"[Researcher] CRITICAL ERROR in broadcast task: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+    async def queue_stats(request):
+        """Queue depth, wait-time percentiles and admission counters."""
+        return JSONResponse(scheduler.stats())
     
-    # Add WebSocket endpoint for event streaming
-    async def websocket_events(websocket: WebSocket):
-        await websocket.accept()
-        active_connections.append(websocket)
-        print(f"[Researcher] WebSocket client connected. Total: {len(active_connections)}")
-        
-        try:
-            # Keep connection alive
-            while True:
-                # Wait for client messages (ping/pong)
-                try:
-                    await websocket.receive_text()
-                except:
-                    break
-        except WebSocketDisconnect:
-            pass
-        finally:
-            if websocket in active_connections:
-                active_connections.remove(websocket)
-            print(f"[Researcher] WebSocket client disconnected. Total: {len(active_connections)}")
+    async def tenant_stats(request):
+        """Per-tenant requests, rejections, token use and quotas."""
+        return JSONResponse(tenants.metrics())
     
-    # Add WebSocket route to app
-    from starlette.routing import WebSocketRoute
-    app.routes.append(WebSocketRoute("/events", websocket_events))
+    app.add_route("/queue", queue_stats, methods=["GET"])
+    app.add_route("/tenants", tenant_stats, methods=["GET"])
+    # /healthz, /readyz and /load; in flight counts running jobs, queued ones are queue_depth
+    Health(lifecycle, task_store, in_flight=lambda: scheduler.in_flight, queue_depth=scheduler.depth).install(app)
     
-    # Start background task for broadcasting
-    import asyncio
+    return app
+
+if __name__ == '__main__':
+    # Initialize event queue
+    init_event_queue()
     
-    @app.on_event("startup")
-    async def startup_event():
-        asyncio.create_task(broadcast_to_websockets())
-        print("[Researcher] Started WebSocket broadcast task")
+    app = build_app(agent_card(public_url(RESEARCHER_PORT)))
     
-    print("Starting Researcher Agent on port 8001...")
-    print("WebSocket events available at ws://localhost:8001/events")
-    uvicorn.run(app, host='0.0.0.0', port=8001)
+    print(f"Starting Researcher Agent on port {RESEARCHER_PORT}...")
+    print("Events published to gateway (viewers: ws://localhost:9000/events)")
+    serve(app, RESEARCHER_PORT, lifecycle)
@@ -0,0 +1,224 @@
+"""
+Job scheduler for the Researcher.
+Incoming requests are queued and run by a bounded worker pool instead of all
+starting at once. Two priority classes come from A2A message metadata
+(`{"priority": "interactive" | "batch"}`); interactive work is preferred but
+batch still gets a share. Within a class, tenants are served by weighted fair
+queueing so one busy tenant cannot starve the others. Requests are rejected
+early, with a retry-after hint, when the queue is full or the predicted wait
+would blow the class's queue-time SLO.
+
+RESEARCHER_WORKERS=4
+RESEARCHER_MAX_QUEUE=64
+QUEUE_SLO_INTERACTIVE_S=10   QUEUE_SLO_BATCH_S=120
+BATCH_SHARE=5                every 5th pick goes to batch when both classes wait
+                             (0: batch runs only when no interactive job waits)
+TENANT_WEIGHTS=tenant-a=2,tenant-b=0.5
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+PRIORITIES = ("interactive", "batch")
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'tenant-a=2,tenant-b=0.5' -> {'tenant-a': 2.0, 'tenant-b': 0.5}"""
+    weights = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight)
+    return weights
+
+class Overloaded(Exception):
+    """Raised at admission when the request should be retried later."""
+
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(f"{reason}; retry after {retry_after_s}s")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+@dataclass(order=True)
+class Job:
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    tenant: str = field(compare=False)
+    priority: str = field(compare=False)
+    run: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+class FairQueue:
+    """Start-time fair queueing across tenants, one unit of cost per job."""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+        self.heap: List[Job] = []
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def tags(self, tenant: str) -> Tuple[float, float]:
+        start = max(self.virtual_time, self.last_finish.get(tenant, 0.0))
+        finish = start + 1.0 / self.weights.get(tenant, 1.0)
+        self.last_finish[tenant] = finish
+        return start, finish
+
+    def push(self, job: Job):
+        heapq.heappush(self.heap, job)
+
+    def pop(self) -> Job:
+        job = heapq.heappop(self.heap)
+        self.virtual_time = job.start_tag
+        if not self.heap:
+            # Idle: forget per-tenant history so the map stays bounded
+            self.last_finish.clear()
+        return job
+
+class Scheduler:
+    """Bounded worker pool fed by per-class fair queues."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 64,
+        slo_s: Optional[Dict[str, float]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        batch_share: int = 5,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.slo_s = slo_s or {"interactive": 10.0, "batch": 120.0}
+        if batch_share < 0:
+            raise ValueError(f"batch_share must be 0 (batch only when idle) or more, got {batch_share}")
+        self.batch_share = batch_share
+        self.queues = {p: FairQueue(weights or {}) for p in PRIORITIES}
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._picks = 0
+        self.in_flight = 0
+        self.service_ewma_s: Optional[float] = None
+        self.waits: Dict[str, Deque[float]] = {p: deque(maxlen=500) for p in PRIORITIES}
+        self.counters = {"completed": 0, "rejected": 0, "slo_violations": 0}
+
+    @classmethod
+    def from_env(cls) -> "Scheduler":
+        return cls(
+            workers=int(os.getenv("RESEARCHER_WORKERS", "4")),
+            max_queue=int(os.getenv("RESEARCHER_MAX_QUEUE", "64")),
+            slo_s={
+                "interactive": float(os.getenv("QUEUE_SLO_INTERACTIVE_S", "10")),
+                "batch": float(os.getenv("QUEUE_SLO_BATCH_S", "120")),
+            },
+            weights=parse_weights(os.getenv("TENANT_WEIGHTS", "")),
+            batch_share=int(os.getenv("BATCH_SHARE", "5")),
+        )
+
+    def depth(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def _ensure_workers(self):
+        # Created lazily so the semaphore and tasks belong to the server's loop
+        if self._ready is None:
+            self._ready = asyncio.Semaphore(0)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def predicted_wait_s(self, priority: str) -> float:
+        """Expected queue time for a new job of this class, from the recent service time."""
+        if self.service_ewma_s is None:
+            return 0.0
+        ahead = len(self.queues["interactive"]) if priority == "interactive" else self.depth()
+        busy = max(self.in_flight - self.workers + 1, 0)
+        return (ahead + busy) * self.service_ewma_s / self.workers
+
+    def _admit(self, priority: str):
+        if self.depth() >= self.max_queue:
+            wait = self.predicted_wait_s(priority) or self.slo_s[priority]
+            raise Overloaded("queue full", max(math.ceil(wait), 1))
+        wait = self.predicted_wait_s(priority)
+        if wait > self.slo_s[priority]:
+            raise Overloaded(f"predicted queue wait {wait:.1f}s exceeds {priority} SLO",
+                             max(math.ceil(wait - self.slo_s[priority]), 1))
+
+    async def submit(self, run: Callable[[], Awaitable[Any]], tenant: str, priority: str = "interactive") -> Any:
+        """Queue `run` for a worker and wait for its result; raises Overloaded if not admitted."""
+        if priority not in PRIORITIES:
+            priority = "interactive"
+        self._ensure_workers()
+        try:
+            self._admit(priority)
+        except Overloaded:
+            self.counters["rejected"] += 1
+            raise
+        queue = self.queues[priority]
+        start, finish = queue.tags(tenant)
+        job = Job(finish, next(self._seq), start, tenant, priority, run,
+                  asyncio.get_running_loop().create_future())
+        queue.push(job)
+        self._ready.release()
+        return await job.future
+
+    def _next_job(self) -> Job:
+        interactive, batch = self.queues["interactive"], self.queues["batch"]
+        self._picks += 1
+        share = self.batch_share and self._picks % self.batch_share == 0
+        if batch and (not interactive or share):
+            return batch.pop()
+        return interactive.pop()
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            job = self._next_job()
+            if job.future.done():
+                continue  # caller went away while queued
+            wait = time.monotonic() - job.enqueued_at
+            self.waits[job.priority].append(wait)
+            if wait > self.slo_s[job.priority]:
+                self.counters["slo_violations"] += 1
+            self.in_flight += 1
+            started = time.monotonic()
+            run_task = asyncio.create_task(job.run())
+            # If the caller gives up, stop its work too
+            job.future.add_done_callback(lambda f, t=run_task: t.cancel() if f.cancelled() else None)
+            try:
+                result = await run_task
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                if not run_task.cancelled():
+                    raise  # the worker itself is being shut down
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                service = time.monotonic() - started
+                self.service_ewma_s = service if self.service_ewma_s is None else (
+                    0.8 * self.service_ewma_s + 0.2 * service)
+                self.counters["completed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        def pct(values, p):
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)] * 1000, 1)
+
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": {p: len(q) for p, q in self.queues.items()},
+            "queue_wait_ms": {p: {"p50": pct(w, 50), "p95": pct(w, 95)} for p, w in self.waits.items()},
+            "service_ewma_ms": round(self.service_ewma_s * 1000, 1) if self.service_ewma_s else None,
+            **self.counters,
+        }
@@ -0,0 +1,48 @@
+"""
+JSON encoding shared by the publishers, the event gateway and the MCP bridge.
+Uses orjson when it is installed (`pip install orjson`) and the standard
+library otherwise; both produce compact UTF-8 bytes, so callers can cache an
+encoded payload and write it to sockets without re-encoding.
+"""
+import json
+from collections.abc import Mapping
+from typing import Any, List, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively: pydantic models, mappings, sets."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+def dumps_text(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+def join_array(encoded: List[bytes]) -> bytes:
+    """JSON array from already-encoded elements, without decoding them."""
+    return b"[" + b",".join(encoded) + b"]"
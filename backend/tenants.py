@@ -0,0 +1,206 @@
+"""
+Tenant layer shared by the agents.
+A tenant is derived from a hash of the caller's API key. Only keyless
+callers may name one in A2A message metadata (`tenant`), so a caller with a
+key cannot leave its quotas behind by rotating tenant names. API keys travel
+only in message metadata (`api_key`), never in message text, and are
+redacted before a message reaches events or logs.
+
+Each agent enforces per-tenant quotas on concurrent requests and tokens per
+minute, and keeps per-tenant caches and metrics.
+
+In the Researcher a request holds its concurrency slot while it waits in the
+scheduler queue, so the quota counts queued plus running requests. Its default
+is therefore RESEARCHER_WORKERS plus a quarter of RESEARCHER_MAX_QUEUE: a busy
+tenant (every keyless caller is "anonymous") is queued and meets the
+scheduler's fair queueing and SLO admission before its quota. A concurrency
+set at or below the worker count rejects a tenant's extra requests outright
+instead of queueing them.
+
+TENANT_MAX_CONCURRENCY=4          the Researcher defaults to its workers plus a queue share (see below)
+TENANT_TOKENS_PER_MIN=200000
+TENANT_QUOTAS=tenant-a=8:500000,key-0123456789ab=1:20000     concurrency:tokens per minute
+TENANT_MAX_TRACKED=1000                               idle tenants beyond this are forgotten
+"""
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from a2a_access import iter_texts, metadata_of
+from scheduler import Overloaded
+from event_broadcaster import API_KEY_METADATA, LEGACY_KEY_PREFIX
+
+ANONYMOUS = "anonymous"
+
+def tenant_id(metadata: Optional[dict], api_key: Optional[str] = None) -> str:
+    """A hash of the API key; without a key, the tenant named in message metadata."""
+    if api_key:
+        # The key decides: a tenant asserted next to it is ignored
+        return "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    metadata = metadata or {}
+    if metadata.get("tenant"):
+        return str(metadata["tenant"])
+    return ANONYMOUS
+
+def read_message(message: Any) -> Tuple[list, Optional[str], dict]:
+    """
+    Text parts, API key and metadata of an incoming A2A message.
+
+    The key comes from metadata; a legacy `__API_KEY__:` text part is still
+    accepted (and never returned as text) for clients not yet migrated.
+    """
+    metadata = dict(metadata_of(message))
+    api_key = metadata.get(API_KEY_METADATA)
+    texts = []
+    for text in iter_texts(message):
+        if text.startswith(LEGACY_KEY_PREFIX):
+            api_key = api_key or text[len(LEGACY_KEY_PREFIX):].strip()
+        else:
+            texts.append(text)
+    return texts, api_key, metadata
+
+def outgoing_metadata(tenant: str, api_key: Optional[str], **extra) -> dict:
+    """Metadata to forward on the next A2A hop so the callee sees the same tenant and key."""
+    metadata = {"tenant": tenant, **extra}
+    if api_key:
+        metadata[API_KEY_METADATA] = api_key
+    return metadata
+
+@dataclass
+class TenantQuota:
+    concurrency: int
+    tokens_per_min: int
+
+def parse_quotas(spec: str) -> Dict[str, TenantQuota]:
+    """'tenant-a=8:500000,tenant-b=1:20000' -> per-tenant overrides"""
+    quotas = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, _, limits = item.partition("=")
+        concurrency, _, tpm = limits.partition(":")
+        quotas[name.strip()] = TenantQuota(int(concurrency), int(tpm))
+    return quotas
+
+class QuotaExceeded(Overloaded):
+    """A tenant is over its concurrency or token-per-minute quota."""
+
+@dataclass
+class TenantState:
+    quota: TenantQuota
+    in_flight: int = 0
+    tokens: Deque[Tuple[float, int]] = field(default_factory=deque)
+    tokens_last_min: int = 0
+    requests: int = 0
+    rejected: int = 0
+    errors: int = 0
+    tokens_total: int = 0
+    caches: Dict[str, Any] = field(default_factory=dict)
+
+    def expire(self, now: float):
+        while self.tokens and now - self.tokens[0][0] > 60.0:
+            self.tokens_last_min -= self.tokens.popleft()[1]
+
+class TenantRegistry:
+    """Quotas, caches and counters per tenant for one agent."""
+
+    def __init__(
+        self,
+        default: Optional[TenantQuota] = None,
+        overrides: Optional[Dict[str, TenantQuota]] = None,
+        max_tracked: int = 1000,
+    ):
+        self.default = default or TenantQuota(4, 200_000)
+        self.overrides = overrides or {}
+        self.max_tracked = max_tracked
+        self._tenants: "OrderedDict[str, TenantState]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls, default_concurrency: int = 4) -> "TenantRegistry":
+        return cls(
+            default=TenantQuota(
+                int(os.getenv("TENANT_MAX_CONCURRENCY", str(default_concurrency))),
+                int(os.getenv("TENANT_TOKENS_PER_MIN", "200000")),
+            ),
+            overrides=parse_quotas(os.getenv("TENANT_QUOTAS", "")),
+            max_tracked=int(os.getenv("TENANT_MAX_TRACKED", "1000")),
+        )
+
+    def state(self, tenant: str) -> TenantState:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = TenantState(self.overrides.get(tenant, self.default))
+            self._forget_idle()
+        self._tenants.move_to_end(tenant)
+        return state
+
+    def _forget_idle(self):
+        for name in list(self._tenants):
+            if len(self._tenants) <= self.max_tracked:
+                break
+            if self._tenants[name].in_flight == 0:
+                del self._tenants[name]
+
+    @asynccontextmanager
+    async def admit(self, tenant: str):
+        """Hold one of the tenant's concurrency slots; raises QuotaExceeded if none is free."""
+        state = self.state(tenant)
+        now = time.monotonic()
+        state.expire(now)
+        if state.in_flight >= state.quota.concurrency:
+            state.rejected += 1
+            raise QuotaExceeded(f"tenant {tenant} at {state.quota.concurrency} concurrent requests", 1)
+        if state.tokens_last_min >= state.quota.tokens_per_min:
+            state.rejected += 1
+            retry = max(math.ceil(60.0 - (now - state.tokens[0][0])), 1) if state.tokens else 1
+            raise QuotaExceeded(f"tenant {tenant} over {state.quota.tokens_per_min} tokens/min", retry)
+        state.in_flight += 1
+        state.requests += 1
+        try:
+            yield state
+        except Overloaded:
+            state.rejected += 1
+            raise
+        except Exception:
+            state.errors += 1
+            raise
+        finally:
+            state.in_flight -= 1
+
+    def in_flight(self) -> int:
+        """Admitted requests across all tenants."""
+        return sum(state.in_flight for state in self._tenants.values())
+
+    def record_tokens(self, tenant: str, tokens: int):
+        if tokens <= 0:
+            return
+        state = self.state(tenant)
+        state.tokens.append((time.monotonic(), tokens))
+        state.tokens_last_min += tokens
+        state.tokens_total += tokens
+
+    def cache(self, tenant: str, name: str, factory: Callable[[], Any]) -> Any:
+        """The tenant's own instance of a cache, created on first use."""
+        caches = self.state(tenant).caches
+        if name not in caches:
+            caches[name] = factory()
+        return caches[name]
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        report = {}
+        for name, state in self._tenants.items():
+            state.expire(now)
+            report[name] = {
+                "in_flight": state.in_flight,
+                "requests": state.requests,
+                "rejected": state.rejected,
+                "errors": state.errors,
+                "tokens_total": state.tokens_total,
+                "tokens_last_min": state.tokens_last_min,
+                "quota": {"concurrency": state.quota.concurrency, "tokens_per_min": state.quota.tokens_per_min},
+            }
+        return report
@@ -0,0 +1,284 @@
+"""
+Semantic near-duplicate cache for research topics.
+"vector DBs", "vector databases" and "what are vector databases" should all
+reuse the same research notes. Topics are embedded locally with a hashed
+word + character n-gram vectorizer (no model download, no network) and looked
+up by cosine similarity in an in-process index: NumPy brute force by default,
+or HNSW when hnswlib is installed.
+
+TOPIC_CACHE_ENABLED=1
+TOPIC_CACHE_THRESHOLD=0.9          minimum cosine similarity for a hit
+TOPIC_CACHE_SIZE=10000             entries kept
+TOPIC_CACHE_EVICTION=lru | fifo
+TOPIC_CACHE_TTL_S=3600
+TOPIC_CACHE_INDEX=numpy | hnsw
+TOPIC_CACHE_DIM=256
+
+Cached values are notes or reports: text, or an ArtifactRef when the text was
+offloaded to the artifact store.
+"""
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from artifact_store import ArtifactRef
+
+TOPIC_CACHE_ENABLED = os.getenv("TOPIC_CACHE_ENABLED", "1") != "0"
+
+# Question scaffolding that does not change the topic
+_PREFIX = re.compile(
+    r"^(?:(?:what|who|how) (?:is|are|do|does)|tell me about|explain|describe|overview of|"
+    r"introduction to|intro to|an?|the)\s+"
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+ABBREVIATIONS = {
+    "db": "database",
+    "dbs": "databases",
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "llm": "large language model",
+    "llms": "large language models",
+    "nlp": "natural language processing",
+    "k8s": "kubernetes",
+}
+STOPWORDS = frozenset({"a", "an", "the", "of", "for", "and", "in", "on", "to", "about", "with"})
+
+def normalize_topic(topic: str) -> List[str]:
+    """Lowercased content words with question prefixes, abbreviations and plurals folded."""
+    text = topic.lower().strip(" ?!.")
+    while True:
+        stripped = _PREFIX.sub("", text)
+        if stripped == text:
+            break
+        text = stripped
+    words: List[str] = []
+    for token in _TOKEN.findall(text):
+        for word in ABBREVIATIONS.get(token, token).split():
+            if word in STOPWORDS:
+                continue
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            words.append(word)
+    return words
+
+class HashedNGramEmbedder:
+    """Signed feature hashing of words and character trigrams into a unit vector."""
+
+    def __init__(self, dim: int = 256, char_weight: float = 0.5):
+        self.dim = dim
+        self.char_weight = char_weight
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float):
+        h = zlib.crc32(feature.encode())
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+    def embed(self, topic: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in normalize_topic(topic):
+            self._add(vector, "w:" + word, 1.0)
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                self._add(vector, "c:" + padded[i:i + 3], self.char_weight)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+class NumpyIndex:
+    """Exact inner-product search over a dense, growable matrix of unit vectors."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.dim = dim
+        self.capacity = capacity
+        self._matrix = np.zeros((min(capacity, 1024), dim), dtype=np.float32)
+        self._ids = np.zeros(len(self._matrix), dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _reserve(self, rows: int):
+        if rows <= len(self._matrix):
+            return
+        size = min(max(rows, len(self._matrix) * 2), self.capacity)
+        matrix = np.zeros((size, self.dim), dtype=np.float32)
+        matrix[:len(self)] = self._matrix[:len(self)]
+        ids = np.zeros(size, dtype=np.int64)
+        ids[:len(self)] = self._ids[:len(self)]
+        self._matrix, self._ids = matrix, ids
+
+    def add_many(self, ids: np.ndarray, vectors: np.ndarray):
+        start = len(self)
+        self._reserve(start + len(ids))
+        self._matrix[start:start + len(ids)] = vectors
+        self._ids[start:start + len(ids)] = ids
+        self._rows.update(zip(ids.tolist(), range(start, start + len(ids))))
+
+    def add(self, entry_id: int, vector: np.ndarray):
+        self.add_many(np.array([entry_id]), vector[None, :])
+
+    def remove(self, entry_id: int):
+        # Move the last row into the hole so the live rows stay contiguous
+        row = self._rows.pop(entry_id)
+        last = len(self)
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = self._ids[last]
+            self._rows[int(self._ids[row])] = row
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        if not self._rows:
+            return None
+        scores = self._matrix[:len(self)] @ vector
+        row = int(np.argmax(scores))
+        return int(self._ids[row]), float(scores[row])
+
+class HNSWIndex:
+    """Approximate search with hnswlib (optional dependency)."""
+
+    def __init__(self, dim: int, capacity: int, ef: int = 64, m: int = 16):
+        import hnswlib
+
+        self._index = hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(max_elements=capacity, ef_construction=200, M=m, allow_replace_deleted=True)
+        self._index.set_ef(ef)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add_many(self, ids: np.ndarray, vectors: np.ndarray):
+        self._index.add_items(vectors, ids, replace_deleted=True)
+        self._count += len(ids)
+
+    def add(self, entry_id: int, vector: np.ndarray):
+        self.add_many(np.array([entry_id]), vector[None, :])
+
+    def remove(self, entry_id: int):
+        self._index.mark_deleted(entry_id)
+        self._count -= 1
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        if not self._count:
+            return None
+        labels, distances = self._index.knn_query(vector, k=1)
+        # hnswlib's "ip" distance is 1 - inner product
+        return int(labels[0][0]), 1.0 - float(distances[0][0])
+
+INDEXES = {
+    "numpy": NumpyIndex,
+    "hnsw": HNSWIndex,
+}
+
+@dataclass
+class CacheEntry:
+    topic: str
+    notes: Union[str, ArtifactRef]
+    created: float = field(default_factory=time.monotonic)
+
+@dataclass
+class CacheHit:
+    notes: Union[str, ArtifactRef]
+    matched_topic: str
+    similarity: float
+
+class SemanticTopicCache:
+    """Research notes keyed by topic meaning rather than exact text."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        size: int = 10_000,
+        eviction: str = "lru",
+        ttl_s: float = 3600.0,
+        index: str = "numpy",
+        dim: int = 256,
+    ):
+        if eviction not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy '{eviction}'. Choose from: lru, fifo")
+        if index not in INDEXES:
+            raise ValueError(f"Unknown index '{index}'. Choose from: {', '.join(INDEXES)}")
+        self.threshold = threshold
+        self.size = size
+        self.eviction = eviction
+        self.ttl_s = ttl_s
+        self.embedder = HashedNGramEmbedder(dim)
+        self.index = INDEXES[index](dim, size + 1)
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticTopicCache":
+        return cls(
+            threshold=float(os.getenv("TOPIC_CACHE_THRESHOLD", "0.9")),
+            size=int(os.getenv("TOPIC_CACHE_SIZE", "10000")),
+            eviction=os.getenv("TOPIC_CACHE_EVICTION", "lru"),
+            ttl_s=float(os.getenv("TOPIC_CACHE_TTL_S", "3600")),
+            index=os.getenv("TOPIC_CACHE_INDEX", "numpy"),
+            dim=int(os.getenv("TOPIC_CACHE_DIM", "256")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _nearest(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        now = time.monotonic()
+        while True:
+            match = self.index.search(vector)
+            if match is None or match[1] < self.threshold:
+                return None
+            if now - self._entries[match[0]].created <= self.ttl_s:
+                return match
+            # Expired: evict it and search again, so a valid near-duplicate behind it still hits
+            self._evict(match[0])
+
+    def _evict(self, entry_id: int):
+        del self._entries[entry_id]
+        self.index.remove(entry_id)
+
+    def get(self, topic: str) -> Optional[CacheHit]:
+        match = self._nearest(self.embedder.embed(topic))
+        if match is None:
+            self.misses += 1
+            return None
+        entry_id, similarity = match
+        if self.eviction == "lru":
+            self._entries.move_to_end(entry_id)
+        self.hits += 1
+        entry = self._entries[entry_id]
+        return CacheHit(entry.notes, entry.topic, similarity)
+
+    def discard(self, topic: str):
+        """Drop the entry stored for this topic (after normalization), if any."""
+        match = self.index.search(self.embedder.embed(topic))
+        if match is not None and match[1] >= 0.999:
+            self._evict(match[0])
+
+    def put(self, topic: str, notes: Union[str, ArtifactRef]):
+        vector = self.embedder.embed(topic)
+        if not vector.any():
+            return
+        match = self.index.search(vector)
+        if match is not None and match[1] >= 0.999:
+            # Same topic after normalization: refresh the existing entry
+            self._evict(match[0])
+        entry_id, self._next_id = self._next_id, self._next_id + 1
+        self._entries[entry_id] = CacheEntry(topic, notes)
+        self.index.add(entry_id, vector)
+        while len(self._entries) > self.size:
+            self._evict(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,237 @@
+"""
+Declarative workflows for the agents.
+A workflow is a DAG of nodes: LLM steps run by the owning agent, and A2A calls
+to whichever agent advertises a skill on its AgentCard. Each node gets the
+workflow inputs plus the outputs of its upstream nodes, keyed by node id.
+Independent branches run concurrently, up to WORKFLOW_MAX_PARALLEL nodes at
+once. Node results are memoized per tenant on the node's inputs, and a node
+that is already running for the same inputs is joined instead of restarted.
+Hop labels for events are derived from the graph (see Workflow.hops).
+
+To run a reviewer next to the draft, add an A2ANode for its skill with an edge
+from "research"; both calls then go out at the same time.
+
+WORKFLOW_MAX_PARALLEL=4
+WORKFLOW_MEMO_TTL_S=600          how long node results are reused
+WORKFLOW_MEMO_MAX_ENTRIES=500
+
+Agents are found through the registry's routing table (registry_client.py).
+"""
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from event_broadcaster import broadcast_event
+from idempotency import IdempotentCalls
+from prompts import Prompt, research_prompt
+
+# Event types that belong to an agent's own LLM calls, and their direction
+LLM_EVENTS = {
+    ("openai_call", "out"),
+    ("openai_response", "in"),
+    ("llm_route", "out"),
+    ("llm_hedge", "out"),
+    ("llm_fallback", "out"),
+}
+
+@dataclass(frozen=True)
+class LLMNode:
+    """An LLM step run by the workflow's owner."""
+    id: str
+    prompt: Callable[[Dict[str, Any]], Prompt]
+    # Reuse notes for near-duplicate topics through the owner's topic cache
+    topic_cached: bool = False
+    memoize: bool = True
+
+@dataclass(frozen=True)
+class A2ANode:
+    """An A2A call to the agent that advertises `skill`."""
+    id: str
+    skill: str
+    agent: str  # event source name of the agent serving the skill, e.g. "WRITER"
+    message: Callable[[Dict[str, Any]], str]
+    memoize: bool = True
+
+Node = Union[LLMNode, A2ANode]
+
+class Workflow:
+    """Nodes and edges, validated and ordered once at definition time."""
+
+    def __init__(self, name: str, owner: str, caller: str, nodes: List[Node],
+                 edges: List[Tuple[str, str]], output: str):
+        self.name = name
+        self.owner = owner
+        self.caller = caller
+        self.nodes = {node.id: node for node in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError(f"workflow {name}: duplicate node ids")
+        self.upstream: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        for src, dst in edges:
+            if src not in self.nodes or dst not in self.nodes:
+                raise ValueError(f"workflow {name}: edge {src}->{dst} names an unknown node")
+            self.upstream[dst].append(src)
+        if output not in self.nodes:
+            raise ValueError(f"workflow {name}: unknown output node {output}")
+        self.output = output
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[Node]:
+        order, state = [], {}
+
+        def visit(node_id: str):
+            if state.get(node_id) == "done":
+                return
+            if state.get(node_id) == "visiting":
+                raise ValueError(f"workflow {self.name}: cycle through {node_id}")
+            state[node_id] = "visiting"
+            for upstream in self.upstream[node_id]:
+                visit(upstream)
+            state[node_id] = "done"
+            order.append(self.nodes[node_id])
+
+        for node_id in self.nodes:
+            visit(node_id)
+        return order
+
+    def hop(self, node: Node) -> str:
+        target = "openai" if isinstance(node, LLMNode) else node.agent
+        return f"{self.owner}→{target}".lower()
+
+    def hops(self) -> Dict[Tuple[str, str, str, Optional[str]], str]:
+        """
+        Hop labels keyed by (source, event type, direction, peer) for every
+        agent in the graph. The peer is the other agent of an A2A event or the
+        node of a node event; it is None for everything else.
+        """
+        table = {}
+
+        def agent(name: str, caller: str):
+            me, up = name.lower(), caller.lower()
+            table[(name, "rpc_request", "in", None)] = f"{up}→{me}"
+            for event_type in ("rpc_response", "report_section", "job_rejected", "degraded_response"):
+                table[(name, event_type, "out", None)] = f"{me}→{up}"
+            table[(name, "job_dequeued", "out", None)] = f"queue→{me}"
+            for event_type, direction in LLM_EVENTS:
+                table[(name, event_type, direction, None)] = (
+                    f"{me}→openai" if direction == "out" else f"openai→{me}")
+
+        agent(self.owner, self.caller)
+        for node in self.nodes.values():
+            for event_type in ("node_started", "node_completed"):
+                table[(self.owner, event_type, "out", node.id)] = self.hop(node)
+            if isinstance(node, A2ANode):
+                agent(node.agent, self.owner)
+                peer = node.agent.lower()
+                for event_type in ("a2a_outgoing", "hop_unavailable", "circuit_state"):
+                    table[(self.owner, event_type, "out", node.agent)] = f"{self.owner.lower()}→{peer}"
+                table[(self.owner, "a2a_incoming", "in", node.agent)] = f"{peer}→{self.owner.lower()}"
+        return table
+
+def fingerprint(inputs: Dict[str, Any]) -> str:
+    """Stable digest of a node's inputs (strings and artifact references)."""
+    digest = hashlib.sha256()
+    for key in sorted(inputs):
+        digest.update(key.encode())
+        digest.update(b"\x1f")
+        digest.update(repr(inputs[key]).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+def memoizable(result: Any) -> bool:
+    """Keep node results, but not empty or error replies (shared while in flight only)."""
+    return bool(result) and not (isinstance(result, str) and result.startswith("Error"))
+
+class WorkflowEngine:
+    """Runs workflows with bounded parallelism and per-node memoization."""
+
+    def __init__(self, max_parallel: int = 4, memo: Optional[IdempotentCalls] = None):
+        self.max_parallel = max_parallel
+        self.memo = memo or IdempotentCalls(bucket_s=0)
+
+    @classmethod
+    def from_env(cls) -> "WorkflowEngine":
+        return cls(
+            max_parallel=int(os.getenv("WORKFLOW_MAX_PARALLEL", "4")),
+            memo=IdempotentCalls(
+                ttl_s=float(os.getenv("WORKFLOW_MEMO_TTL_S", "600")),
+                max_entries=int(os.getenv("WORKFLOW_MEMO_MAX_ENTRIES", "500")),
+                bucket_s=0,
+            ),
+        )
+
+    async def run(
+        self,
+        workflow: Workflow,
+        inputs: Dict[str, Any],
+        execute: Callable[[Node, Dict[str, Any]], Awaitable[Any]],
+        scope: str = "anonymous",
+    ) -> Any:
+        """
+        Run every node once its upstream nodes are done and return the output
+        node's result. The first failing node cancels the nodes that have not
+        started and its exception propagates. Memoized nodes that are already
+        running finish in the background, so a retry can reuse their results.
+        """
+        slots = asyncio.Semaphore(self.max_parallel)
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_node(node: Node):
+            upstream = workflow.upstream[node.id]
+            await asyncio.gather(*(tasks[u] for u in upstream))
+            node_inputs = {**inputs, **{u: results[u] for u in upstream}}
+            async with slots:
+                results[node.id] = await self._run_node(workflow, node, node_inputs, execute, scope)
+
+        # Topological order: every upstream task exists before its dependents
+        for node in workflow.order:
+            tasks[node.id] = asyncio.create_task(run_node(node))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return results[workflow.output]
+
+    async def _run_node(self, workflow: Workflow, node: Node, inputs: Dict[str, Any],
+                        execute: Callable[[Node, Dict[str, Any]], Awaitable[Any]], scope: str) -> Any:
+        data = {
+            "workflow": workflow.name,
+            "node": node.id,
+            "kind": "llm" if isinstance(node, LLMNode) else "a2a",
+            "skill": getattr(node, "skill", None),
+        }
+        await broadcast_event(workflow.owner, "node_started", data, status="pending")
+        start = time.monotonic()
+        try:
+            if node.memoize:
+                key = self.memo.keys(scope, f"{workflow.name}/{node.id}/{fingerprint(inputs)}", "")
+                result, outcome = await self.memo.run(key, lambda: execute(node, inputs), cacheable=memoizable)
+            else:
+                result, outcome = await execute(node, inputs), "executed"
+        except Exception as e:
+            await broadcast_event(workflow.owner, "node_completed", {**data, "error": str(e)},
+                                  latency_ms=int((time.monotonic() - start) * 1000), status="error")
+            raise
+        await broadcast_event(workflow.owner, "node_completed", {**data, "memo": outcome},
+                              latency_ms=int((time.monotonic() - start) * 1000), status="success")
+        return result
+
+# The Researcher's pipeline: research notes, then a draft by the agent with draft_report
+RESEARCH_AND_DRAFT = Workflow(
+    name="research_and_draft",
+    owner="RESEARCHER",
+    caller="MCP",
+    nodes=[
+        LLMNode("research", lambda i: research_prompt(i["topic"]), topic_cached=True),
+        A2ANode("draft", "draft_report", "WRITER",
+                lambda i: f"Topic: {i['topic']}\nNotes:\n{i['research']}"),
+    ],
+    edges=[("research", "draft")],
+    output="draft",
+)
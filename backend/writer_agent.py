@@ -1,16 +1,13 @@
 """
 Writer Agent - A2A Server with Event Broadcasting
-Port: 8002
+Port: 8002 (WRITER_PORT)
 Skill: draft_report
 Receives topic + notes, drafts markdown report
-Broadcasts structured events via WebSocket
+Publishes structured events to the event gateway
 """
+import asyncio
 import os
-import uvicorn
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
 import time
 import traceback as tb
 
@@ -24,36 +21,60 @@ from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
+    Message,
 )
+from starlette.responses import JSONResponse
 
-from event_broadcaster import init_event_queue, broadcast_event, event_queue
+from artifact_store import ArtifactStore, ref_message
+from event_broadcaster import init_event_queue, broadcast_event, publish_to_gateway, demo_pause, register_hops
+from health import Health
+from lifecycle import Lifecycle, serve
+from llm_provider import get_router
+from incremental_draft import DraftCache, DraftRecord, RedraftPlan, plan_redraft
+from prompts import draft_prompt, section_prompt, usage_breakdown
+from scheduler import Overloaded
+from registry_client import announce, public_url
+from tenants import TenantRegistry, read_message, tenant_id
+from workflow import RESEARCH_AND_DRAFT
 
 load_dotenv()
 
-api_key = os.getenv("OPENAI_API_KEY")
-openai_client = AsyncOpenAI(api_key=api_key) if api_key else None
+WRITER_PORT = int(os.getenv("WRITER_PORT", "8002"))
 
-# WebSocket connections
-active_connections: List[WebSocket] = []
+# The Writer is the draft node of the Researcher's workflow; its hops come from that graph
+register_hops(RESEARCH_AND_DRAFT.hops())
+
+# Per-tenant quotas, metrics and caches
+tenants = TenantRegistry.from_env()
+
+# Reports above ARTIFACT_INLINE_MAX_BYTES are returned by reference
+artifacts = ArtifactStore.from_env()
+
+# Background tasks, tasks in flight and draining on shutdown
+lifecycle = Lifecycle("WRITER")
 
 class WriterAgent:
     """Drafts markdown reports from topic + notes."""
     
-    def __init__(self, topic: str, notes: str, api_key: str = None):
+    def __init__(self, topic: str, notes: str, api_key: str = None, tenant: str = "anonymous"):
         self.topic = topic
         self.notes = notes
         self.api_key = api_key
+        self.tenant = tenant
+        # Recent notes -> report section mappings, for incremental redrafts
+        self.draft_cache = tenants.cache(tenant, "drafts", DraftCache)
     
     async def draft(self) -> str:
-        client = openai_client
         if self.api_key:
             print(f"[Writer] Using provided API key for request")
-            client = AsyncOpenAI(api_key=self.api_key)
-            
-        if not client:
-            raise ValueError("OPENAI_API_KEY not found in env or request.")
         
-        print(f"[Writer] Drafting report for: {self.topic}")
+        record = self.draft_cache.get(self.topic)
+        redraft = plan_redraft(record, self.notes) if record else None
+        mode = "incremental" if redraft else "full"
+        print(f"[Writer] Drafting report for: {self.topic} ({mode})")
+        router = get_router()
+        plan = router.plan("draft_report", len(self.notes))
+        prompt = None if redraft else draft_prompt(self.topic, self.notes)
         
         # Broadcast OpenAI call event
         start_time = time.time()
@@ -61,35 +82,49 @@ class WriterAgent:
             "WRITER",
             "openai_call",
             {
-                "model": "gpt-4o-mini",
+                "model": plan.models[0],
                 "purpose": "draft_report",
                 "topic": self.topic,
-                "notes_length": len(self.notes)
+                "notes_length": len(self.notes),
+                "prompt_tokens": prompt.prompt_tokens if prompt else None,
+                "mode": mode,
+                "sections_to_redraft": len(redraft.changed) if redraft else None
             },
             status="pending"
         )
         
         # Artificial delay for visualization
-        await asyncio.sleep(2.0)
+        await demo_pause(2.0)
         
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a technical writer. Create a markdown report based on the input."},
-                {"role": "user", "content": f"Topic: {self.topic}\nNotes:\n{self.notes}"}
-            ]
-        )
-        report = response.choices[0].message.content
+        if redraft:
+            report, model, usage = await self._redraft_sections(router, plan, redraft)
+        else:
+            response, model = await router.complete(
+                "WRITER",
+                plan,
+                prompt.messages,
+                api_key=self.api_key,
+                max_tokens=prompt.max_tokens
+            )
+            report = response.choices[0].message.content
+            usage = usage_breakdown(response, prompt)
+            self.draft_cache.put(self.topic, DraftRecord.build(self.notes, report))
         
         latency = int((time.time() - start_time) * 1000)
+        tenants.record_tokens(self.tenant, usage["prompt_tokens"] + usage["completion_tokens"])
         
         # Broadcast OpenAI response event
         await broadcast_event(
             "WRITER",
             "openai_response",
             {
-                "tokens": response.usage.total_tokens if response.usage else 0,
-                "content_length": len(report)
+                "model": model,
+                "tokens": usage["prompt_tokens"] + usage["completion_tokens"],
+                "content_length": len(report),
+                "usage": usage,
+                "mode": mode,
+                "sections_redrafted": len(redraft.changed) if redraft else None,
+                "sections_total": len(redraft.record.sections) if redraft else None
             },
             latency_ms=latency,
             status="success"
@@ -97,6 +132,58 @@ class WriterAgent:
         
         print(f"[Writer] Report completed (length: {len(report)})")
         return report
+    
+    async def _redraft_sections(self, router, plan, redraft: RedraftPlan):
+        """Rewrite only the changed sections concurrently, streaming each as it lands."""
+        sections = list(redraft.record.sections)
+        current_report = redraft.record.report()
+        
+        async def rewrite(index: int):
+            section = sections[index]
+            heading = section.split("\n", 1)[0]
+            prompt = section_prompt(
+                self.topic, current_report, section, redraft.section_notes(index), redraft.changed[index]
+            )
+            response, model = await router.complete(
+                "WRITER",
+                plan,
+                prompt.messages,
+                api_key=self.api_key,
+                max_tokens=prompt.max_tokens
+            )
+            text = response.choices[0].message.content.strip()
+            if not text.startswith("## "):
+                text = f"{heading}\n{text}"
+            return index, text + "\n\n", model, usage_breakdown(response, prompt)
+        
+        model, usage = plan.models[0], {"prompt_tokens": 0, "completion_tokens": 0}
+        tasks = [asyncio.create_task(rewrite(i)) for i in redraft.changed]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, text, model, section_usage = await next_done
+                sections[index] = text
+                for key, value in section_usage.items():
+                    usage[key] = usage.get(key, 0) + value
+                await broadcast_event(
+                    "WRITER",
+                    "report_section",
+                    {
+                        "topic": self.topic,
+                        "index": index,
+                        "section": text
+                    },
+                    status="success"
+                )
+        except BaseException:
+            # One failed rewrite fails the draft: stop the others instead of leaving them running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        record = DraftRecord(redraft.bullets, redraft.record.preamble, sections, redraft.bullet_sections)
+        self.draft_cache.put(self.topic, record)
+        return record.report(), model, usage
 
 class WriterAgentExecutor(AgentExecutor):
     """Executor for Writer Agent."""
@@ -106,21 +193,15 @@ class WriterAgentExecutor(AgentExecutor):
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
-        # Extract message content and API key
+        # Extract message content, API key (message metadata) and tenant
         content = ""
         api_key = None
-        message_dict = None
+        metadata = {}
         
         if hasattr(context, 'message') and context.message:
-            message_dict = context.message.model_dump()
-            for part in context.message.parts:
-                part_dict = part.model_dump() if hasattr(part, 'model_dump') else {}
-                if 'text' in part_dict:
-                    text = part_dict['text']
-                    if text.startswith("__API_KEY__:"):
-                        api_key = text.replace("__API_KEY__:", "").strip()
-                    elif not content: # Only take the first non-key text part as content
-                        content = text
+            texts, api_key, metadata = read_message(context.message)
+            content = texts[0] if texts else "" # Only the first text part is content
+        tenant = tenant_id(metadata, api_key)
         
         # Broadcast RPC request received
         print(f"[Writer] Broadcasting rpc_request event...")
@@ -130,34 +211,37 @@ class WriterAgentExecutor(AgentExecutor):
             {
                 "agent": "WRITER",
                 "skill": "draft_report",
-                "content_length": len(content)
+                "content_length": len(content),
+                "tenant": tenant
             },
-            a2a_message=message_dict,
+            a2a_message=context.message,
             status="success"
         )
         print(f"[Writer] Event broadcasted successfully")
         
         if not content:
-            await event_queue.enqueue_event(new_agent_text_message("Error: No content provided"))
+            await event_queue.enqueue_event(error_message("Error: No content provided"))
             return
         
         # Parse topic and notes from content
         lines = content.split('\n', 1)
         if len(lines) < 2 or not lines[0].startswith("Topic:"):
-            await event_queue.enqueue_event(new_agent_text_message("Error: Invalid format. Expected 'Topic: X\\nNotes:\\n...'"))
+            await event_queue.enqueue_event(error_message("Error: Invalid format. Expected 'Topic: X\\nNotes:\\n...'"))
             return
         
         topic = lines[0].replace("Topic:", "").strip()
         notes = lines[1].strip()
         
-        print(f"[Writer] Received topic: '{topic}'")
+        print(f"[Writer] Received topic: '{topic}' (tenant {tenant})")
         print(f"[Writer] Notes length: {len(notes)}")
-        if api_key:
-            print(f"[Writer] Received dynamic API key")
         
         try:
-            agent = WriterAgent(topic, notes, api_key)
-            report = await agent.draft()
+            async with tenants.admit(tenant):
+                agent = WriterAgent(topic, notes, api_key, tenant)
+                report = await agent.draft()
+            
+            # Large reports go to the artifact store; the reply carries a reference
+            artifact = artifacts.offload(report)
             
             # Broadcast RPC response sent
             await broadcast_event(
@@ -166,12 +250,18 @@ class WriterAgentExecutor(AgentExecutor):
                 {
                     "agent": "WRITER",
                     "result_length": len(report),
+                    "artifact": artifact.to_event() if artifact else None,
                     "status": "success"
                 },
                 status="success"
             )
             
-            await event_queue.enqueue_event(new_agent_text_message(report))
+            await event_queue.enqueue_event(ref_message(artifact) if artifact else new_agent_text_message(report))
+        except Overloaded as e:
+            print(f"[Writer] Rejected ({tenant}): {e}")
+            message = new_agent_text_message(f"Error: Writer overloaded ({e.reason}); retry after {e.retry_after_s}s")
+            message.metadata = {"error": "overloaded", "retry_after_s": e.retry_after_s}
+            await event_queue.enqueue_event(message)
         except Exception as e:
             error_stack = tb.format_exc()
             print(f"[Writer] Error: {e}")
@@ -192,17 +282,21 @@ class WriterAgentExecutor(AgentExecutor):
                 }
             )
             
-            await event_queue.enqueue_event(new_agent_text_message(f"Error: {str(e)}"))
+            await event_queue.enqueue_event(error_message(f"Error: {str(e)}"))
     
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
         raise Exception('cancel not supported')
 
-if __name__ == '__main__':
-    # Initialize event queue
-    init_event_queue()
-    
+def error_message(text: str) -> Message:
+    """A failure reply; the "error" metadata tells callers not to treat the text as a report."""
+    message = new_agent_text_message(text)
+    message.metadata = {"error": "failed"}
+    return message
+
+def agent_card(url: str) -> AgentCard:
+    """The Writer's AgentCard, served at `url`."""
     skill = AgentSkill(
         id='draft_report',
         name='Draft Report',
@@ -211,107 +305,62 @@ if __name__ == '__main__':
         examples=['Draft a report on AI'],
     )
     
-    agent_card = AgentCard(
+    return AgentCard(
         name='protocol-native-writer',
         description='An agent that drafts markdown reports from research notes.',
-        url='http://localhost:8002/',
+        url=url,
         version='0.1.0',
         default_input_modes=['text'],
-        default_output_modes=['text'],
+        default_output_modes=['text', 'file'],
         capabilities=AgentCapabilities(streaming=False),
         skills=[skill],
     )
-    
-    request_handler = DefaultRequestHandler(
+
+def request_handler() -> DefaultRequestHandler:
+    """The Writer's A2A request handler (served over HTTP, or called in process when colocated)."""
+    return DefaultRequestHandler(
         agent_executor=WriterAgentExecutor(),
         task_store=InMemoryTaskStore(),
     )
-    
+
+def build_app(card: AgentCard):
+    """The Writer's Starlette app: A2A endpoints, health probes and /tenants; background tasks run in its lifespan."""
+    task_store = InMemoryTaskStore()
     server_app = A2AStarletteApplication(
-        agent_card=agent_card,
-        http_handler=request_handler,
+        agent_card=card,
+        http_handler=DefaultRequestHandler(
+            agent_executor=lifecycle.executor(WriterAgentExecutor()),
+            task_store=task_store,
+        ),
     )
     
-    # Get the Starlette app
-    app = server_app.build()
+    # Forward events to the gateway over a single persistent connection, and publish
+    # the card and load to the registry (until draining) so callers can route draft_report here
+    lifecycle.background(lambda: publish_to_gateway("WRITER"))
+    lifecycle.background(lambda: announce(
+        card.model_dump(mode="json", by_alias=True, exclude_none=True),
+        lambda: {"in_flight": tenants.in_flight(), "queue_depth": 0},
+    ), until_drain=True)
     
-    # Background task to broadcast events to WebSocket clients
-    async def broadcast_to_websockets():
-        import asyncio
-        import sys
-        from event_broadcaster import get_event_queue
-        
-        print(f"[Writer] Broadcast task STARTING...", file=sys.stderr)
-        
-        try:
-            while True:
-                eq = get_event_queue()
-                if eq is None:
-                    print("[Writer] Waiting for event queue initialization...", file=sys.stderr)
-                    await asyncio.sleep(1)
-                    continue
-                
-                if not eq.empty():
-                    event = await eq.get()
-                    print(f"[Writer] Processing event from queue: {event['type']}", file=sys.stderr)
-                    
-                    # Broadcast to all connected clients
-                    if not active_connections:
-                        print(f"[Writer] No active connections to receive event", file=sys.stderr)
-                    
-                    disconnected = []
-                    for connection in active_connections:
-                        try:
-                            await connection.send_json(event)
-                            print(f"[Writer] Sent event to client: {event['type']}", file=sys.stderr)
-                        except Exception as e:
-                            print(f"[Writer] Failed to send to client: {e}", file=sys.stderr)
-                            disconnected.append(connection)
-                    
-                    # Remove disconnected clients
-                    for conn in disconnected:
-                        if conn in active_connections:
-                            active_connections.remove(conn)
-                
-                await asyncio.sleep(0.01)  # Check frequently
-        except Exception as e:
-            print(f"[Writer] CRITICAL ERROR in broadcast task: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+    # Get the Starlette app
+    app = server_app.build(lifespan=lifecycle.lifespan)
     
-    # Add WebSocket endpoint for event streaming
-    async def websocket_events(websocket: WebSocket):
-        await websocket.accept()
-        active_connections.append(websocket)
-        print(f"[Writer] WebSocket client connected. Total: {len(active_connections)}")
-        
-        try:
-            # Keep connection alive
-            while True:
-                # Wait for client messages (ping/pong)
-                try:
-                    await websocket.receive_text()
-                except:
-                    break
-        except WebSocketDisconnect:
-            pass
-        finally:
-            if websocket in active_connections:
-                active_connections.remove(websocket)
-            print(f"[Writer] WebSocket client disconnected. Total: {len(active_connections)}")
+    async def tenant_stats(request):
+        """Per-tenant requests, rejections, token use and quotas."""
+        return JSONResponse(tenants.metrics())
     
-    # Add WebSocket route to app
-    from starlette.routing import WebSocketRoute
-    app.routes.append(WebSocketRoute("/events", websocket_events))
+    app.add_route("/tenants", tenant_stats, methods=["GET"])
+    Health(lifecycle, task_store).install(app)
     
-    # Start background task for broadcasting
-    import asyncio
+    return app
+
+if __name__ == '__main__':
+    # Initialize event queue
+    init_event_queue()
     
-    @app.on_event("startup")
-    async def startup_event():
-        asyncio.create_task(broadcast_to_websockets())
-        print("[Writer] Started WebSocket broadcast task")
+    app = build_app(agent_card(public_url(WRITER_PORT)))
     
-    print("Starting Writer Agent on port 8002...")
-    print("WebSocket events available at ws://localhost:8002/events")
-    uvicorn.run(app, host='0.0.0.0', port=8002)
+    print(f"Starting Writer Agent on port {WRITER_PORT}...")
+    print("Events published to gateway (viewers: ws://localhost:9000/events)")
+    serve(app, WRITER_PORT, lifecycle)
+
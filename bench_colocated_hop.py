@@ -0,0 +1,106 @@
+"""
+Benchmark: colocated vs networked A2A hop overhead
+The same A2A request handler (an echo executor, so no LLM time is counted) is
+called two ways:
+1. networked: A2AClient over httpx to the handler served by uvicorn on loopback
+   (JSON-RPC encode, HTTP round trip, decode and pydantic validation both ways)
+2. colocated: LocalA2AClient (backend/colocated.py), request objects passed in process
+
+Per-call latency for small and large replies, sequential calls.
+
+Usage: python bench_colocated_hop.py [calls]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+import warnings
+from typing import Union
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from a2a.client import A2AClient
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.events import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill, MessageSendParams, SendMessageRequest
+from a2a.utils import new_agent_text_message
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from colocated import LocalA2AClient, LocalTransport
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+REPLY_SIZES = (1_000, 64_000)
+
+class EchoExecutor(AgentExecutor):
+    """Replies with `size` bytes of text, where `size` is the request text."""
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        size = int(context.get_user_input())
+        await event_queue.enqueue_event(new_agent_text_message("x" * size))
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        raise Exception('cancel not supported')
+
+def card(url: str) -> AgentCard:
+    return AgentCard(
+        name="echo", description="echo", url=url, version="0.0.1",
+        default_input_modes=["text"], default_output_modes=["text"],
+        capabilities=AgentCapabilities(streaming=False),
+        skills=[AgentSkill(id="draft_report", name="Draft", description="", tags=[])],
+    )
+
+def request(size: int) -> SendMessageRequest:
+    return SendMessageRequest(id=str(uuid4()), params=MessageSendParams(message={
+        "role": "user", "parts": [{"kind": "text", "text": str(size)}], "messageId": uuid4().hex,
+    }))
+
+async def sample(client: Union[A2AClient, LocalA2AClient], size: int, calls: int) -> list:
+    for _ in range(10):  # warm up
+        await client.send_message(request(size))
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = await client.send_message(request(size))
+        samples.append((time.perf_counter() - start) * 1e6)
+        assert len(response.root.result.parts[0].root.text) == size
+    return samples
+
+def p95(samples: list) -> float:
+    return statistics.quantiles(samples, n=20)[-1]
+
+async def main(calls: int):
+    handler = DefaultRequestHandler(agent_executor=EchoExecutor(), task_store=InMemoryTaskStore())
+    app = A2AStarletteApplication(agent_card=card("http://127.0.0.1/"), http_handler=handler).build()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="error"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/"
+
+    local = LocalA2AClient(LocalTransport(handler, card("local://echo/")))
+    print(f"{calls} sequential calls per row; times per call in microseconds")
+    print(f"{'reply':>8}  {'transport':<11} {'median':>9} {'p95':>9}")
+    try:
+        # One reused keep-alive connection: a lower bound (the Researcher opens a client per call)
+        async with httpx.AsyncClient(timeout=30.0) as httpx_client:
+            networked = A2AClient(httpx_client=httpx_client, agent_card=card(url))
+            for size in REPLY_SIZES:
+                rows = {"networked": await sample(networked, size, calls),
+                        "colocated": await sample(local, size, calls)}
+                for name, samples in rows.items():
+                    print(f"{size:>7}B  {name:<11} {statistics.median(samples):>9.0f} {p95(samples):>9.0f}")
+                saved = statistics.median(rows["networked"]) - statistics.median(rows["colocated"])
+                print(f"{'':>8}  saved per hop: {saved:.0f} us "
+                      f"({statistics.median(rows['networked']) / statistics.median(rows['colocated']):.1f}x)")
+    finally:
+        server.should_exit = True
+        await serving
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
@@ -0,0 +1,107 @@
+"""
+Benchmark: batched vs unbatched event publishing
+Runs the event gateway ingest in-process, simulates N concurrent requests
+emitting ~10 events each, and counts publisher writes and viewer frames.
+
+Usage: python bench_event_batching.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+import event_broadcaster
+import serialization
+from mcp_server import event_server
+
+EVENTS_PER_REQUEST = 10
+
+class CountingViewer:
+    """Stands in for a dashboard WebSocket and records what it receives."""
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.frames = 0
+        self.events = []
+        self.done = asyncio.Event()
+
+    async def send_bytes(self, data: bytes):
+        await self.receive(serialization.loads(data))
+
+    async def send_text(self, data: str):
+        await self.receive(serialization.loads(data))
+
+    async def receive(self, frame):
+        if isinstance(frame, dict) and frame.get("type") == "gateway_status":
+            return
+        self.frames += 1
+        self.events.extend(frame if isinstance(frame, list) else [frame])
+        if len(self.events) >= self.expected:
+            self.done.set()
+
+async def simulate_request(trace: int):
+    """One request emits its events in a burst, like the Researcher→Writer chain."""
+    for i in range(EVENTS_PER_REQUEST):
+        event_broadcaster.enqueue_event({
+            "id": f"{trace}-{i}",
+            "source": "RESEARCHER",
+            "type": "rpc_request",
+            "data": {"trace": trace, "i": i},
+        })
+        await asyncio.sleep(0)
+
+def check_ordering(events) -> bool:
+    last = {}
+    for event in events:
+        trace, i = event["data"]["trace"], event["data"]["i"]
+        if i != last.get(trace, -1) + 1:
+            return False
+        last[trace] = i
+    return True
+
+async def run_mode(name: str, requests: int, max_batch: int, flush_interval: float):
+    event_broadcaster.init_event_queue()
+    event_server.event_queue.clear()
+    expected = requests * EVENTS_PER_REQUEST
+    viewer = CountingViewer(expected)
+    event_server.active_connections.clear()
+    registered = event_server.register_viewer(viewer)
+
+    server = await asyncio.start_server(
+        event_server.handle_publisher, "127.0.0.1", 0, limit=event_server.INGEST_LINE_LIMIT
+    )
+    event_broadcaster.EVENT_GATEWAY_PORT = server.sockets[0].getsockname()[1]
+    publisher = asyncio.create_task(
+        event_broadcaster.publish_to_gateway("BENCH", max_batch=max_batch, flush_interval=flush_interval)
+    )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate_request(t) for t in range(requests)))
+    await viewer.done.wait()
+    elapsed = time.perf_counter() - start
+
+    publisher.cancel()
+    await asyncio.gather(publisher, return_exceptions=True)
+    event_server.unregister_viewer(registered)
+    server.close()
+    await server.wait_closed()
+
+    print(f"{name:<10} events={expected:<7} frames={viewer.frames:<7} "
+          f"events/frame={expected / viewer.frames:6.1f}  "
+          f"{expected / elapsed:10.0f} events/s  ordered={check_ordering(viewer.events)}")
+    return viewer.frames, elapsed
+
+async def main(requests: int):
+    print(f"Simulating {requests} concurrent requests x {EVENTS_PER_REQUEST} events\n")
+    frames_single, t_single = await run_mode("unbatched", requests, max_batch=1, flush_interval=0)
+    frames_batched, t_batched = await run_mode(
+        "batched", requests,
+        max_batch=event_broadcaster.EVENT_BATCH_MAX,
+        flush_interval=event_broadcaster.EVENT_BATCH_INTERVAL_MS / 1000,
+    )
+    print(f"\nFrame reduction: {frames_single / frames_batched:.1f}x, "
+          f"speedup: {t_single / t_batched:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,52 @@
+"""
+Benchmark: per-message latency added by the MCP bridge (mcp_bridge/server_draft.py)
+Opens one stdio session to the MCP server directly and one through the bridge,
+then times tools/list round trips on each. The difference is what the bridge
+adds per request/response pair (two forwarded messages).
+
+Usage: python bench_mcp_proxy.py [round_trips]
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join("mcp_server", "server.py")
+BRIDGE = os.path.join("mcp_bridge", "server_draft.py")
+
+async def round_trips(args, count: int):
+    params = StdioServerParameters(command=sys.executable, args=args, cwd=ROOT)
+    async with stdio_client(params, errlog=subprocess.DEVNULL) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for _ in range(20):  # warm up
+                await session.list_tools()
+            samples = []
+            for _ in range(count):
+                start = time.perf_counter()
+                await session.list_tools()
+                samples.append((time.perf_counter() - start) * 1e6)
+            return samples
+
+def describe(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+    return f"p50 {statistics.median(ordered):8.1f} us   p95 {p95:8.1f} us"
+
+async def main(count: int):
+    direct = await round_trips([SERVER], count)
+    bridged = await round_trips([BRIDGE], count)
+    print(f"tools/list round trips: {count}")
+    print(f"  direct   {describe(direct)}")
+    print(f"  bridged  {describe(bridged)}")
+    added = statistics.median(bridged) - statistics.median(direct)
+    print(f"  added    {added:8.1f} us per round trip (~{added / 2:.1f} us per message)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,79 @@
+"""
+Benchmark: MCP server cold start
+1. `-X importtime` profile of mcp_server/server.py (top modules, deferred-import check)
+2. Time from process spawn to a `list_tools` response over stdio, against a budget
+
+Usage: python bench_mcp_startup.py [runs] [budget_ms]
+Exits non-zero if the median time-to-list_tools exceeds the budget.
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join("mcp_server", "server.py")
+
+# Heavy modules that must not load until the first tool call
+DEFERRED_MODULES = ("a2a.client", "a2a.types")
+
+LIST_TOOLS_BUDGET_MS = 1000
+
+def import_profile(top: int = 10):
+    """Import the server module under -X importtime and summarize the cost."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=os.path.join(ROOT, "mcp_server"),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+
+    loaded = {name for _, name in rows}
+    total_us = next((us for us, name in rows if name == "server"), 0)
+    print(f"Import of mcp_server/server.py: {total_us / 1000:.1f} ms")
+    print(f"Top {top} cumulative imports:")
+    for us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [m for m in DEFERRED_MODULES if m in loaded]
+    print(f"Deferred modules loaded at startup: {eager or 'none'}")
+    return total_us, eager
+
+async def time_to_list_tools() -> float:
+    """Spawn the server over stdio and time until list_tools returns."""
+    params = StdioServerParameters(command=sys.executable, args=[SERVER], cwd=ROOT)
+    start = time.perf_counter()
+    async with stdio_client(params, errlog=subprocess.DEVNULL) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            return (time.perf_counter() - start) * 1000
+
+async def main(runs: int, budget_ms: float):
+    _, eager = import_profile()
+
+    samples = [await time_to_list_tools() for _ in range(runs)]
+    median = statistics.median(samples)
+    print(f"\nTime to list_tools over {runs} runs: "
+          f"median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms "
+          f"(budget {budget_ms:.0f} ms)")
+
+    ok = median <= budget_ms and not eager
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else LIST_TOOLS_BUDGET_MS
+    sys.exit(asyncio.run(main(runs, budget)))
@@ -0,0 +1,118 @@
+"""
+Benchmark: JSON serialization on the event and A2A paths
+1. Event encode: one typical event, stdlib json vs orjson
+2. A2A response decode: SendMessageResponse with small and 1 MB reports,
+   stdlib json vs orjson vs pydantic model_validate_json
+3. Replay: 100 buffered events to N viewers, re-encoding per send (the old
+   send_json path) vs sending the cached encoded bytes
+
+Usage: python bench_serialization.py [viewers]
+The orjson rows are skipped if orjson is not installed.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import serialization
+from a2a.types import Message, Part, Role, SendMessageResponse, SendMessageSuccessResponse, TextPart
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EVENT = {
+    "id": str(uuid4()),
+    "timestamp": "2025-01-01T12:00:00.000000",
+    "source": "RESEARCHER",
+    "type": "a2a_incoming",
+    "hop": "writer→researcher",
+    "direction": "in",
+    "transport": "http",
+    "data": {"from": "WRITER", "latency_ms": 812, "status": "success", "usage": {"prompt_tokens": 420, "completion_tokens": 380}},
+    "a2a_schema": {"message_id": uuid4().hex, "role": "agent", "parts": [{"kind": "text", "text": "# Report " + "x" * 190 + "..."}]},
+    "latency_ms": 812,
+    "status": "success",
+    "seq": 12345,
+}
+
+def per_call_us(fn, repeat: int = 7, number: int = 0) -> float:
+    """Best-of-`repeat` median time per call in microseconds, auto-sizing the loop."""
+    if not number:
+        number, elapsed = 1, 0.0
+        while elapsed < 0.05:
+            number *= 2
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return statistics.median(samples)
+
+def row(label: str, us: float, baseline: float = None):
+    speedup = f"  {baseline / us:5.1f}x" if baseline else ""
+    print(f"  {label:<40} {us:12.2f} us{speedup}")
+
+def bench_event_encode():
+    print("Event encode (one event)")
+    base = per_call_us(lambda: json.dumps(EVENT).encode())
+    row("json.dumps().encode()", base)
+    if orjson is not None:
+        row("orjson.dumps()", per_call_us(lambda: orjson.dumps(EVENT)), base)
+    row(f"serialization.dumps() [{serialization.BACKEND}]", per_call_us(lambda: serialization.dumps(EVENT)), base)
+
+def a2a_response_bytes(report_bytes: int) -> bytes:
+    message = Message(role=Role.agent, parts=[Part(root=TextPart(text="# Report\n" + "x" * report_bytes))],
+                      message_id=uuid4().hex, metadata={"tenant": "tenant-a"})
+    return SendMessageResponse(root=SendMessageSuccessResponse(id="1", result=message)).model_dump_json().encode()
+
+def bench_a2a_decode():
+    for label, size in (("2 KB", 2048), ("1 MB", 1024 * 1024)):
+        payload = a2a_response_bytes(size)
+        print(f"A2A response decode ({label} report)")
+        base = per_call_us(lambda: json.loads(payload))
+        row("json.loads", base)
+        if orjson is not None:
+            row("orjson.loads", per_call_us(lambda: orjson.loads(payload)), base)
+        row("SendMessageResponse.model_validate_json", per_call_us(
+            lambda: SendMessageResponse.model_validate_json(payload)), base)
+
+def bench_replay(viewers: int):
+    events = [dict(EVENT, seq=i, id=str(uuid4())) for i in range(100)]
+    cached = [serialization.dumps(e) for e in events]
+    sent = []
+
+    def per_send_encode():
+        # What send_json did: encode every event again for every viewer
+        for _ in range(viewers):
+            for event in events:
+                sent.append(json.dumps(event, separators=(",", ":"), ensure_ascii=False).encode())
+        sent.clear()
+
+    def cached_bytes():
+        for _ in range(viewers):
+            for encoded in cached:
+                sent.append(encoded)
+        sent.clear()
+
+    print(f"Replay (100 events to {viewers} viewers)")
+    base = per_call_us(per_send_encode, repeat=3, number=1)
+    row("encode per send", base)
+    cached_us = per_call_us(cached_bytes, repeat=3, number=1)
+    row("cached encoded bytes", cached_us, base)
+    print(f"  -> {100 * viewers / (base / 1e6):,.0f} vs {100 * viewers / (cached_us / 1e6):,.0f} event sends/s")
+
+if __name__ == "__main__":
+    print(f"serialization backend: {serialization.BACKEND}\n")
+    bench_event_encode()
+    bench_a2a_decode()
+    bench_replay(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,79 @@
+"""
+Benchmark: semantic topic cache lookup latency at scale
+Fills the index with N synthetic unit vectors (default 1M), then times
+embedding + nearest-neighbour lookup for real topic phrasings.
+
+Usage: python bench_topic_cache.py [--entries 1000000] [--dim 256] [--index numpy hnsw]
+HNSW is skipped if hnswlib is not installed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from topic_cache import INDEXES, HashedNGramEmbedder
+
+QUERIES = [
+    "vector databases", "what are vector DBs", "quantum computing", "explain kubernetes",
+    "large language models", "rust async runtimes", "graph neural networks", "CRISPR gene editing",
+]
+BATCH = 100_000
+
+def fill(index, entries: int, dim: int, seed: int = 0) -> float:
+    """Insert random unit vectors in batches; returns seconds taken."""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for offset in range(0, entries, BATCH):
+        count = min(BATCH, entries - offset)
+        vectors = rng.standard_normal((count, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index.add_many(np.arange(offset, offset + count), vectors)
+    return time.perf_counter() - start
+
+def time_lookups(index, embedder: HashedNGramEmbedder, rounds: int):
+    embed_us, search_us = [], []
+    for _ in range(rounds):
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            vector = embedder.embed(query)
+            t1 = time.perf_counter()
+            index.search(vector)
+            t2 = time.perf_counter()
+            embed_us.append((t1 - t0) * 1e6)
+            search_us.append((t2 - t1) * 1e6)
+    return embed_us, search_us
+
+def describe(samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(int(0.99 * len(ordered)), len(ordered) - 1)]
+    return f"p50 {statistics.median(ordered):9.1f} us   p99 {p99:9.1f} us"
+
+def main(args: argparse.Namespace):
+    embedder = HashedNGramEmbedder(args.dim)
+    for name in args.index:
+        try:
+            index = INDEXES[name](args.dim, args.entries + 1)
+        except ImportError as e:
+            print(f"[{name}] skipped: {e}")
+            continue
+        build_s = fill(index, args.entries, args.dim)
+        # Warm up caches before timing
+        time_lookups(index, embedder, 1)
+        embed_us, search_us = time_lookups(index, embedder, args.rounds)
+        total_us = [e + s for e, s in zip(embed_us, search_us)]
+        print(f"[{name}] {len(index):,} entries x {args.dim} dims, built in {build_s:.1f} s")
+        print(f"  embed   {describe(embed_us)}")
+        print(f"  search  {describe(search_us)}")
+        print(f"  total   {describe(total_us)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Topic cache lookup latency benchmark")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=25, help="Passes over the query set")
+    parser.add_argument("--index", nargs="+", choices=list(INDEXES), default=list(INDEXES))
+    main(parser.parse_args())
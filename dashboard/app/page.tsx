@@ -19,8 +19,11 @@ import { StepExplainer } from '@/components/StepExplainer';
 
 import { FinalReportModal } from '@/components/FinalReportModal';
 
+// Large reports arrive as artifact references served by the event gateway
+const ARTIFACT_URL = 'http://localhost:9000/artifacts';
+
 export default function Dashboard() {
-  const { lastEvent, isConnected, clearEvents } = useEventStream();
+  const { lastBatch, isConnected, clearEvents } = useEventStream();
   const [events, setEvents] = useState<AgentEvent[]>([]);
   const [selectedEvent, setSelectedEvent] = useState<AgentEvent | null>(null);
   const [activeEvent, setActiveEvent] = useState<AgentEvent | undefined>(undefined);
@@ -44,34 +47,47 @@ export default function Dashboard() {
   }, [events, selectedEvent]);
 
   useEffect(() => {
-    if (lastEvent) {
-      setEvents((prev) => {
-        // Prevent duplicates if lastEvent didn't change (though hook handles this, safety check)
-        if (prev.some(e => e.id === lastEvent.id)) return prev;
-        return [...prev, lastEvent];
-      });
-
-      // Set active event for visualization
-      setActiveEvent(lastEvent);
-
-      // Check for final output
-      if (lastEvent.hop === 'mcp→client' && lastEvent.type === 'mcp_tool_result') {
-        console.log('Final event detected:', lastEvent);
-        console.log('Event data:', lastEvent.data);
-
-        if (lastEvent.data && lastEvent.data.content) {
-          console.log('Opening final report modal with content length:', lastEvent.data.content.length);
-          // Delay modal opening to ensure the event is visible first
-          setTimeout(() => {
-            setFinalReportContent(lastEvent.data.content);
+    if (lastBatch.length === 0) return;
+
+    setEvents((prev) => {
+      // Prevent duplicates if the batch didn't change (though hook handles this, safety check)
+      const seen = new Set(prev.map(e => e.id));
+      const fresh = lastBatch.filter(e => !seen.has(e.id));
+      return fresh.length ? [...prev, ...fresh] : prev;
+    });
+
+    // Set active event for visualization
+    setActiveEvent(lastBatch[lastBatch.length - 1]);
+
+    // Check for final output
+    const finalEvent = lastBatch.find(e => e.hop === 'mcp→client' && e.type === 'mcp_tool_result');
+    if (finalEvent) {
+      console.log('Final event detected:', finalEvent);
+      console.log('Event data:', finalEvent.data);
+
+      if (finalEvent.data && finalEvent.data.artifact) {
+        // Large reports are referenced, not inlined; fetch them from the gateway
+        const { sha256, size } = finalEvent.data.artifact;
+        console.log('Fetching final report artifact:', sha256, size);
+        fetch(`${ARTIFACT_URL}/${sha256}`)
+          .then(res => res.text())
+          .then(text => setTimeout(() => {
+            setFinalReportContent(text);
             setIsReportModalOpen(true);
-          }, 2000); // 2 second delay to let user see the final event
-        } else {
-          console.warn('No content found in final event data');
-        }
+          }, 2000))
+          .catch(err => console.error('Failed to fetch report artifact:', err));
+      } else if (finalEvent.data && finalEvent.data.content) {
+        console.log('Opening final report modal with content length:', finalEvent.data.content.length);
+        // Delay modal opening to ensure the event is visible first
+        setTimeout(() => {
+          setFinalReportContent(finalEvent.data.content);
+          setIsReportModalOpen(true);
+        }, 2000); // 2 second delay to let user see the final event
+      } else {
+        console.warn('No content found in final event data');
       }
     }
-  }, [lastEvent]);
+  }, [lastBatch]);
 
   // If an event is selected, force it as the active event for the diagram
   const displayEvent = selectedEvent || activeEvent;
@@ -1,11 +1,18 @@
-import { useState, useEffect, useCallback } from 'react';
-import { AgentEvent } from '@/lib/types';
+import { useState, useEffect, useCallback, useRef } from 'react';
+import { AgentEvent, GatewayStatus } from '@/lib/types';
 
-const WS_URLS = {
-    WRITER: 'ws://localhost:8002/events',
-    RESEARCHER: 'ws://localhost:8001/events',
-    MCP: 'ws://localhost:9000/events',
-};
+// Single event gateway that all agents and the MCP server publish into
+const GATEWAY_URL = 'ws://localhost:9000/events';
+
+// Reconnect backoff after the gateway closes the stream (1013: viewer too slow,
+// 1012: gateway restarting) or the connection drops
+const RECONNECT_MIN_MS = 250;
+const RECONNECT_MAX_MS = 10000;
+
+const byOrder = (a: AgentEvent, b: AgentEvent) =>
+    a.seq !== undefined && b.seq !== undefined
+        ? a.seq - b.seq
+        : new Date(a.timestamp).getTime() - new Date(b.timestamp).getTime();
 
 export function useEventStream() {
     const [events, setEvents] = useState<AgentEvent[]>([]);
@@ -16,52 +23,90 @@ export function useEventStream() {
     });
 
     const [lastEvent, setLastEvent] = useState<AgentEvent | null>(null);
+    // Every event from the most recent frame (publishers send batched frames)
+    const [lastBatch, setLastBatch] = useState<AgentEvent[]>([]);
 
-    const addEvent = useCallback((event: AgentEvent) => {
-        setLastEvent(event);
+    const addEvents = useCallback((batch: AgentEvent[]) => {
+        if (batch.length === 0) return;
+        setLastBatch(batch);
+        setLastEvent(batch[batch.length - 1]);
         setEvents((prev) => {
             // Avoid duplicates if possible (by ID)
-            if (prev.some(e => e.id === event.id)) return prev;
-            return [...prev, event].sort((a, b) =>
-                new Date(a.timestamp).getTime() - new Date(b.timestamp).getTime()
-            );
+            const seen = new Set(prev.map(e => e.id));
+            const fresh = batch.filter(e => !seen.has(e.id));
+            if (fresh.length === 0) return prev;
+            return [...prev, ...fresh].sort(byOrder);
         });
     }, []);
 
+    // Highest seq received; reconnects ask for what came after it (?since=)
+    const lastSeq = useRef<number | null>(null);
+
     useEffect(() => {
-        const connections: WebSocket[] = [];
+        let ws: WebSocket | null = null;
+        let retry: ReturnType<typeof setTimeout> | null = null;
+        let delay = RECONNECT_MIN_MS;
+        let stopped = false;
+        const decoder = new TextDecoder();
 
-        Object.entries(WS_URLS).forEach(([key, url]) => {
-            const ws = new WebSocket(url);
+        const connect = () => {
+            const url = lastSeq.current === null ? GATEWAY_URL : `${GATEWAY_URL}?since=${lastSeq.current}`;
+            ws = new WebSocket(url);
+            // The gateway sends pre-encoded UTF-8 JSON as binary frames
+            ws.binaryType = 'arraybuffer';
 
             ws.onopen = () => {
-                console.log(`Connected to ${key}`);
-                setIsConnected(prev => ({ ...prev, [key]: true }));
+                console.log('Connected to event gateway');
+                delay = RECONNECT_MIN_MS;
             };
 
-            ws.onclose = () => {
-                console.log(`Disconnected from ${key}`);
-                setIsConnected(prev => ({ ...prev, [key]: false }));
+            ws.onclose = (close) => {
+                setIsConnected({ WRITER: false, RESEARCHER: false, MCP: false });
+                if (stopped) return;
+                // Only a slow-viewer close (1013) means the same gateway still has our seqs;
+                // a restarted gateway numbers from 0 again, so take its full snapshot (ids dedupe)
+                if (close.code !== 1013) lastSeq.current = null;
+                console.log(`Disconnected from event gateway (${close.code}); reconnecting in ${delay}ms`);
+                retry = setTimeout(connect, delay);
+                delay = Math.min(delay * 2, RECONNECT_MAX_MS);
             };
 
             ws.onmessage = (message) => {
                 try {
-                    const event = JSON.parse(message.data);
-                    addEvent(event);
+                    const data = typeof message.data === 'string' ? message.data : decoder.decode(message.data);
+                    const frame = JSON.parse(data);
+                    if (frame.type === 'gateway_status') {
+                        const { publishers } = frame as GatewayStatus;
+                        setIsConnected({
+                            WRITER: publishers.includes('WRITER'),
+                            RESEARCHER: publishers.includes('RESEARCHER'),
+                            MCP: publishers.includes('MCP'),
+                        });
+                        return;
+                    }
+                    const batch: AgentEvent[] = Array.isArray(frame) ? frame : [frame];
+                    for (const event of batch) {
+                        if (event.seq !== undefined && (lastSeq.current === null || event.seq > lastSeq.current)) {
+                            lastSeq.current = event.seq;
+                        }
+                    }
+                    addEvents(batch);
                 } catch (e) {
                     console.error('Failed to parse event', e);
                 }
             };
+        };
 
-            connections.push(ws);
-        });
+        connect();
 
         return () => {
-            connections.forEach(ws => ws.close());
+            stopped = true;
+            if (retry !== null) clearTimeout(retry);
+            ws?.close();
         };
-    }, [addEvent]);
+    }, [addEvents]);
 
     const clearEvents = useCallback(() => setEvents([]), []);
 
-    return { events, isConnected, clearEvents, lastEvent };
+    return { events, isConnected, clearEvents, lastEvent, lastBatch };
 }
@@ -6,11 +6,24 @@ export type EventType =
     | "a2a_incoming"
     | "mcp_tool_call"
     | "mcp_tool_result"
+    | "mcp_tool_deduped"
     | "openai_call"
     | "openai_response"
+    | "llm_route"
+    | "llm_hedge"
+    | "llm_fallback"
+    | "report_section"
+    | "cache_hit"
+    | "job_dequeued"
+    | "job_rejected"
+    | "node_started"
+    | "node_completed"
+    | "hop_unavailable"
+    | "circuit_state"
+    | "degraded_response"
     | "error";
 
-export type TransportType = "stdio" | "http" | "websocket";
+export type TransportType = "stdio" | "http" | "websocket" | "in-process";
 export type Direction = "in" | "out";
 
 export interface A2ASchema {
@@ -19,9 +32,17 @@ export interface A2ASchema {
     parts: Array<{
         kind: string;
         text?: string;
+        uri?: string; // file parts: artifact reference
     }>;
 }
 
+export interface ArtifactRef {
+    sha256: string;
+    size: number;
+    uri: string;
+    mime_type: string;
+}
+
 export interface ErrorOrigin {
     component: string;
     phase: string;
@@ -30,6 +51,7 @@ export interface ErrorOrigin {
 
 export interface AgentEvent {
     id: string;
+    seq?: number; // Global order assigned by the event gateway
     timestamp: string;
     hop: string;
     direction: Direction;
@@ -42,3 +64,8 @@ export interface AgentEvent {
     error_origin?: ErrorOrigin;
     a2a_schema?: A2ASchema;
 }
+
+export interface GatewayStatus {
+    type: "gateway_status";
+    publishers: string[];
+}
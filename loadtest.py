@@ -0,0 +1,252 @@
+"""
+Load-generation harness for the agent pipeline
+Drives A2A `send_message` (Researcher) or the MCP `call_agent` tool at a target
+RPS (open loop) and reports throughput, error rate, p50/p95/p99 latency per
+hop, prompt/completion/cached tokens per hop and LLM hedge rate/win rate as
+JSON. Per-hop latencies come from the event gateway stream.
+
+Offline setup (no OpenAI):
+  python backend/mock_llm_server.py --latency lognormal --latency-ms 300
+  python run_event_server.py
+  LLM_PROVIDER=mock DEMO_DELAYS=0 python backend/writer_agent.py
+  LLM_PROVIDER=mock DEMO_DELAYS=0 python backend/researcher_agent.py
+  python loadtest.py --mode a2a --rps 5 --duration 30 --out results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+from uuid import uuid4
+
+import httpx
+import websockets
+from a2a.client import A2AClient, A2ACardResolver
+from a2a.types import MessageSendParams, SendMessageRequest
+from mcp import StdioServerParameters
+
+from mcp_client_pool import MCPSessionPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from a2a_access import first_text, response_error, response_result, result_message
+from artifact_store import ArtifactStore, find_ref
+
+RESEARCHER_URL = "http://localhost:8001"
+GATEWAY_URL = "ws://localhost:9000/events"
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values, default=0.0),
+    }
+
+class HopCollector:
+    """Subscribes to the event gateway and records latency_ms per hop."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.error_events = 0
+        self.llm_calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.tokens: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.connected = False
+
+    async def run(self):
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                self.connected = True
+                # Ignore the replayed backlog from earlier runs
+                started = datetime.now().isoformat()
+                async for message in ws:
+                    frame = json.loads(message)
+                    for event in (frame if isinstance(frame, list) else [frame]):
+                        if event.get("timestamp", "") < started:
+                            continue
+                        if event.get("type") == "error":
+                            self.error_events += 1
+                        if event.get("type") == "llm_route":
+                            self.llm_calls += 1
+                            self.hedged += bool(event["data"].get("hedged"))
+                            self.hedge_wins += bool(event["data"].get("hedge_won"))
+                        if event.get("type") == "openai_response":
+                            for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                                self.tokens[event["hop"]][key] += event["data"].get("usage", {}).get(key, 0)
+                        if event.get("latency_ms") is not None:
+                            self.latencies[event["hop"]].append(event["latency_ms"])
+        except (OSError, websockets.WebSocketException) as e:
+            print(f"[LoadTest] Event gateway unavailable ({e}); per-hop latencies disabled", file=sys.stderr)
+
+class A2ADriver:
+    """Sends research requests straight to the Researcher over A2A."""
+
+    def __init__(self, priority: str, tenants: int):
+        self.artifacts = ArtifactStore.from_env()
+        self.metadata = itertools.cycle(
+            [{"priority": priority, "tenant": f"tenant-{i}"} for i in range(tenants)]
+        )
+
+    async def __aenter__(self):
+        self.httpx_client = httpx.AsyncClient(timeout=120.0)
+        card = await A2ACardResolver(httpx_client=self.httpx_client, base_url=RESEARCHER_URL).get_agent_card()
+        self.client = A2AClient(httpx_client=self.httpx_client, agent_card=card)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.httpx_client.aclose()
+
+    async def send(self, topic: str) -> str:
+        request = SendMessageRequest(
+            id=str(uuid4()),
+            params=MessageSendParams(message={
+                'role': 'user',
+                'parts': [{'kind': 'text', 'text': topic}],
+                'messageId': uuid4().hex,
+                'metadata': next(self.metadata),
+            }),
+        )
+        response = await self.client.send_message(request)
+        result = response_result(response)
+        if result is None:
+            raise RuntimeError(f"A2A error: {response_error(response)}")
+        # Large reports arrive as an artifact reference (a FilePart), as at the MCP server
+        message = result_message(result)
+        artifact = find_ref(message)
+        return self.artifacts.read_text(artifact) if artifact else first_text(message)
+
+class MCPDriver:
+    """Calls the `call_agent` tool over a pool of warm MCP sessions."""
+
+    def __init__(self, sessions: int, concurrency: int):
+        params = StdioServerParameters(
+            command=sys.executable,
+            args=["mcp_server/server.py"],
+            env={**os.environ, "DEMO_DELAYS": "0"},
+        )
+        self.pool = MCPSessionPool(size=sessions, concurrency=concurrency, server_params=params)
+
+    async def __aenter__(self):
+        await self.pool.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pool.close()
+
+    async def send(self, topic: str) -> str:
+        return await self.pool.research(topic)
+
+async def run(args: argparse.Namespace) -> dict:
+    if args.topics:
+        with open(args.topics, encoding="utf-8") as f:
+            topics = [line.strip() for line in f if line.strip()]
+    else:
+        topics = [f"load test topic {i}" for i in range(50)]
+    topic_cycle = itertools.cycle(topics)
+
+    collector = HopCollector(args.gateway)
+    collector_task = asyncio.create_task(collector.run())
+    await asyncio.sleep(0.5)
+
+    if args.mode == "a2a":
+        driver = A2ADriver(args.priority, args.tenants)
+    else:
+        driver = MCPDriver(args.sessions, args.concurrency)
+    end_to_end: List[float] = []
+    errors = 0
+    rejected = 0
+
+    async def one_request(topic: str):
+        nonlocal errors, rejected
+        start = time.perf_counter()
+        try:
+            text = await driver.send(topic)
+            if text.startswith("Error: Researcher overloaded"):
+                rejected += 1
+                return
+            if text.startswith("Error"):
+                errors += 1
+                return
+            end_to_end.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            errors += 1
+            print(f"[LoadTest] Request failed: {e}", file=sys.stderr)
+
+    async with driver:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = []
+        # Open loop: requests are issued on schedule regardless of completions
+        while loop.time() - started < args.duration:
+            tasks.append(asyncio.create_task(one_request(next(topic_cycle))))
+            next_at = started + len(tasks) / args.rps
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+
+    # Let trailing batched events arrive
+    await asyncio.sleep(0.5)
+    collector_task.cancel()
+
+    latency = {"end_to_end": summarize(end_to_end)}
+    for hop, values in sorted(collector.latencies.items()):
+        latency[hop] = summarize(values)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "mode": args.mode,
+        "target_rps": args.rps,
+        "duration_s": args.duration,
+        "requests": len(tasks),
+        "completed": len(end_to_end),
+        "rejected": rejected,
+        "errors": errors,
+        "error_rate": errors / len(tasks) if tasks else 0.0,
+        "error_events": collector.error_events,
+        "throughput_rps": len(end_to_end) / elapsed if elapsed else 0.0,
+        "latency_ms": latency,
+        "tokens": {hop: dict(counts) for hop, counts in sorted(collector.tokens.items())},
+        "hedging": {
+            "llm_calls": collector.llm_calls,
+            "hedged": collector.hedged,
+            "hedge_wins": collector.hedge_wins,
+            "hedge_rate": collector.hedged / collector.llm_calls if collector.llm_calls else 0.0,
+            "hedge_win_rate": collector.hedge_wins / collector.hedged if collector.hedged else 0.0,
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive the agent pipeline at a target RPS.")
+    parser.add_argument("--mode", choices=["a2a", "mcp"], default="a2a")
+    parser.add_argument("--rps", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep issuing requests")
+    parser.add_argument("--topics", default=None, help="File with one topic per line")
+    parser.add_argument("--sessions", type=int, default=2, help="MCP mode: warm sessions")
+    parser.add_argument("--concurrency", type=int, default=32, help="MCP mode: max in-flight calls")
+    parser.add_argument("--priority", choices=["interactive", "batch"], default="interactive",
+                        help="A2A mode: priority class sent in message metadata")
+    parser.add_argument("--tenants", type=int, default=1, help="A2A mode: spread requests over N tenants")
+    parser.add_argument("--gateway", default=GATEWAY_URL)
+    parser.add_argument("--out", default=None, help="Write the JSON report here as well")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
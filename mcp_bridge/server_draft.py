@@ -1,226 +1,339 @@
 """
-MCP Bridge Server
-Wraps the MCP server process, captures stdio traffic, and broadcasts events via WebSocket.
-Port: 9000
+MCP Bridge: transparent stdio proxy with traffic capture
+Run it in place of an MCP server; it starts the real server as a child and
+forwards bytes in both directions unchanged, so observing a server needs no
+changes to the server itself.
+
+    client ──stdin──▶ bridge ──▶ server      (default: mcp_server/server.py)
+    client ◀─stdout── bridge ◀── server      (stderr is inherited untouched)
+
+The forwarding path is a blocking read/write loop per direction: chunks of
+at most MCP_PROXY_CHUNK bytes are written through as soon as they are read,
+with no decoding or re-framing, and the OS pipes provide backpressure. Each
+forwarded chunk is also offered to a bounded capture queue; a parser thread
+splits it into JSON-RPC frames incrementally and publishes `mcp_tool_call` /
+`mcp_tool_result` events to the event gateway. If the parser falls behind,
+chunks are dropped from capture (never from forwarding) and it resyncs at the
+next frame boundary.
+
+Usage:
+    python mcp_bridge/server_draft.py                       # wraps mcp_server/server.py
+    python mcp_bridge/server_draft.py -- python other_server.py --flag
+
+MCP_PROXY_CHUNK=65536            max bytes per read/write
+MCP_PROXY_CAPTURE_QUEUE=1024     chunks buffered for the parser before capture drops
+MCP_PROXY_MAX_FRAME=16777216     longer frames are skipped by the parser
 """
 import asyncio
-import json
-import sys
 import os
-import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from typing import List, Optional
-from contextlib import asynccontextmanager
+import queue
+import re
 import subprocess
+import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
 from uuid import uuid4
 
-# Add backend directory to path to import event_broadcaster logic
+# Events go through the shared gateway publisher in backend/event_broadcaster.py
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from event_broadcaster import SECRET_METADATA_KEYS, enqueue_event, flush_events, init_event_queue, publish_to_gateway
+from serialization import dumps_text, loads
 
-# Define event structure locally to avoid dependency issues if backend isn't in path
-def create_event(source, event_type, data, hop="unknown", transport="stdio"):
-    return {
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_COMMAND = [sys.executable, os.path.join(ROOT, "mcp_server", "server.py")]
+
+CHUNK = int(os.getenv("MCP_PROXY_CHUNK", "65536"))
+CAPTURE_QUEUE = int(os.getenv("MCP_PROXY_CAPTURE_QUEUE", "1024"))
+MAX_FRAME = int(os.getenv("MCP_PROXY_MAX_FRAME", str(16 * 1024 * 1024)))
+
+# Upper bound on how long to wait for the gateway to take the last events on exit
+FLUSH_TIMEOUT = 0.5
+
+TO_SERVER = "client→mcp"
+TO_CLIENT = "mcp→client"
+
+# Response ids are read without a full parse; the MCP SDK writes jsonrpc then id first
+_RESPONSE_ID = re.compile(rb'^\s*\{\s*"jsonrpc"\s*:\s*"2\.0"\s*,\s*"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+
+def create_event(event_type: str, data: Dict[str, Any], hop: str, latency_ms: Optional[int] = None) -> Dict[str, Any]:
+    event = {
         "id": str(uuid4()),
         "timestamp": datetime.now().isoformat(),
-        "source": source,
+        "source": "MCP",
         "type": event_type,
         "hop": hop,
-        "direction": "in" if "request" in event_type or "call" in event_type else "out",
-        "transport": transport,
-        "data": data
+        "direction": "in" if "call" in event_type else "out",
+        "transport": "stdio",
+        "data": data,
     }
+    if latency_ms is not None:
+        event["latency_ms"] = latency_ms
+    return event
+
+def write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+class ForwardingStats:
+    """Time spent forwarding each chunk (read returned -> write done), per direction."""
+
+    def __init__(self, samples: int = 10_000):
+        self.samples: Dict[str, Deque[int]] = {TO_SERVER: deque(maxlen=samples), TO_CLIENT: deque(maxlen=samples)}
+        self.bytes = {TO_SERVER: 0, TO_CLIENT: 0}
+        self.chunks = {TO_SERVER: 0, TO_CLIENT: 0}
+
+    def record(self, direction: str, elapsed_ns: int, size: int):
+        # deque.append and int updates are atomic under the GIL; readers take a snapshot
+        self.samples[direction].append(elapsed_ns)
+        self.bytes[direction] += size
+        self.chunks[direction] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        report = {}
+        for direction, samples in self.samples.items():
+            ordered = sorted(samples)
+            pct = lambda p: round(ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)] / 1000, 1) if ordered else 0.0
+            report[direction] = {
+                "chunks": self.chunks[direction],
+                "bytes": self.bytes[direction],
+                "overhead_us": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": pct(100)},
+            }
+        return report
+
+class Capture:
+    """Bounded hand-off from the forwarding threads to the parser; never blocks."""
+
+    def __init__(self, maxsize: int = CAPTURE_QUEUE):
+        self.queue: "queue.Queue" = queue.Queue(maxsize)
+        self.gap = {TO_SERVER: False, TO_CLIENT: False}
+        self.dropped = 0
+
+    def offer(self, direction: str, chunk: bytes):
+        try:
+            self.queue.put_nowait((direction, chunk, self.gap[direction]))
+            self.gap[direction] = False
+        except queue.Full:
+            self.gap[direction] = True
+            self.dropped += 1
+
+    def close(self):
+        try:
+            self.queue.put((None, b"", False), timeout=1.0)
+        except queue.Full:
+            pass  # parser is stuck; it is a daemon thread
+
+class FrameSplitter:
+    """Incremental newline-delimited JSON-RPC framing over arbitrary chunks."""
 
-# Global state
-mcp_process: Optional[asyncio.subprocess.Process] = None
-active_connections: List[WebSocket] = []
-event_queue: asyncio.Queue = asyncio.Queue()
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup: Launch MCP server
-    global mcp_process
-    print("[Bridge] Starting MCP Server...")
-    
-    # Command to run the MCP server
-    cmd = [sys.executable, "mcp_server/server.py"]
-    
-    # Create subprocess with pipes for stdin/stdout/stderr
-    mcp_process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    
-    # Start background tasks to read stdout/stderr
-    asyncio.create_task(read_stdout())
-    asyncio.create_task(read_stderr())
-    asyncio.create_task(broadcast_events())
-    
-    print(f"[Bridge] MCP Server started with PID {mcp_process.pid}")
-    
-    yield
-    
-    # Shutdown: Kill MCP server
-    if mcp_process:
-        print("[Bridge] Stopping MCP Server...")
+    def __init__(self, max_frame: int = MAX_FRAME):
+        self.max_frame = max_frame
+        self.buffer = bytearray()
+        self.skipping = False
+        self.oversize = 0
+
+    def resync(self):
+        """Data was lost: discard the partial frame and everything up to the next newline."""
+        self.buffer.clear()
+        self.skipping = True
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not self.skipping:
+                    if len(self.buffer) + len(chunk) - start > self.max_frame:
+                        self.buffer.clear()
+                        self.skipping = True
+                        self.oversize += 1
+                    else:
+                        self.buffer += chunk[start:]
+                return
+            if self.skipping:
+                self.skipping = False
+            elif self.buffer:
+                self.buffer += chunk[start:end]
+                yield bytes(self.buffer)
+                self.buffer.clear()
+            elif end > start:
+                yield chunk[start:end]
+            start = end + 1
+
+def redact_arguments(arguments: Any, max_text: int = 200) -> Any:
+    if not isinstance(arguments, dict):
+        return arguments
+    redacted = {}
+    for key, value in arguments.items():
+        if key in SECRET_METADATA_KEYS:
+            redacted["has_" + key] = bool(value)
+        elif isinstance(value, str) and len(value) > max_text:
+            redacted[key] = value[:max_text] + "..."
+        else:
+            redacted[key] = value
+    return redacted
+
+class TrafficInspector:
+    """Turns JSON-RPC frames into tool call/result events, matching results to calls by id."""
+
+    def __init__(self, emit: Callable[[Dict[str, Any]], None], stats: ForwardingStats, max_pending: int = 1000):
+        self.emit = emit
+        self.stats = stats
+        self.max_pending = max_pending
+        self.pending: Dict[Any, tuple] = {}  # request id -> (started, tool)
+        self.malformed = 0
+
+    def inspect(self, direction: str, frame: bytes):
+        if direction == TO_SERVER:
+            # Cheap prefilter: only tool calls are decoded
+            if b'"tools/call"' in frame:
+                self._tool_call(frame)
+        elif self.pending:
+            match = _RESPONSE_ID.match(frame)
+            # Other key orders fall back to a full parse
+            if match is None or loads(match.group(1)) in self.pending:
+                self._tool_result(frame)
+
+    def _tool_call(self, frame: bytes):
         try:
-            mcp_process.terminate()
-            await mcp_process.wait()
-        except:
-            pass
-        print("[Bridge] MCP Server stopped")
-
-app = FastAPI(lifespan=lifespan)
-
-async def read_stdout():
-    """Read stdout from MCP server (JSON-RPC messages)."""
-    if not mcp_process or not mcp_process.stdout:
-        return
-        
-    while True:
-        line = await mcp_process.stdout.readline()
-        if not line:
-            break
-            
-        line_str = line.decode().strip()
-        if not line_str:
-            continue
-            
+            message = loads(frame)
+        except ValueError:
+            self.malformed += 1
+            return
+        if message.get("method") != "tools/call" or "id" not in message:
+            return
+        params = message.get("params") or {}
+        if len(self.pending) >= self.max_pending:
+            self.pending.pop(next(iter(self.pending)))  # a call that never got an answer
+        self.pending[message["id"]] = (time.perf_counter(), params.get("name"))
+        self.emit(create_event("mcp_tool_call", {
+            "id": message["id"],
+            "tool": params.get("name"),
+            "arguments": redact_arguments(params.get("arguments")),
+            "captured_by": "proxy",
+        }, hop=TO_SERVER))
+
+    def _tool_result(self, frame: bytes):
         try:
-            # Try to parse as JSON-RPC
-            message = json.loads(line_str)
-            
-            # Analyze message type
-            event = None
-            
-            # Tool Call (Request)
-            if "method" in message and message["method"] == "tools/call":
-                params = message.get("params", {})
-                tool_name = params.get("name")
-                args = params.get("arguments", {})
-                
-                event = create_event(
-                    source="MCP",
-                    event_type="mcp_tool_call",
-                    hop="client→mcp",
-                    data={
-                        "tool": tool_name,
-                        "arguments": args,
-                        "id": message.get("id")
-                    }
-                )
-            
-            # Tool Result (Response)
-            elif "result" in message and "content" in message["result"]:
-                # This is a response to the client
-                content = message["result"]["content"]
-                text_content = ""
-                for item in content:
-                    if item.get("type") == "text":
-                        text_content += item.get("text", "")
-                
-                event = create_event(
-                    source="MCP",
-                    event_type="mcp_tool_result",
-                    hop="mcp→client",
-                    data={
-                        "content_length": len(text_content),
-                        "preview": text_content[:100] + "..." if len(text_content) > 100 else text_content,
-                        "id": message.get("id")
-                    }
-                )
-            
-            if event:
-                await event_queue.put(event)
-                
-            # Forward to stdout for the actual client to see
-            # We print to our own stdout so the client connected to the bridge sees it
-            # But wait, the bridge is an HTTP server, not a CLI tool.
-            # The client connects to the bridge via stdio? No.
-            # The bridge REPLACES the MCP server in the client config?
-            # OR the bridge is just for monitoring?
-            
-            # For this architecture:
-            # Client -> Bridge (stdio) -> MCP Server (stdio)
-            # But implementing a full stdio proxy in Python with FastAPI is tricky.
-            
-            # ALTERNATIVE: The Bridge IS the MCP server wrapper.
-            # The user runs the bridge INSTEAD of the MCP server.
-            # So we need to forward stdin too.
-            
-            # For now, let's just print to stdout so if run from CLI it works
-            print(line_str)
-            sys.stdout.flush()
-            
-        except json.JSONDecodeError:
-            # Not JSON, just log
-            pass
-
-async def read_stderr():
-    """Read stderr from MCP server (Logs)."""
-    if not mcp_process or not mcp_process.stderr:
-        return
-        
-    while True:
-        line = await mcp_process.stderr.readline()
-        if not line:
-            break
-            
-        line_str = line.decode().strip()
-        if not line_str:
-            continue
-            
-        # Forward to stderr
-        print(line_str, file=sys.stderr)
-        
-        # Also capture interesting logs as events
-        if "[MCP]" in line_str:
-            # This is a log from our MCP server
-            pass
-
-async def broadcast_events():
-    """Broadcast events to WebSocket clients."""
-    while True:
-        event = await event_queue.get()
-        disconnected = []
-        for connection in active_connections:
+            message = loads(frame)
+        except ValueError:
+            self.malformed += 1
+            return
+        if not isinstance(message, dict):
+            return
+        started, tool = self.pending.pop(message.get("id"), (None, None))
+        if started is None:
+            return
+        result = message.get("result") or {}
+        texts = [c.get("text", "") for c in result.get("content") or () if c.get("type") == "text"]
+        content_length = sum(len(t) for t in texts)
+        preview = texts[0][:100] if texts else ""
+        self.emit(create_event("mcp_tool_result", {
+            "id": message["id"],
+            "tool": tool,
+            "is_error": bool(result.get("isError")) or "error" in message,
+            "content_length": content_length,
+            "preview": preview,
+            "frame_bytes": len(frame),
+            "proxy": self.stats.summary(),
+            "captured_by": "proxy",
+        }, hop=TO_CLIENT, latency_ms=int((time.perf_counter() - started) * 1000)))
+
+class StdioProxy:
+    """Forwards stdio between this process and a child MCP server, capturing traffic."""
+
+    def __init__(self, command: List[str], emit: Callable[[Dict[str, Any]], None], chunk: int = CHUNK):
+        self.command = command
+        self.chunk = chunk
+        self.stats = ForwardingStats()
+        self.capture = Capture()
+        self.inspector = TrafficInspector(emit, self.stats)
+        self.splitters = {TO_SERVER: FrameSplitter(), TO_CLIENT: FrameSplitter()}
+
+    def _forward(self, src: int, dst: int, direction: str, on_eof: Callable[[], None]):
+        read, write, now = os.read, write_all, time.perf_counter_ns
+        record, offer = self.stats.record, self.capture.offer
+        try:
+            while True:
+                data = read(src, self.chunk)
+                if not data:
+                    break
+                started = now()
+                write(dst, data)
+                record(direction, now() - started, len(data))
+                offer(direction, data)
+        except OSError:
+            pass  # the other side went away
+        finally:
+            on_eof()
+
+    def _parse(self):
+        while True:
+            direction, chunk, gap = self.capture.queue.get()
+            if direction is None:
+                return
+            splitter = self.splitters[direction]
+            if gap:
+                splitter.resync()
+            for frame in splitter.feed(chunk):
+                try:
+                    self.inspector.inspect(direction, frame)
+                except Exception as e:
+                    print(f"[Bridge] Capture error: {e}", file=sys.stderr)
+
+    def run(self) -> int:
+        """Blocks until the server exits; returns its exit code."""
+        child = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        print(f"[Bridge] MCP server started with PID {child.pid}: {' '.join(self.command)}", file=sys.stderr)
+
+        def close_child_stdin():
             try:
-                await connection.send_json(event)
-            except:
-                disconnected.append(connection)
-        
-        for conn in disconnected:
-            if conn in active_connections:
-                active_connections.remove(conn)
-
-@app.websocket("/events")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    active_connections.append(websocket)
-    print(f"[Bridge] Client connected. Total: {len(active_connections)}", file=sys.stderr)
+                child.stdin.close()
+            except OSError:
+                pass
+
+        # Our stdin may stay open after the server exits, so that thread is a daemon
+        upstream = threading.Thread(
+            target=self._forward, args=(sys.stdin.fileno(), child.stdin.fileno(), TO_SERVER, close_child_stdin),
+            name="bridge-to-server", daemon=True)
+        downstream = threading.Thread(
+            target=self._forward, args=(child.stdout.fileno(), sys.stdout.fileno(), TO_CLIENT, lambda: None),
+            name="bridge-to-client")
+        parser = threading.Thread(target=self._parse, name="bridge-capture", daemon=True)
+        for thread in (parser, upstream, downstream):
+            thread.start()
+
+        try:
+            code = child.wait()
+        except KeyboardInterrupt:
+            child.terminate()
+            code = child.wait()
+        downstream.join()
+        self.capture.close()
+        parser.join(timeout=1.0)
+
+        summary = self.stats.summary()
+        print(f"[Bridge] MCP server exited ({code}). Forwarding overhead: "
+              f"{dumps_text(summary)}; capture drops {self.capture.dropped}, "
+              f"oversize frames {sum(s.oversize for s in self.splitters.values())}", file=sys.stderr)
+        return code
+
+async def main(command: List[str]) -> int:
+    init_event_queue()
+    loop = asyncio.get_running_loop()
+    publisher = asyncio.create_task(publish_to_gateway("MCP"))
+    # Events are rare (one per tool call/result), so a thread-safe hand-off per event is fine
+    proxy = StdioProxy(command, lambda event: loop.call_soon_threadsafe(enqueue_event, event))
     try:
-        while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        active_connections.remove(websocket)
-        print(f"[Bridge] Client disconnected", file=sys.stderr)
+        return await loop.run_in_executor(None, proxy.run)
+    finally:
+        await flush_events(FLUSH_TIMEOUT)
+        publisher.cancel()
 
 if __name__ == "__main__":
-    print("Starting MCP Bridge on port 9000...", file=sys.stderr)
-    # We use fd 0 (stdin) and 1 (stdout) for MCP communication if run as a tool
-    # But uvicorn hijacks stdout/stdin.
-    # This is a problem. The Bridge cannot be both a stdio pass-through AND a uvicorn server easily.
-    
-    # SOLUTION: Run uvicorn on a separate thread/process, or use a different approach.
-    # Or, since this is for DEMO purposes, we can just have the Client connect to the Bridge via HTTP/WebSocket?
-    # No, the Client (demo_client.py) uses `stdio_client`.
-    
-    # Let's stick to the plan: The Bridge is a standalone server that runs the MCP server.
-    # But for the demo client to work, it needs to talk to the Bridge via stdio.
-    
-    # Actually, for the visualization, we can just modify `mcp_server/server.py` to broadcast events directly!
-    # That's much simpler than a proxy.
-    # We just need to add WebSocket support to the MCP server itself.
-    pass
+    args = sys.argv[1:]
+    command = args[args.index("--") + 1:] if "--" in args else DEFAULT_COMMAND
+    sys.exit(asyncio.run(main(command)))
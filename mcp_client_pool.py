@@ -0,0 +1,146 @@
+"""
+Reusable MCP client with a pool of warm sessions.
+Each session is one `mcp_server/server.py` subprocess that has already been
+initialized; `list_tools` is fetched once and cached. Many topics can be
+submitted concurrently over the pool, bounded by a concurrency limit.
+
+CLI: python mcp_client_pool.py topics.txt [--sessions 2] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.types import CallToolResult, Tool
+
+DEFAULT_SERVER_PARAMS = StdioServerParameters(
+    command=sys.executable,
+    args=["mcp_server/server.py"],
+    env=None
+)
+
+def result_text(result: CallToolResult) -> str:
+    """Join the text content of a tool result."""
+    return "\n".join(content.text for content in result.content if content.type == 'text')
+
+class MCPSessionPool:
+    """Keeps `size` initialized MCP sessions open and spreads tool calls across them."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        concurrency: int = 4,
+        server_params: StdioServerParameters = DEFAULT_SERVER_PARAMS,
+    ):
+        self.size = size
+        self.server_params = server_params
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._sessions: List[ClientSession] = []
+        self._next_session = None
+        self._tools: Optional[List[Tool]] = None
+        self._stack: Optional[AsyncExitStack] = None
+
+    async def __aenter__(self) -> "MCPSessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Spawn and initialize every session up front."""
+        self._stack = AsyncExitStack()
+        await self._stack.__aenter__()
+        try:
+            for _ in range(self.size):
+                read, write = await self._stack.enter_async_context(stdio_client(self.server_params))
+                session = await self._stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                self._sessions.append(session)
+        except BaseException:
+            await self.close()
+            raise
+        self._next_session = itertools.cycle(self._sessions)
+        print(f"[Pool] {len(self._sessions)} MCP session(s) ready", file=sys.stderr)
+
+    async def close(self):
+        if self._stack is not None:
+            stack, self._stack = self._stack, None
+            await stack.aclose()
+        self._sessions.clear()
+
+    async def list_tools(self, refresh: bool = False) -> List[Tool]:
+        """Tools exposed by the server, fetched once per pool."""
+        if self._tools is None or refresh:
+            self._tools = (await self._sessions[0].list_tools()).tools
+        return self._tools
+
+    async def call_tool(self, name: str, arguments: dict) -> CallToolResult:
+        """Call a tool on the next session, waiting for a concurrency slot."""
+        async with self._semaphore:
+            session = next(self._next_session)
+            return await session.call_tool(name, arguments=arguments)
+
+    async def research(self, topic: str, api_key: str = None, priority: str = "interactive") -> str:
+        """Run one topic through the agent network and return the report text."""
+        args = {"task": topic, "priority": priority}
+        if api_key:
+            args["api_key"] = api_key
+        return result_text(await self.call_tool("call_agent", args))
+
+    async def research_many(
+        self, topics: List[str], api_key: str = None, priority: str = "batch",
+    ) -> List[dict]:
+        """Submit all topics concurrently as batch work; results come back in input order."""
+        async def run_one(topic: str) -> dict:
+            start = time.perf_counter()
+            try:
+                report = await self.research(topic, api_key, priority)
+                error = None
+            except Exception as e:
+                report, error = "", str(e)
+            return {
+                "topic": topic,
+                "report": report,
+                "error": error,
+                "latency_ms": int((time.perf_counter() - start) * 1000),
+            }
+
+        return await asyncio.gather(*(run_one(topic) for topic in topics))
+
+async def run(args: argparse.Namespace):
+    with open(args.topics_file, encoding="utf-8") as f:
+        topics = [line.strip() for line in f if line.strip()]
+    if not topics:
+        print("No topics found. Exiting.")
+        return
+
+    print(f"[Pool] Submitting {len(topics)} topics "
+          f"({args.sessions} sessions, concurrency {args.concurrency})", file=sys.stderr)
+    async with MCPSessionPool(size=args.sessions, concurrency=args.concurrency) as pool:
+        tools = await pool.list_tools()
+        print(f"[Pool] Tools: {[tool.name for tool in tools]}", file=sys.stderr)
+        results = await pool.research_many(topics, api_key=args.api_key)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.out:
+            out.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many topics over a pool of warm MCP sessions.")
+    parser.add_argument("topics_file", help="File with one topic per line")
+    parser.add_argument("--sessions", type=int, default=2, help="Number of warm MCP sessions")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max in-flight tool calls")
+    parser.add_argument("--api-key", default=None, help="Optional OpenAI API key forwarded to the agents")
+    parser.add_argument("--out", default=None, help="Write JSON lines here instead of stdout")
+    asyncio.run(run(parser.parse_args()))
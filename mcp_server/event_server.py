@@ -1,80 +1,249 @@
 """
-WebSocket Event Server for MCP
-Runs in a separate thread to serve visualization events.
+Event Gateway
+Single fan-out point for visualization events.
+Publishers (agents, MCP server) stream newline-delimited JSON over one
+persistent loopback TCP connection each (port 9001); each line is one event or
+a batch (JSON array) of events. Viewers subscribe once at
+ws://localhost:9000/events and receive every event in global (seq) order,
+batches arriving as a single array frame. Large reports are not in events;
+viewers fetch them from GET /artifacts/{sha256}.
+
+Each event is encoded once, when it is stamped; the bytes are kept for
+replay and frames are sent pre-encoded to every viewer (binary WebSocket
+frames, or text frames with EVENT_WS_TEXT=1).
+
+A new viewer gets the status frame, then one snapshot frame with the buffered
+events (only those after `?since=<seq>` when reconnecting), then live frames.
+The snapshot is taken and the viewer registered without yielding to the event
+loop, so every seq after the snapshot reaches it exactly once. Each viewer has
+its own bounded send queue; one that falls EVENT_VIEWER_QUEUE frames behind is
+disconnected (close code 1013) and should reconnect with `since`.
+
+On shutdown (backend/lifecycle.py) ingest stops first, each viewer is sent
+what is queued for it, and then closed with code 1012 (service restart).
 """
 import asyncio
-import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any
+import os
+import socket
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse
+from typing import List, Dict, Any, Optional, Tuple, Union
 from collections import deque
 import sys
-import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from artifact_store import ArtifactStore
+from lifecycle import Lifecycle, serve
+from serialization import dumps, join_array, loads
+
+INGEST_HOST = os.getenv("EVENT_GATEWAY_HOST", "127.0.0.1")
+INGEST_PORT = int(os.getenv("EVENT_GATEWAY_PORT", "9001"))
+VIEWER_PORT = int(os.getenv("EVENT_GATEWAY_VIEWER_PORT", "9000"))
+INGEST_LINE_LIMIT = 16 * 1024 * 1024  # Batched frames can carry full reports
+WS_TEXT_FRAMES = os.getenv("EVENT_WS_TEXT", "0") == "1"
+VIEWER_QUEUE_FRAMES = int(os.getenv("EVENT_VIEWER_QUEUE", "1000"))
+
+class Viewer:
+    """One viewer connection: a bounded queue of wire frames drained by its own sender task."""
+
+    def __init__(self, websocket: Any):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(VIEWER_QUEUE_FRAMES)
+        self.sender: Optional[asyncio.Task] = None
+
+    def offer(self, frame: Union[bytes, str]) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def send_loop(self):
+        send = self.websocket.send_text if WS_TEXT_FRAMES else self.websocket.send_bytes
+        try:
+            while True:
+                await send(await self.queue.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # connection gone; the endpoint's receive loop unregisters it
 
 # Global state
-active_connections: List[WebSocket] = []
-event_queue: deque = deque(maxlen=100)  # Keep last 100 events
-loop: asyncio.AbstractEventLoop = None
+active_connections: List[Viewer] = []
+event_queue: deque = deque(maxlen=100)  # (seq, encoded event) for the last 100 events
+publishers: Dict[str, int] = {}  # source -> open publisher connections
+seq = 0
+_snapshot: Tuple[int, Optional[bytes]] = (-1, None)  # full snapshot, rebuilt when seq moves
+
+# Ingest runs in the app's lifespan; on shutdown viewers get their queued frames before the close
+lifecycle = Lifecycle("GATEWAY")
+
+app = FastAPI(lifespan=lifecycle.lifespan)
+artifacts = ArtifactStore.from_env()
+
+def gateway_status() -> Dict[str, Any]:
+    """Control frame telling viewers which publishers are connected."""
+    return {"type": "gateway_status", "publishers": sorted(publishers)}
+
+def _wire(data: bytes) -> Union[bytes, str]:
+    """Frame as handed to the WebSocket: bytes, or text decoded once for all viewers."""
+    return data.decode("utf-8") if WS_TEXT_FRAMES else data
+
+def snapshot(since: Optional[int] = None) -> Optional[bytes]:
+    """One array frame with the buffered events after `since` (all of them if None)."""
+    global _snapshot
+    if since is None:
+        # Reconnect storms share one encoded snapshot per seq
+        if _snapshot[0] != seq:
+            _snapshot = (seq, join_array([encoded for _, encoded in event_queue]) if event_queue else None)
+        return _snapshot[1]
+    encoded = [e for s, e in event_queue if s > since]
+    return join_array(encoded) if encoded else None
+
+def register_viewer(websocket: Any, since: Optional[int] = None) -> Viewer:
+    """
+    Queue status and snapshot for a new viewer and add it to the live fan-out.
 
-app = FastAPI()
+    Must not await: the snapshot and the registration happen in the same
+    event loop step, so no frame can fall between them or land in both.
+    """
+    viewer = Viewer(websocket)
+    viewer.offer(_wire(dumps(gateway_status())))
+    frame = snapshot(since)
+    if frame is not None:
+        viewer.offer(_wire(frame))
+    active_connections.append(viewer)
+    viewer.sender = asyncio.create_task(viewer.send_loop())
+    return viewer
+
+def unregister_viewer(viewer: Viewer):
+    if viewer in active_connections:
+        active_connections.remove(viewer)
+    if viewer.sender is not None:
+        viewer.sender.cancel()
 
 @app.websocket("/events")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    active_connections.append(websocket)
-    
-    # Replay recent events to new connection
-    print(f"[WebSocket] New connection. Replaying {len(event_queue)} recent events...", file=sys.stderr)
-    for event in event_queue:
-        try:
-            await websocket.send_json(event)
-        except Exception as e:
-            print(f"[WebSocket] Error replaying event: {e}", file=sys.stderr)
-    
+    since = websocket.query_params.get("since")
+    viewer = register_viewer(websocket, int(since) if since and since.lstrip("-").isdigit() else None)
+    print(f"[Gateway] New viewer (since={since}). {len(active_connections)} connected.", file=sys.stderr)
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
-        print(f"[WebSocket] Connection closed. {len(active_connections)} remaining.", file=sys.stderr)
-
-async def _broadcast(event: Dict[str, Any]):
-    """Internal broadcast coroutine."""
-    # Add to queue for replay
-    event_queue.append(event)
-    
-    disconnected = []
-    for connection in active_connections:
-        try:
-            await connection.send_json(event)
-        except:
-            disconnected.append(connection)
-    
-    for conn in disconnected:
-        if conn in active_connections:
-            active_connections.remove(conn)
-
-@app.on_event("startup")
-async def startup_event():
-    global loop
+        pass
+    finally:
+        unregister_viewer(viewer)
+        print(f"[Gateway] Viewer closed. {len(active_connections)} remaining.", file=sys.stderr)
+
+@app.get("/artifacts/{sha256}")
+async def get_artifact(sha256: str):
+    """Serve a report referenced by an event, streamed from the artifact store."""
+    try:
+        path = artifacts.path(sha256)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid artifact id")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="artifact not found")
+    return FileResponse(path, media_type="text/markdown; charset=utf-8",
+                        headers={"Access-Control-Allow-Origin": "*", "Cache-Control": "public, max-age=31536000, immutable"})
+
+def _fan_out(data: bytes):
+    """Queue one pre-encoded frame for every viewer; viewers that are too far behind are dropped."""
+    frame = _wire(data)
+    for viewer in list(active_connections):
+        if not viewer.offer(frame):
+            print(f"[Gateway] Viewer {VIEWER_QUEUE_FRAMES} frames behind; disconnecting", file=sys.stderr)
+            unregister_viewer(viewer)
+            asyncio.create_task(_close_quietly(viewer.websocket, 1013))
+
+async def _close_quietly(websocket: Any, code: int):
+    try:
+        await websocket.close(code=code)
+    except Exception:
+        pass
+
+async def _broadcast(frame: Union[Dict[str, Any], List[Dict[str, Any]]]):
+    """Stamp each event with the next global sequence number and fan the frame out."""
+    global seq
+    batched = isinstance(frame, list)
+    encoded = []
+    for event in (frame if batched else [frame]):
+        seq += 1
+        event["seq"] = seq
+        encoded.append(dumps(event))
+        # Keep the encoded event for replay
+        event_queue.append((seq, encoded[-1]))
+    _fan_out(join_array(encoded) if batched else encoded[0])
+
+async def handle_publisher(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Ingest events from one publisher connection.
+
+    The first line is a hello frame (``{"publisher": "RESEARCHER"}``); every
+    following line is one event or a JSON array of events.
+    """
+    source = "unknown"
+    try:
+        hello = await reader.readline()
+        if not hello:
+            return
+        source = loads(hello).get("publisher", "unknown")
+        publishers[source] = publishers.get(source, 0) + 1
+        print(f"[Gateway] Publisher connected: {source}", file=sys.stderr)
+        _fan_out(dumps(gateway_status()))
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                frame = loads(line)
+            except ValueError:
+                print(f"[Gateway] Dropping malformed frame from {source}", file=sys.stderr)
+                continue
+            await _broadcast(frame)
+            # readline() does not yield while lines are buffered; let viewer senders drain
+            await asyncio.sleep(0)
+    except (ConnectionError, ValueError) as e:
+        print(f"[Gateway] Publisher {source} error: {e}", file=sys.stderr)
+    finally:
+        writer.close()
+        if source in publishers:
+            publishers[source] -= 1
+            if publishers[source] <= 0:
+                del publishers[source]
+            print(f"[Gateway] Publisher disconnected: {source}", file=sys.stderr)
+            _fan_out(dumps(gateway_status()))
+
+async def ingest():
+    """Accept publisher connections until the drain starts (a successor may share the port)."""
+    server = await asyncio.start_server(
+        handle_publisher, INGEST_HOST, INGEST_PORT, limit=INGEST_LINE_LIMIT, reuse_port=hasattr(socket, "SO_REUSEPORT")
+    )
+    print(f"[Gateway] Ingest listening on {INGEST_HOST}:{INGEST_PORT}", file=sys.stderr)
+    print(f"[Gateway] Viewers at ws://localhost:{VIEWER_PORT}/events", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+async def close_viewers():
+    """Send every viewer what is queued for it, then close with 1012 (service restart)."""
     loop = asyncio.get_running_loop()
-    print("[WebSocket] Event server started on port 9000", file=sys.stderr)
+    deadline = loop.time() + lifecycle.flush_timeout_s
+    while any(not viewer.queue.empty() for viewer in active_connections) and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    viewers = list(active_connections)
+    for viewer in viewers:
+        unregister_viewer(viewer)
+    await asyncio.gather(*(_close_quietly(viewer.websocket, 1012) for viewer in viewers))
 
-def broadcast_event_safe(event: Dict[str, Any]):
-    """Thread-safe method to broadcast an event."""
-    if loop and loop.is_running():
-        asyncio.run_coroutine_threadsafe(_broadcast(event), loop)
-    else:
-        # If loop not ready, still add to queue so it can be replayed
-        event_queue.append(event)
-        print(f"[WebSocket] Event queued (loop not ready): {event.get('type')}", file=sys.stderr)
+lifecycle.background(ingest, until_drain=True)
+lifecycle.on_drain(close_viewers)
 
 def run_event_server():
-    """Entry point to run the server."""
-    uvicorn.run(app, host="0.0.0.0", port=9000, log_level="error")
-
-def start_background_server():
-    """Start the server in a background thread."""
-    t = threading.Thread(target=run_event_server, daemon=True)
-    t.start()
-    print("[WebSocket] Background server thread started", file=sys.stderr)
-    return t
+    """Entry point to run the gateway."""
+    serve(app, VIEWER_PORT, lifecycle, log_level="error")
+
+if __name__ == "__main__":
+    run_event_server()
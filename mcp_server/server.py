@@ -1,26 +1,92 @@
 import asyncio
+import os
 import sys
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
 from mcp.server.fastmcp import FastMCP
-from a2a.client import A2AClient, A2ACardResolver
-from a2a.types import MessageSendParams, SendMessageRequest
 from uuid import uuid4
-import httpx
 from datetime import datetime
 
-# Import event server
-from event_server import start_background_server, broadcast_event_safe
+# Fast start: the a2a client, its pydantic types and httpx are imported on the
+# first tool call, not at startup, so `initialize`/`list_tools` answer quickly.
+# bench_mcp_startup.py tracks the import cost and time-to-list_tools budget.
+
+# Events go through the shared gateway publisher in backend/event_broadcaster.py
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from event_broadcaster import (
+    API_KEY_METADATA,
+    init_event_queue,
+    enqueue_event,
+    publish_to_gateway,
+    wait_for_gateway,
+    flush_events,
+    demo_pause,
+)
+from a2a_access import first_text, response_result, result_message
+from artifact_store import ArtifactRef, ArtifactStore, find_ref
+from circuit_breaker import (
+    DRAFT_ROUTE_MODELS,
+    RESEARCH_ROUTE_MODELS,
+    Breakers,
+    CircuitBreaker,
+    CircuitOpen,
+    HopUnavailable,
+    default_timeout_s,
+)
+from idempotency import IdempotentCalls
+from registry_client import RoutingTable
+from tenants import tenant_id
+
+# Events emitted before the loop starts are held here and flushed on connect
+init_event_queue()
+
+# Upper bound on how long to wait for the gateway (tool-call readiness, exit flush)
+GATEWAY_READY_TIMEOUT = 0.5
+
+# Gateway publisher task, started on demand by the first tool call
+publisher: Optional[asyncio.Task] = None
+
+def ensure_publisher():
+    """
+    Start the gateway publisher as a task inside the FastMCP event loop.
+
+    emit_event hands events over with a plain put_nowait on the same loop,
+    so there is no cross-thread scheduling per event.
+    """
+    global publisher
+    if publisher is None or publisher.done():
+        publisher = asyncio.create_task(publish_to_gateway("MCP"))
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    try:
+        yield
+    finally:
+        if publisher is not None:
+            # Deliver the final tool result event before the session exits
+            await flush_events(GATEWAY_READY_TIMEOUT)
+            publisher.cancel()
 
 # Initialize FastMCP server
-mcp = FastMCP("AgentGateway")
+mcp = FastMCP("AgentGateway", lifespan=lifespan)
 
-# Start WebSocket server
-start_background_server()
+# Researcher endpoints by skill, from the agent registry (A2A_AGENT_URLS without one)
+RESEARCH_SKILL = "research_topic"
+routes = RoutingTable.from_env("http://localhost:8001")
 
-# A2A Server URL - Researcher Agent
-A2A_SERVER_URL = "http://localhost:8001"
+# Per-endpoint circuit breakers; the timeout covers the whole Researcher→Writer
+# pipeline: the Researcher's research step, then its hop to the Writer
+breakers = Breakers.from_env(timeout_s=float(os.getenv(
+    "MCP_CALL_TIMEOUT_S", default_timeout_s(RESEARCH_ROUTE_MODELS, DRAFT_ROUTE_MODELS))))
+
+# Shared with the agents; large reports are resolved from here
+artifacts = ArtifactStore.from_env()
+
+# Retries of call_agent join the running call or get its stored result
+idempotent_calls = IdempotentCalls.from_env()
 
 def emit_event(event_type: str, data: dict, hop: str = "unknown", transport: str = "stdio"):
-    """Emit a structured event to the WebSocket server."""
+    """Emit a structured event to the event gateway."""
     event = {
         "id": str(uuid4()),
         "timestamp": datetime.now().isoformat(),
@@ -31,129 +97,56 @@ def emit_event(event_type: str, data: dict, hop: str = "unknown", transport: str
         "transport": transport,
         "data": data
     }
-    broadcast_event_safe(event)
+    enqueue_event(event)
 
 @mcp.tool()
-async def call_agent(task: str, api_key: str = None) -> str:
+async def call_agent(
+    task: str,
+    api_key: str = None,
+    priority: str = "interactive",
+    idempotency_key: str = None,
+) -> str:
     """
     Delegates a complex task to the backend agent network via A2A Protocol.
     
     Args:
         task: A natural language description of the task (e.g., "Research vector databases").
         api_key: Optional OpenAI API key to use for this request.
+        priority: "interactive" (default) or "batch"; batch work yields to interactive work.
+        idempotency_key: Optional key for safe retries. A retry with the same key joins the
+            running call or gets its result. Without a key, the same task from the same
+            caller within a few minutes is treated as a retry.
     """
     print(f"[MCP] Received tool call: call_agent with task='{task}'", file=sys.stderr)
     
-    # Small delay to ensure WebSocket connections are established
-    await asyncio.sleep(0.5)
+    # Returns immediately once the publisher is connected to the gateway
+    ensure_publisher()
+    await wait_for_gateway(GATEWAY_READY_TIMEOUT)
     
     # Emit tool call event
     emit_event(
         "mcp_tool_call", 
-        {"tool": "call_agent", "arguments": {"task": task, "has_api_key": bool(api_key)}},
+        {"tool": "call_agent", "arguments": {
+            "task": task,
+            "has_api_key": bool(api_key),
+            "priority": priority,
+            "has_idempotency_key": bool(idempotency_key)
+        }},
         hop="client→mcp",
         transport="stdio"
     )
     
     # Artificial delay to allow the visualization to show the "Client -> MCP" step
-    await asyncio.sleep(3.0)
+    await demo_pause(3.0)
     
+    keys = idempotent_calls.keys(tenant_id({}, api_key), idempotency_key, task)
     try:
-        async with httpx.AsyncClient(timeout=120.0) as httpx_client:
-            # Fetch the agent card
-            resolver = A2ACardResolver(
-                httpx_client=httpx_client,
-                base_url=A2A_SERVER_URL,
-            )
-            agent_card = await resolver.get_agent_card()
-            print(f"[MCP] Fetched agent card: {agent_card.name}", file=sys.stderr)
-            
-            # Initialize A2A Client
-            client = A2AClient(
-                httpx_client=httpx_client,
-                agent_card=agent_card
-            )
-            
-            # Construct message
-            parts = [{'kind': 'text', 'text': task}]
-            
-            # Inject API key as a special system part if provided
-            if api_key:
-                parts.append({'kind': 'text', 'text': f"__API_KEY__:{api_key}"})
-            
-            send_message_payload = {
-                'message': {
-                    'role': 'user',
-                    'parts': parts,
-                    'messageId': uuid4().hex,
-                },
-            }
-            
-            request = SendMessageRequest(
-                id=str(uuid4()),
-                params=MessageSendParams(**send_message_payload)
-            )
-            
-            print(f"[MCP] Sending message to A2A backend...", file=sys.stderr)
-            
-            # Emit A2A outgoing event
-            emit_event(
-                "a2a_outgoing_from_mcp",
-                {"to": "RESEARCHER", "to_url": A2A_SERVER_URL},
-                hop="mcp→researcher",
-                transport="http"
-            )
-            
-            # Create a task to send the message
-            send_task = asyncio.create_task(client.send_message(request))
-            
-            # Periodically print status while waiting
-            elapsed = 0
-            while not send_task.done():
-                await asyncio.sleep(5)
-                elapsed += 5
-                print(f"[MCP] Still working... ({elapsed}s elapsed)", file=sys.stderr)
-            
-            # Get the result
-            response = await send_task
-            
-            print(f"[MCP] Received response from A2A backend", file=sys.stderr)
-            
-            # Extract text from response
-            response_dict = response.model_dump(mode='json', exclude_none=True)
-            
-            result_text = "Error: No text content in response"
-            if 'result' in response_dict:
-                result = response_dict['result']
-                if isinstance(result, dict) and 'parts' in result:
-                    parts = result['parts']
-                    if len(parts) > 0:
-                        text = parts[0].get('text', '')
-                        if text:
-                            result_text = text
-                            print(f"[MCP] Returning text (length: {len(text)})", file=sys.stderr)
-            
-            # Emit A2A incoming event
-            emit_event(
-                "a2a_incoming_at_mcp",
-                {"from": "RESEARCHER", "content_length": len(result_text)},
-                hop="researcher→mcp",
-                transport="http"
-            )
-            
-            # Emit tool result event
-            emit_event(
-                "mcp_tool_result",
-                {
-                    "content_length": len(result_text),
-                    "content": result_text
-                },
-                hop="mcp→client",
-                transport="stdio"
-            )
-            
-            return result_text
-            
+        (result_text, artifact), outcome = await idempotent_calls.run(
+            keys,
+            lambda: call_researcher(task, api_key, priority),
+            # Error replies (overload, agent failures) are shared while in flight but not kept
+            cacheable=lambda result: not result[0].startswith("Error")
+        )
     except Exception as e:
         error_msg = f"Error calling backend agent service: {str(e)}"
         print(f"[MCP] {error_msg}", file=sys.stderr)
@@ -168,6 +161,141 @@ async def call_agent(task: str, api_key: str = None) -> str:
         import traceback
         traceback.print_exc(file=sys.stderr)
         return error_msg
+    
+    if outcome != "executed":
+        print(f"[MCP] Retry deduplicated ({outcome})", file=sys.stderr)
+        emit_event(
+            "mcp_tool_deduped",
+            {"tool": "call_agent", "outcome": outcome, **idempotent_calls.stats()},
+            hop="mcp",
+            transport="internal"
+        )
+    
+    # Emit tool result event; large results are referenced, not copied into the replay buffer
+    emit_event(
+        "mcp_tool_result",
+        {
+            "content_length": len(result_text),
+            "content": None if artifact else result_text,
+            "artifact": artifact.to_event() if artifact else None,
+            "deduped": outcome != "executed"
+        },
+        hop="mcp→client",
+        transport="stdio"
+    )
+    
+    return result_text
+
+async def call_researcher(task: str, api_key: Optional[str], priority: str) -> Tuple[str, Optional[ArtifactRef]]:
+    """Run the Researcher→Writer pipeline once; returns the report text and its artifact reference, if any."""
+    import httpx
+    from a2a.client import A2AClient
+    from a2a.types import AgentCard, MessageSendParams, SendMessageRequest
+
+    # Follow the registry from the first call on (not at startup: list_tools stays fast)
+    routes.start()
+    async with routes.route(RESEARCH_SKILL, usable=breakers.allows) as endpoint, \
+            httpx.AsyncClient(timeout=120.0) as httpx_client:
+        # The card comes from the cached routing table; no fetch per call
+        agent_card = AgentCard.model_validate(endpoint.card)
+        print(f"[MCP] Routed to {agent_card.name} at {endpoint.url}", file=sys.stderr)
+        
+        # Initialize A2A Client
+        client = A2AClient(
+            httpx_client=httpx_client,
+            agent_card=agent_card
+        )
+        
+        # Construct message; the API key rides in metadata, never in message text
+        metadata = {'priority': priority}
+        if api_key:
+            metadata[API_KEY_METADATA] = api_key
+        
+        send_message_payload = {
+            'message': {
+                'role': 'user',
+                'parts': [{'kind': 'text', 'text': task}],
+                'messageId': uuid4().hex,
+                'metadata': metadata,
+            },
+        }
+        
+        request = SendMessageRequest(
+            id=str(uuid4()),
+            params=MessageSendParams(**send_message_payload)
+        )
+        
+        print(f"[MCP] Sending message to A2A backend...", file=sys.stderr)
+        
+        # Emit A2A outgoing event
+        emit_event(
+            "a2a_outgoing_from_mcp",
+            {"to": "RESEARCHER", "to_url": endpoint.url},
+            hop="mcp→researcher",
+            transport="http"
+        )
+        
+        async def circuit_changed(breaker: CircuitBreaker, state: str):
+            emit_event("circuit_state", {"to": "RESEARCHER", **breaker.stats()}, hop="mcp→researcher", transport="http")
+        
+        # Create a task to send the message (fails fast while the endpoint's circuit is open)
+        send_task = asyncio.create_task(
+            breakers.call(endpoint.url, lambda: client.send_message(request), circuit_changed)
+        )
+        
+        # Periodically print status while waiting (returns as soon as the task finishes)
+        elapsed = 0
+        while not send_task.done():
+            await asyncio.wait({send_task}, timeout=5)
+            if not send_task.done():
+                elapsed += 5
+                print(f"[MCP] Still working... ({elapsed}s elapsed)", file=sys.stderr)
+        
+        # Get the result
+        try:
+            response = await send_task
+        except HopUnavailable as e:
+            if not isinstance(e, CircuitOpen):
+                routes.forget(endpoint.url)
+            emit_event(
+                "hop_unavailable",
+                {
+                    "to": "RESEARCHER",
+                    "to_url": endpoint.url,
+                    "reason": e.reason,
+                    "retry_after_s": e.retry_after_s,
+                    "circuit": breakers.get(endpoint.url).stats()
+                },
+                hop="mcp→researcher",
+                transport="http"
+            )
+            raise
+        
+        print(f"[MCP] Received response from A2A backend", file=sys.stderr)
+        
+        # Read the text off the response in place; large reports arrive as an
+        # artifact reference and are only read (via mmap) here, at the last hop
+        result_text = "Error: No text content in response"
+        result = result_message(response_result(response))
+        artifact = find_ref(result)
+        text = artifacts.read_text(artifact, verify=True) if artifact else first_text(result)
+        if text:
+            result_text = text
+            print(f"[MCP] Returning text (length: {len(text)})", file=sys.stderr)
+        
+        # Emit A2A incoming event
+        emit_event(
+            "a2a_incoming_at_mcp",
+            {
+                "from": "RESEARCHER",
+                "content_length": len(result_text),
+                "artifact": artifact.to_event() if artifact else None
+            },
+            hop="researcher→mcp",
+            transport="http"
+        )
+        
+        return result_text, artifact
 
 if __name__ == "__main__":
     mcp.run()
@@ -1,9 +1,9 @@
 """
-Standalone WebSocket Event Server
-Runs on port 9000 to broadcast events from agents
+Event Gateway
+Viewers subscribe on port 9000; agents and the MCP server publish on port 9001
 """
 from mcp_server.event_server import run_event_server
 
 if __name__ == "__main__":
-    print("Starting WebSocket Event Server on port 9000...")
+    print("Starting Event Gateway (viewers: 9000, publishers: 9001)...")
     run_event_server()
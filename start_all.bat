@@ -1,6 +1,7 @@
 @echo off
 echo Starting MCP-A2A Visualization Demo System...
 
+start "Event Gateway (Port 9000)" cmd /k ".venv\Scripts\python run_event_server.py"
 start "Writer Agent (Port 8002)" cmd /k ".venv\Scripts\python backend/writer_agent.py"
 start "Researcher Agent (Port 8001)" cmd /k ".venv\Scripts\python backend/researcher_agent.py"
 
@@ -14,6 +15,6 @@ echo System is running!
 echo 1. Open Dashboard: http://localhost:3000
 echo 2. Click "Start Demo" to begin (this will start the MCP server)
 echo.
-echo Note: The MCP WebSocket will connect when you start the first demo.
+echo Note: MCP events appear once you start the first demo.
 echo.
 pause
@@ -0,0 +1,76 @@
+"""
+Test that reading large A2A messages does not copy them
+Builds 1 MB reports as a2a Message / SendMessageResponse objects and checks,
+with tracemalloc, that text extraction, metadata reads and event
+normalization allocate a bounded amount independent of the report size.
+
+Run: python -m pytest -q test_a2a_memory.py   (or python test_a2a_memory.py)
+"""
+import os
+import sys
+import tracemalloc
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from a2a.types import Message, Part, Role, SendMessageResponse, SendMessageSuccessResponse, TextPart
+
+import a2a_access
+from event_broadcaster import normalize_a2a_payload
+from tenants import read_message
+
+REPORT_BYTES = 1024 * 1024
+# Generous fixed ceiling: well above the few hundred bytes of bookkeeping, far below one copy
+MAX_PEAK_BYTES = 64 * 1024
+
+def make_message(text: str) -> Message:
+    return Message(
+        role=Role.agent,
+        parts=[Part(root=TextPart(text=text))],
+        message_id=uuid4().hex,
+        metadata={"tenant": "tenant-a", "api_key": "sk-test"},
+    )
+
+def make_response(text: str) -> SendMessageResponse:
+    return SendMessageResponse(root=SendMessageSuccessResponse(id="1", result=make_message(text)))
+
+def peak_bytes(fn) -> int:
+    fn()  # warm up lazy imports and caches outside the measurement
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+REPORT = "# Report\n" + "x" * REPORT_BYTES
+
+def test_response_text_is_not_copied():
+    response = make_response(REPORT)
+    assert a2a_access.response_text(response) is response.root.result.parts[0].root.text
+    assert peak_bytes(lambda: a2a_access.response_text(response)) < MAX_PEAK_BYTES
+
+def test_read_message_bounded():
+    message = make_message(REPORT)
+    texts, api_key, metadata = read_message(message)
+    assert texts[0] is message.parts[0].root.text
+    assert api_key == "sk-test" and metadata["tenant"] == "tenant-a"
+    assert peak_bytes(lambda: read_message(message)) < MAX_PEAK_BYTES
+
+def test_event_normalization_bounded_and_redacted():
+    message = make_message(REPORT)
+    schema = normalize_a2a_payload(message)
+    assert len(schema["parts"][0]["text"]) <= 203
+    assert "api_key" not in schema["metadata"]
+    assert peak_bytes(lambda: normalize_a2a_payload(message)) < MAX_PEAK_BYTES
+
+def test_model_dump_would_exceed_bound():
+    # Guards the measurement itself: a JSON-mode dump of the response copies the report
+    response = make_response(REPORT)
+    assert peak_bytes(lambda: response.model_dump_json()) > REPORT_BYTES
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,119 @@
+"""
+Test the agent registry and the cached routing table
+Runs the registry in-process, announces agents against it and checks that a
+watching RoutingTable picks them up by long-poll, routes to the least loaded
+endpoint, and drops agents that deregister or stop heartbeating.
+Run: python -m pytest -q test_agent_registry.py   (or python test_agent_registry.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import agent_registry
+from registry_client import RoutingTable, announce
+
+def card(port: int, skill: str = "draft_report", name: str = "writer") -> dict:
+    return {"name": f"{name}-{port}", "url": f"http://localhost:{port}/", "version": "0.1.0",
+            "skills": [{"id": skill, "name": skill, "description": "", "tags": []}]}
+
+async def start_registry():
+    agent_registry.registry = agent_registry.Registry(ttl_s=0.6)
+    config = uvicorn.Config(agent_registry.app, host="127.0.0.1", port=0, log_level="error")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+async def until(predicate, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for the routing table"
+        await asyncio.sleep(0.01)
+
+def test_long_poll_returns_on_change_only():
+    async def scenario():
+        registry = agent_registry.Registry()
+        waiter = asyncio.create_task(registry.wait_for_change(registry.version, 5))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        registry.register(card(8002), {"in_flight": 0})
+        await asyncio.wait_for(waiter, 1)
+        version = registry.version
+        assert not registry.register(card(8002), {"in_flight": 0})  # a plain heartbeat
+        assert not registry.register(card(8002), {"in_flight": 4})  # load comes from /load polling
+        assert registry.version == version
+        registry.register(card(8002, skill="review_report"), {"in_flight": 4})  # a new card is a change
+        assert registry.version == version + 1
+        version = registry.version
+        start = time.monotonic()
+        await registry.wait_for_change(version, 0.1)
+        assert time.monotonic() - start >= 0.1
+    asyncio.run(scenario())
+
+def test_routes_follow_registrations_and_load():
+    async def scenario():
+        server, task, url = await start_registry()
+        routes = RoutingTable(registry_url=url, wait_s=5)
+        routes.start()
+        agents = [asyncio.create_task(announce(card(port), lambda p=port: {"in_flight": 3 if p == 8002 else 0},
+                                               registry_url=url, interval_s=0.1))
+                  for port in (8002, 8012)]
+        try:
+            await until(lambda: len(routes.skills.get("draft_report", [])) == 2)
+
+            # The idle writer gets the first calls; calls in flight count as load
+            async with routes.route("draft_report") as first:
+                assert first.url == "http://localhost:8012/"
+                async with routes.route("draft_report") as second, routes.route("draft_report") as third:
+                    assert second.url == third.url == "http://localhost:8012/"
+                    async with routes.route("draft_report") as fourth:
+                        assert {fourth.url} <= {"http://localhost:8002/", "http://localhost:8012/"}
+
+            # Deregistration on shutdown reaches the watcher without waiting for a poll timeout
+            agents[1].cancel()
+            await asyncio.gather(agents[1], return_exceptions=True)
+            await until(lambda: [e.url for e in routes.skills["draft_report"]] == ["http://localhost:8002/"], 1.0)
+
+            # An agent that stops heartbeating without deregistering expires
+            agent_registry.registry.register(card(8022), {})
+            await until(lambda: len(routes.skills["draft_report"]) == 2, 1.0)
+            await until(lambda: len(routes.skills["draft_report"]) == 1, 2.0)
+        finally:
+            for agent in agents:
+                agent.cancel()
+            await asyncio.gather(*agents, return_exceptions=True)
+            await routes.stop()
+            server.should_exit = True
+            await task
+    asyncio.run(scenario())
+
+def test_successor_on_the_same_url_keeps_the_entry():
+    registry = agent_registry.Registry()
+    registry.register(card(8002), {"in_flight": 2}, instance="old")
+    registry.register(card(8002), {"in_flight": 0}, instance="new")  # started on the same port
+    assert not registry.deregister("http://localhost:8002/", instance="old")  # the old process drains
+    assert "http://localhost:8002/" in registry.agents
+    assert registry.deregister("http://localhost:8002/", instance="new")
+    assert not registry.agents
+
+def test_unknown_skill_is_a_lookup_error():
+    async def scenario():
+        routes = RoutingTable(fallback_urls=[])
+        try:
+            async with routes.route("review_report"):
+                pass
+            assert False, "expected LookupError"
+        except LookupError:
+            pass
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
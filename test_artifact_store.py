@@ -0,0 +1,99 @@
+"""
+Test the content-addressed artifact store and A2A artifact references
+Run: python -m pytest -q test_artifact_store.py   (or python test_artifact_store.py)
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from artifact_store import ArtifactRef, ArtifactStore, find_ref, ref_message
+from event_broadcaster import normalize_a2a_payload
+
+REPORT = "# Report\n" + "é" * (1024 * 1024)
+
+def make_store(**kwargs) -> ArtifactStore:
+    return ArtifactStore(tempfile.mkdtemp(prefix="artifacts-"), **kwargs)
+
+def test_put_is_content_addressed_and_deduplicated():
+    store = make_store()
+    first, second = store.put(REPORT), store.put(REPORT)
+    assert first == second
+    assert first.size == len(REPORT.encode("utf-8"))
+    assert store.read_text(first, verify=True) == REPORT
+    assert len(list(store.root.glob("??/*"))) == 1
+
+def test_small_outputs_stay_inline():
+    store = make_store(inline_max=1024)
+    assert store.offload("short report") is None
+    assert store.offload(REPORT) is not None
+
+def test_reference_round_trips_through_a2a_message():
+    store = make_store()
+    ref = store.put(REPORT)
+    message = ref_message(ref)
+    assert find_ref(message) == ref
+    # Events see the reference, not the content
+    schema = normalize_a2a_payload(message)
+    assert schema["parts"] == [{"kind": "file", "text": "", "uri": ref.uri}]
+
+def test_uri_cannot_escape_the_store():
+    store = make_store()
+    ref = store.put("content")
+    for uri in ("file:///etc/passwd", "file:///tmp/../" + "0" * 63):
+        try:
+            store.open(ArtifactRef(ref.sha256, ref.size, uri))
+        except ValueError:
+            continue
+        raise AssertionError(f"{uri} was resolved")
+
+def test_size_and_hash_are_checked():
+    store = make_store()
+    ref = store.put("content")
+    try:
+        store.open(ArtifactRef(ref.sha256, ref.size + 1, ref.uri))
+        raise AssertionError("size mismatch not detected")
+    except ValueError:
+        pass
+    store.path(ref.sha256).write_text("tamperd")
+    try:
+        store.read_text(ref, verify=True)
+        raise AssertionError("hash mismatch not detected")
+    except ValueError:
+        pass
+
+def test_mapped_read_does_not_copy():
+    store = make_store()
+    ref = store.put(REPORT)
+    store.open(ref).close()
+    tracemalloc.start()
+    try:
+        with store.open(ref, verify=True) as mapped:
+            assert len(mapped) == ref.size
+        assert tracemalloc.get_traced_memory()[1] < 64 * 1024
+    finally:
+        tracemalloc.stop()
+
+def test_prune_keeps_store_bounded():
+    store = make_store(max_bytes=2500)
+    for i in range(5):
+        store.put(f"{i}" * 1000)
+    assert sum(p.stat().st_size for p in store.root.glob("??/*")) <= 2500
+
+def test_prune_keeps_artifacts_that_were_put_again():
+    store = make_store(max_bytes=2500)
+    refs = [store.put(f"{i}" * 1000) for i in range(2)]
+    for age, ref in zip((20, 10), refs):  # refs[0] is the oldest on disk
+        old = store.resolve(ref.uri).stat().st_mtime - age
+        os.utime(store.resolve(ref.uri), (old, old))
+    again = store.put("0" * 1000)  # the same report produced again
+    store.put("2" * 1000)  # over max_bytes: prunes the least recently put
+    assert store.exists(again)
+    assert not store.exists(refs[1])
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,166 @@
+"""
+Test circuit breakers on A2A hops with a hanging Writer
+A local stand-in Writer serves an AgentCard but never answers message/send.
+The Researcher's calls time out until the circuit opens, then fail fast with
+a typed hop_unavailable event, then serve a cached report marked degraded.
+Once the stand-in recovers, a half-open probe closes the circuit again.
+Run: python -m pytest -q test_circuit_breaker.py   (or python test_circuit_breaker.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import event_broadcaster
+import researcher_agent
+from artifact_store import ArtifactRef
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, Breakers, CircuitBreaker, CircuitOpen, HopUnavailable
+from registry_client import RoutingTable
+from workflow import RESEARCH_AND_DRAFT
+
+TIMEOUT_S = 0.3
+OPEN_S = 0.5
+
+class StandInWriter:
+    """Advertises draft_report; hangs on every call until `healthy` is set."""
+
+    def __init__(self):
+        self.healthy = asyncio.Event()
+        self.calls = 0
+        self.app = Starlette(routes=[
+            Route("/.well-known/agent-card.json", self.card, methods=["GET"]),
+            Route("/", self.send, methods=["POST"]),
+        ])
+        self.url = None
+
+    async def card(self, request: Request):
+        return JSONResponse({
+            "name": "stand-in-writer", "description": "hangs", "url": self.url, "version": "0.0.1",
+            "capabilities": {}, "defaultInputModes": ["text"], "defaultOutputModes": ["text"],
+            "skills": [{"id": "draft_report", "name": "Draft", "description": "", "tags": []}],
+        })
+
+    async def send(self, request: Request):
+        self.calls += 1
+        body = await request.json()
+        await self.healthy.wait()
+        return JSONResponse({"jsonrpc": "2.0", "id": body["id"], "result": {
+            "kind": "message", "role": "agent", "messageId": "m1",
+            "parts": [{"kind": "text", "text": "# Fresh report"}],
+        }})
+
+async def start(writer: StandInWriter):
+    server = uvicorn.Server(uvicorn.Config(writer.app, host="127.0.0.1", port=0, log_level="error"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    writer.url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/"
+    return server, task
+
+def drain_events():
+    events = []
+    while not event_broadcaster.event_queue.empty():
+        events.append(event_broadcaster.event_queue.get_nowait())
+    return events
+
+async def timed(coro):
+    start = time.monotonic()
+    try:
+        return await coro, time.monotonic() - start
+    except Exception as e:
+        return e, time.monotonic() - start
+
+def test_breaker_states():
+    breaker = CircuitBreaker("w", min_calls=4, error_rate=0.5, slow_call_s=1.0, slow_rate=0.75, open_s=0.05)
+    for ok in (True, True, False):
+        assert breaker.record(ok, 0.01, probe=False) is None
+    assert breaker.record(False, 0.01, probe=False) == OPEN  # 2 of 4 failed
+    try:
+        breaker.acquire()
+        assert False, "open circuit admitted a call"
+    except CircuitOpen as e:
+        assert e.reason == "circuit_open" and e.retry_after_s > 0
+    time.sleep(0.06)
+    assert breaker.acquire() == HALF_OPEN
+    assert not breaker.allows()  # one probe at a time
+    assert breaker.record(True, 0.3, probe=True) == CLOSED
+
+    slow = CircuitBreaker("w", min_calls=4, slow_call_s=0.1, slow_rate=0.8)
+    for _ in range(3):
+        slow.record(True, 0.2, probe=False)  # successful but slow
+    assert slow.record(True, 0.01, probe=False) is None  # 3 of 4 slow
+    assert slow.record(True, 0.2, probe=False) == OPEN  # 4 of 5 slow
+
+def test_hanging_writer_fails_fast_then_degrades_then_recovers():
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        writer = StandInWriter()
+        server, task = await start(writer)
+        researcher_agent.routes = RoutingTable(registry_url="http://127.0.0.1:9", fallback_urls=[writer.url])
+        researcher_agent.breakers = Breakers(timeout_s=TIMEOUT_S, min_calls=2, error_rate=0.5, open_s=OPEN_S)
+        node = RESEARCH_AND_DRAFT.nodes["draft"]
+        agent = researcher_agent.ResearcherAgent("vector databases", tenant="tenant-fault")
+        try:
+            # Calls wait for the call timeout, not the 120 s httpx timeout, until the circuit opens
+            for _ in range(2):
+                error, elapsed = await timed(agent.call_skill(node, "Topic: x\nNotes:\n- y"))
+                assert isinstance(error, HopUnavailable) and error.reason == "timeout"
+                assert TIMEOUT_S <= elapsed < TIMEOUT_S + 1
+            assert researcher_agent.breakers.get(writer.url).state == OPEN
+
+            # Open: rejected without reaching the Writer
+            error, elapsed = await timed(agent.call_skill(node, "Topic: x\nNotes:\n- y"))
+            assert isinstance(error, CircuitOpen) and elapsed < 0.1
+            assert writer.calls == 2
+
+            events = drain_events()
+            failures = [e for e in events if e["type"] == "hop_unavailable"]
+            assert [e["data"]["reason"] for e in failures] == ["timeout", "timeout", "circuit_open"]
+            assert all(e["hop"] == "researcher→writer" and e["status"] == "error" for e in failures)
+            assert any(e["type"] == "circuit_state" and e["data"]["state"] == OPEN for e in events)
+
+            # With a cached report for the topic, the workflow returns it marked degraded
+            agent.topic_cache.put("vector databases", "- notes")  # research is a cache hit
+            researcher_agent.tenants.cache("tenant-fault", "reports", researcher_agent.report_cache).put(
+                "vector databases", "# Cached report")
+            report, elapsed = await timed(agent.run())
+            assert report == "# Cached report" and agent.degraded == "circuit_open" and elapsed < 0.2
+            assert any(e["type"] == "degraded_response" for e in drain_events())
+
+            # Without one, the typed error propagates
+            other = researcher_agent.ResearcherAgent("quantum computing", tenant="tenant-fault")
+            other.topic_cache.put("quantum computing", "- notes")
+            error, _ = await timed(other.run())
+            assert isinstance(error, CircuitOpen)
+
+            # Nor is a cached reference whose artifact has since been pruned
+            pruned = researcher_agent.ResearcherAgent("stream processing", tenant="tenant-fault")
+            pruned.topic_cache.put("stream processing", "- notes")
+            reports = researcher_agent.tenants.cache("tenant-fault", "reports", researcher_agent.report_cache)
+            reports.put("stream processing", ArtifactRef("0" * 64, 10, researcher_agent.artifacts.path("0" * 64).as_uri()))
+            error, _ = await timed(pruned.run())
+            assert isinstance(error, CircuitOpen) and reports.get("stream processing") is None
+
+            # The Writer recovers: after CIRCUIT_OPEN_S one probe goes through and closes the circuit
+            writer.healthy.set()
+            await asyncio.sleep(OPEN_S)
+            assert await agent.call_skill(node, "Topic: x\nNotes:\n- y") == "# Fresh report"
+            assert researcher_agent.breakers.get(writer.url).state == CLOSED
+        finally:
+            writer.healthy.set()
+            server.should_exit = True
+            await task
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
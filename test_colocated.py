@@ -0,0 +1,139 @@
+"""
+Test colocated mode: the Researcher calls a Writer in the same process
+A stand-in Writer executor is registered in colocated.local_agents. The
+Researcher's draft_report call must reach it without the routing table or
+HTTP, with the same events (marked transport "in-process") and the same A2A
+semantics: overload metadata and JSON-RPC errors come back as they would over HTTP.
+Run: python -m pytest -q test_colocated.py   (or python test_colocated.py)
+"""
+import asyncio
+import os
+import sys
+from uuid import uuid4
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import InternalError, JSONRPCErrorResponse, MessageSendParams, SendMessageRequest
+from a2a.utils import new_agent_text_message
+from a2a.utils.errors import ServerError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import event_broadcaster
+import researcher_agent
+import writer_agent
+from colocated import IN_PROCESS, LocalAgents, local_agents
+from registry_client import RoutingTable
+from scheduler import Overloaded
+from workflow import RESEARCH_AND_DRAFT
+
+class StandInWriter(AgentExecutor):
+    """Echoes the topic line as a report, or replies overloaded, failed, or with a JSON-RPC error."""
+
+    def __init__(self):
+        self.overloaded = False
+        self.failed = False
+        self.crashed = False
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await event_broadcaster.broadcast_event("WRITER", "rpc_request", {"agent": "WRITER"}, status="success")
+        if self.crashed:
+            raise ServerError(error=InternalError(message="writer crashed"))
+        if self.overloaded:
+            message = new_agent_text_message("Error: Writer overloaded (quota); retry after 2s")
+            message.metadata = {"error": "overloaded", "retry_after_s": 2}
+        elif self.failed:
+            message = writer_agent.error_message("Error: upstream timed out")
+        else:
+            message = new_agent_text_message("# " + context.get_user_input().split("\n", 1)[0])
+        await event_queue.enqueue_event(message)
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        raise Exception('cancel not supported')
+
+def colocate(executor: AgentExecutor) -> LocalAgents:
+    local = LocalAgents()
+    local.add(writer_agent.agent_card("local://writer/"),
+              DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore()))
+    researcher_agent.local_agents = local
+    # No registry and no fallback: any routed (HTTP) call would raise LookupError
+    researcher_agent.routes = RoutingTable(registry_url="http://127.0.0.1:9", fallback_urls=[])
+    return local
+
+def drain_events():
+    events = []
+    while not event_broadcaster.event_queue.empty():
+        events.append(event_broadcaster.event_queue.get_nowait())
+    return events
+
+def test_skill_call_runs_in_process_with_the_same_events():
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        executor = StandInWriter()
+        colocate(executor)
+        agent = researcher_agent.ResearcherAgent("vector databases", tenant="tenant-colo")
+        node = RESEARCH_AND_DRAFT.nodes["draft"]
+        try:
+            await skill_calls(agent, node, executor)
+        finally:
+            researcher_agent.local_agents = local_agents
+
+    async def skill_calls(agent, node, executor):
+        assert await agent.call_skill(node, "Topic: vector databases\nNotes:\n- y") == "# Topic: vector databases"
+        events = {e["type"]: e for e in drain_events()}
+        assert {"a2a_outgoing", "rpc_request", "a2a_incoming"} <= set(events)
+        assert all(e["transport"] == IN_PROCESS for e in events.values())
+        assert events["a2a_outgoing"]["hop"] == "researcher→writer"
+        assert events["a2a_outgoing"]["data"]["to_url"] == "local://writer/"
+        assert event_broadcaster.a2a_transport.get() == "http"  # reset after the hop
+
+        # Overload replies keep their meaning across the local hop
+        executor.overloaded = True
+        try:
+            await agent.call_skill(node, "Topic: x\nNotes:\n- y")
+            assert False, "expected Overloaded"
+        except Overloaded as e:
+            assert e.retry_after_s == 2
+
+        # So do failure replies: they raise instead of coming back as the draft
+        executor.overloaded, executor.failed = False, True
+        try:
+            await agent.call_skill(node, "Topic: x\nNotes:\n- y")
+            assert False, "expected the failure to raise"
+        except RuntimeError as e:
+            assert "upstream timed out" in str(e)
+
+        # A JSON-RPC error reply keeps its code and message
+        executor.failed, executor.crashed = False, True
+        drain_events()
+        try:
+            await agent.call_skill(node, "Topic: x\nNotes:\n- y")
+            assert False, "expected the error reply to raise"
+        except RuntimeError as e:
+            assert "writer crashed" in str(e) and "-32603" in str(e)
+        incoming = [e for e in drain_events() if e["type"] == "a2a_incoming"]
+        assert incoming[0]["status"] == "error" and incoming[0]["data"]["error_code"] == -32603
+    asyncio.run(scenario())
+
+def test_handler_errors_are_jsonrpc_error_responses():
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        local = LocalAgents()
+        local.add(writer_agent.agent_card("local://writer/"),
+                  DefaultRequestHandler(agent_executor=StandInWriter(), task_store=InMemoryTaskStore()))
+        client = local.get("draft_report").client
+        request = SendMessageRequest(id=str(uuid4()), params=MessageSendParams(message={
+            "role": "user", "parts": [{"kind": "text", "text": "Topic: x"}],
+            "messageId": uuid4().hex, "taskId": "no-such-task",
+        }))
+        response = await client.send_message(request)
+        assert isinstance(response.root, JSONRPCErrorResponse)
+        assert response.root.error.code == -32001  # TaskNotFoundError, as over JSON-RPC
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,104 @@
+"""
+Test replay-on-connect at the event gateway under a reconnect storm
+Runs the gateway in-process, keeps publishing events, and connects 500
+viewers at once. Every viewer must see one snapshot frame followed by live
+frames whose seq numbers continue it with no gaps and no duplicates. A second
+wave reconnects with ?since=<last seq> and must resume exactly after it.
+
+Run: python -m pytest -q test_event_replay.py   (or python test_event_replay.py)
+"""
+import asyncio
+import json
+import os
+import sys
+
+import uvicorn
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mcp_server import event_server
+
+VIEWERS = 500
+LIVE_EVENTS = 300  # published after the storm starts
+
+async def start_gateway():
+    event_server.INGEST_PORT = 0  # no TCP ingest needed; events are broadcast directly
+    config = uvicorn.Config(event_server.app, host="127.0.0.1", port=0, log_level="error",
+                            ws_max_size=16 * 1024 * 1024, backlog=2048)
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, port
+
+async def publish(count: int, start: int = 0, batch: int = 1, pause: float = 0.0):
+    for i in range(start, start + count, batch):
+        frame = [{"id": f"e{j}", "source": "RESEARCHER", "type": "rpc_request", "data": {"i": j}}
+                 for j in range(i, min(i + batch, start + count))]
+        await event_server._broadcast(frame if batch > 1 else frame[0])
+        await asyncio.sleep(pause)
+
+async def watch(url: str, until_seq: int):
+    """Collect (snapshot seqs, live seqs) until until_seq is seen."""
+    snapshot, live = None, []
+    async with websockets.connect(url, max_size=None, open_timeout=30) as ws:
+        while True:
+            frame = json.loads(await asyncio.wait_for(ws.recv(), 30))
+            if isinstance(frame, dict) and frame.get("type") == "gateway_status":
+                continue
+            seqs = [e["seq"] for e in (frame if isinstance(frame, list) else [frame])]
+            if snapshot is None:
+                snapshot = seqs
+            else:
+                live.extend(seqs)
+            if (live or snapshot) and (live or snapshot)[-1] >= until_seq:
+                return snapshot, live
+
+def check_contiguous(snapshot, live, first_expected=None):
+    seqs = snapshot + live
+    assert seqs == list(range(seqs[0], seqs[0] + len(seqs))), "gap or duplicate in seq"
+    if first_expected is not None:
+        assert seqs[0] == first_expected
+
+async def reconnect_storm():
+    event_server.event_queue.clear()
+    event_server.active_connections.clear()
+    server, task, port = await start_gateway()
+    url = f"ws://127.0.0.1:{port}/events"
+    try:
+        await publish(150)  # more than the replay buffer holds
+        base = event_server.seq
+        final = base + LIVE_EVENTS
+
+        # All viewers connect while events keep flowing
+        watchers = [asyncio.create_task(watch(url, final)) for _ in range(VIEWERS)]
+        await publish(LIVE_EVENTS, start=150, batch=3, pause=0.01)
+        results = await asyncio.gather(*watchers)
+
+        assert len(results) == VIEWERS
+        # The storm overlapped publishing: some viewers switched from snapshot to live mid-stream
+        assert any(live for _, live in results)
+        for snapshot, live in results:
+            assert snapshot, "snapshot frame missing"
+            assert len(snapshot) <= event_server.event_queue.maxlen
+            check_contiguous(snapshot, live)
+            assert (snapshot + live)[-1] == final
+
+        # Second wave resumes from where each viewer stopped, with no overlap
+        resumed_from = final
+        watchers = [asyncio.create_task(watch(f"{url}?since={resumed_from}", final + 30)) for _ in range(VIEWERS)]
+        await asyncio.sleep(0.5)
+        await publish(30, start=150 + LIVE_EVENTS, batch=5, pause=0.002)
+        for snapshot, live in await asyncio.gather(*watchers):
+            check_contiguous(snapshot, live, first_expected=resumed_from + 1)
+    finally:
+        server.should_exit = True
+        await task
+
+def test_reconnect_storm_sees_every_seq_once():
+    asyncio.run(reconnect_storm())
+
+if __name__ == "__main__":
+    test_reconnect_storm_sees_every_seq_once()
+    print("✅ test_reconnect_storm_sees_every_seq_once")
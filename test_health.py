@@ -0,0 +1,162 @@
+"""
+Test the health, readiness and load endpoints (backend/health.py)
+Serves a small A2A app with /healthz, /readyz and /load in-process and checks
+each readiness check (upstream probe, task store, event-queue saturation,
+draining) and the load report. Then a RoutingTable polls /load on three agents
+and routes around the busy one and the draining one.
+Run: python -m pytest -q test_health.py   (or python test_health.py)
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+import uvicorn
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.events import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.utils import new_agent_text_message
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import event_broadcaster
+from health import Health
+from lifecycle import Lifecycle
+from registry_client import RoutingTable
+from test_lifecycle import card, send, until
+
+class Slow(AgentExecutor):
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await asyncio.sleep(0.2)
+        await event_queue.enqueue_event(new_agent_text_message("done"))
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        raise Exception('cancel not supported')
+
+class Upstream:
+    """Stand-in for the LLM provider's reachability probe."""
+
+    def __init__(self):
+        self.up = True
+        self.probes = 0
+
+    async def reachable(self, timeout_s: float) -> bool:
+        self.probes += 1
+        if self.up is None:
+            raise httpx.InvalidURL("Invalid port: 'port'")  # not an httpx.HTTPError
+        return self.up
+
+async def start(app):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="error"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, server.servers[0].sockets[0].getsockname()[1]
+
+async def stop(server, task):
+    server.should_exit = True
+    await task
+
+def test_probes_report_readiness_and_load():
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        upstream = Upstream()
+        lifecycle = Lifecycle("WRITER", drain_timeout_s=1.0, flush_timeout_s=0.1)
+        task_store = InMemoryTaskStore()
+        health = Health(lifecycle, task_store, reachable=upstream.reachable, probe_interval_s=60, saturation=3)
+        app = A2AStarletteApplication(agent_card=card(), http_handler=DefaultRequestHandler(
+            agent_executor=lifecycle.executor(Slow()), task_store=task_store)).build(lifespan=lifecycle.lifespan)
+        health.install(app)
+        server, task, port = await start(app)
+        base = f"http://127.0.0.1:{port}"
+        try:
+            async with httpx.AsyncClient(base_url=base) as client:
+                assert (await client.get("/healthz")).json() == {"status": "ok", "agent": "writer"}
+                await until(lambda: health.store_ok is not None)  # first probe runs at startup
+                ready = await client.get("/readyz")
+                assert ready.status_code == 200 and ready.json()["ready"]
+
+                # Polling reads the cached probe; it does not probe again
+                for _ in range(20):
+                    await client.get("/readyz")
+                assert upstream.probes == 1
+
+                upstream.up = False
+                await health.check()
+                ready = await client.get("/readyz")
+                assert ready.status_code == 503 and ready.json()["checks"]["llm"] == "unreachable"
+                # A misconfigured upstream fails the check; it does not end the probe
+                upstream.up = None
+                await health.check()
+                ready = await client.get("/readyz")
+                assert ready.status_code == 503 and ready.json()["checks"]["llm"] == "unreachable"
+                upstream.up = True
+                await health.check()
+
+                for _ in range(3):
+                    event_broadcaster.enqueue_event({"type": "rpc_request"})
+                ready = await client.get("/readyz")
+                assert ready.status_code == 503 and ready.json()["checks"]["event_queue"] == "saturated"
+                event_broadcaster.log_undelivered()
+                assert (await client.get("/readyz")).status_code == 200
+
+                # Tasks in flight and the recent p95 show up in /load
+                assert (await client.get("/load")).json() == {"in_flight": 0, "queue_depth": 0, "p95_ms": 0.0, "draining": False}
+                busy = asyncio.create_task(send(client, port, "x"))
+                await until(lambda: lifecycle.in_flight == 1)
+                assert (await client.get("/load")).json()["in_flight"] == 1
+                await busy
+                load = (await client.get("/load")).json()
+                assert load["in_flight"] == 0 and load["p95_ms"] >= 200
+
+                # Draining: still alive, no longer ready
+                await lifecycle.drain()
+                assert (await client.get("/healthz")).status_code == 200
+                ready = await client.get("/readyz")
+                assert ready.status_code == 503 and ready.json()["checks"]["draining"]
+                assert (await client.get("/load")).json()["draining"]
+        finally:
+            await stop(server, task)
+    asyncio.run(scenario())
+
+def test_routing_follows_polled_load():
+    async def scenario():
+        agents = []
+        for _ in range(3):
+            lifecycle = Lifecycle("WRITER")
+            app = A2AStarletteApplication(agent_card=card(), http_handler=DefaultRequestHandler(
+                agent_executor=lifecycle.executor(Slow()), task_store=InMemoryTaskStore())).build()
+            Health(lifecycle, InMemoryTaskStore(), reachable=Upstream().reachable).install(app)
+            server, task, port = await start(app)
+            agents.append((lifecycle, server, task, f"http://127.0.0.1:{port}/"))
+        (busy, *_, busy_url), (draining, *_, draining_url), (_, _, _, idle_url) = agents
+        routes = RoutingTable(registry_url="http://127.0.0.1:9", load_poll_s=0.05)
+        # As registered: the heartbeats said every agent was idle
+        routes.apply({"version": 1, "skills": {"draft_report": [busy_url, draining_url, idle_url]},
+                      "agents": {url: {"name": url, "card": {}, "load": {}} for url in (busy_url, draining_url, idle_url)}})
+        busy.in_flight = 3
+        draining.draining = True
+        try:
+            async with httpx.AsyncClient() as client:
+                await routes.refresh_load(client)
+            for _ in range(6):
+                async with routes.route("draft_report") as endpoint:
+                    assert endpoint.url == idle_url
+
+            # The poller keeps load current while the table is watched
+            routes.start()
+            busy.in_flight = 0
+            await until(lambda: routes.skills["draft_report"][0].reported_load == 0)
+        finally:
+            busy.in_flight = 0
+            await routes.stop()
+            for _, server, task, _ in agents:
+                await stop(server, task)
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,83 @@
+"""
+Test call_agent idempotency: in-flight sharing, the TTL store and derived keys
+Run: python -m pytest -q test_idempotency.py   (or python test_idempotency.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from idempotency import IdempotentCalls
+
+class Pipeline:
+    """Stands in for the Researcher→Writer call and counts real executions."""
+
+    def __init__(self, result="# Report", delay=0.05):
+        self.result, self.delay, self.runs = result, delay, 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+def test_retries_join_in_flight_then_hit_store():
+    async def scenario():
+        calls, pipeline = IdempotentCalls(), Pipeline()
+        keys = calls.keys("tenant-a", "retry-1", "vector databases")
+        first = asyncio.create_task(calls.run(keys, pipeline))
+        await asyncio.sleep(0.01)
+        second = await calls.run(keys, pipeline)
+        assert (await first) == ("# Report", "executed")
+        assert second == ("# Report", "joined_in_flight")
+        assert await calls.run(keys, pipeline) == ("# Report", "served_completed")
+        assert pipeline.runs == 1
+        assert calls.stats()["executed"] == 1 and calls.stats()["stored"] == 1
+    asyncio.run(scenario())
+
+def test_caller_cancellation_does_not_cancel_shared_call():
+    async def scenario():
+        calls, pipeline = IdempotentCalls(), Pipeline(delay=0.1)
+        keys = calls.keys("tenant-a", None, "Vector  Databases")
+        first = asyncio.create_task(calls.run(keys, pipeline))
+        await asyncio.sleep(0.01)
+        first.cancel()  # client timed out
+        result, outcome = await calls.run(calls.keys("tenant-a", None, "vector databases"), pipeline)
+        assert (result, outcome) == ("# Report", "joined_in_flight") and pipeline.runs == 1
+    asyncio.run(scenario())
+
+def test_derived_keys_span_bucket_boundary_and_are_scoped():
+    calls = IdempotentCalls(bucket_s=300)
+    before = calls.keys("tenant-a", None, "topic", now=299.0)
+    after = calls.keys("tenant-a", None, "topic", now=301.0)
+    assert before[0] == after[1]
+    assert calls.keys("tenant-b", None, "topic", now=299.0)[0] != before[0]
+    assert IdempotentCalls(bucket_s=0).keys("tenant-a", None, "topic") == []
+
+def test_errors_are_not_stored_and_ttl_expires():
+    async def scenario():
+        calls = IdempotentCalls(ttl_s=0.05)
+        failing = Pipeline(result="Error: Researcher overloaded")
+        keys = calls.keys("t", "k", "topic")
+        await calls.run(keys, failing, cacheable=lambda r: not r.startswith("Error"))
+        await calls.run(keys, failing, cacheable=lambda r: not r.startswith("Error"))
+        assert failing.runs == 2
+        ok = Pipeline(delay=0)
+        keys = calls.keys("t", "k2", "topic")
+        await calls.run(keys, ok)
+        await asyncio.sleep(0.06)
+        assert (await calls.run(keys, ok))[1] == "executed" and ok.runs == 2
+    asyncio.run(scenario())
+
+def test_store_is_bounded():
+    async def scenario():
+        calls = IdempotentCalls(max_entries=3)
+        for i in range(10):
+            await calls.run(calls.keys("t", f"k{i}", "topic"), Pipeline(delay=0))
+        assert calls.stats()["stored"] == 3
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,164 @@
+"""
+Test draining and SO_REUSEPORT handoff (backend/lifecycle.py)
+Runs small A2A apps in-process on DrainingServer and sends them the exit
+signal: tasks in flight finish, new tasks on open connections get a
+"draining" overloaded reply, the listener closes, and a successor bound to
+the same port takes every new connection without one being refused.
+Run: python -m pytest -q test_lifecycle.py   (or python test_lifecycle.py)
+"""
+import asyncio
+import os
+import signal
+import socket
+import sys
+import time
+import warnings
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from a2a.client import A2AClient
+from a2a.client.errors import A2AClientHTTPError
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.events import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill, MessageSendParams, SendMessageRequest
+from a2a.utils import new_agent_text_message
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import event_broadcaster
+from a2a_access import first_text, metadata_of, response_result, result_message
+from lifecycle import DrainingServer, Lifecycle, listen_socket
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+class Echo(AgentExecutor):
+    """Replies with its name; "slow" requests take `delay` seconds."""
+
+    def __init__(self, name: str, delay: float = 0.5):
+        self.name = name
+        self.delay = delay
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        if context.get_user_input() == "slow":
+            await asyncio.sleep(self.delay)
+        await event_queue.enqueue_event(new_agent_text_message(self.name))
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        raise Exception('cancel not supported')
+
+def card() -> AgentCard:
+    return AgentCard(
+        name="echo", description="echo", url="http://127.0.0.1/", version="0.0.1",
+        default_input_modes=["text"], default_output_modes=["text"],
+        capabilities=AgentCapabilities(streaming=False),
+        skills=[AgentSkill(id="draft_report", name="Draft", description="", tags=[])],
+    )
+
+async def start(name: str, port: int = 0, drain_timeout_s: float = 5.0, delay: float = 0.5):
+    lifecycle = Lifecycle("WRITER", drain_timeout_s=drain_timeout_s, flush_timeout_s=0.2)
+    handler = DefaultRequestHandler(agent_executor=lifecycle.executor(Echo(name, delay)), task_store=InMemoryTaskStore())
+    app = A2AStarletteApplication(agent_card=card(), http_handler=handler).build(lifespan=lifecycle.lifespan)
+    sock = listen_socket("127.0.0.1", port)
+    server = DrainingServer(uvicorn.Config(app, log_level="error", timeout_graceful_shutdown=1.0), lifecycle)
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, lifecycle, sock.getsockname()[1]
+
+async def send(client: httpx.AsyncClient, port: int, text: str):
+    a2a = A2AClient(httpx_client=client, url=f"http://127.0.0.1:{port}/")
+    response = await a2a.send_message(SendMessageRequest(id=str(uuid4()), params=MessageSendParams(message={
+        "role": "user", "parts": [{"kind": "text", "text": text}], "messageId": uuid4().hex,
+    })))
+    message = result_message(response_result(response))
+    return first_text(message), metadata_of(message)
+
+async def until(predicate, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_drain_finishes_in_flight_and_refuses_new_tasks():
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        server, task, lifecycle, port = await start("old")
+        async with httpx.AsyncClient() as busy, httpx.AsyncClient() as idle:
+            assert (await send(idle, port, "fast"))[0] == "old"  # keeps a connection open
+            in_flight = asyncio.create_task(send(busy, port, "slow"))
+            await until(lambda: lifecycle.in_flight == 1)
+
+            server.handle_exit(signal.SIGTERM, None)
+            await until(lambda: lifecycle.draining)
+
+            # New tasks on an open connection are turned away with a retryable reply
+            text, metadata = await send(idle, port, "fast")
+            assert metadata == {"error": "overloaded", "reason": "draining", "retry_after_s": 1}
+            # New connections are not accepted
+            try:
+                async with httpx.AsyncClient() as late:
+                    await send(late, port, "fast")
+                assert False, "listener still open while draining"
+            except A2AClientHTTPError as e:
+                assert e.status_code == 503  # connection refused
+
+            # The task in flight completes, then the server exits
+            assert (await in_flight)[0] == "old"
+            event_broadcaster.enqueue_event({"type": "rpc_response"})  # no gateway: logged, not lost silently
+            await asyncio.wait_for(task, 5)
+        assert lifecycle.in_flight == 0 and event_broadcaster.event_queue.empty()
+    asyncio.run(scenario())
+
+def test_drain_deadline_bounds_shutdown():
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        server, task, lifecycle, port = await start("old", drain_timeout_s=0.2, delay=5.0)
+        async with httpx.AsyncClient() as client:
+            in_flight = asyncio.create_task(send(client, port, "slow"))
+            await until(lambda: lifecycle.in_flight == 1)
+            started = time.monotonic()
+            server.handle_exit(signal.SIGTERM, None)
+            assert await lifecycle.drain() is False
+            await asyncio.wait_for(task, 5)
+            # Drain deadline plus the shutdown grace, not the 5 s the task wanted
+            assert time.monotonic() - started < 2.5
+            in_flight.cancel()
+            await asyncio.gather(in_flight, return_exceptions=True)
+    asyncio.run(scenario())
+
+def test_reuseport_handoff_refuses_no_connections():
+    if not hasattr(socket, "SO_REUSEPORT"):
+        return
+    async def scenario():
+        event_broadcaster.init_event_queue()
+        old, old_task, _, port = await start("old")
+        new, new_task, _, _ = await start("new", port=port)
+        served, refused = [], 0
+        try:
+            for i in range(60):
+                if i == 20:
+                    old.handle_exit(signal.SIGTERM, None)
+                try:
+                    async with httpx.AsyncClient() as client:  # a new connection per request
+                        text, metadata = await send(client, port, "fast")
+                        served.append(metadata.get("reason") or text)
+                except A2AClientHTTPError:
+                    refused += 1
+                await asyncio.sleep(0.005)
+            await asyncio.wait_for(old_task, 5)
+        finally:
+            new.should_exit = True
+            await new_task
+        assert refused == 0
+        assert "draining" not in served
+        assert set(served[-20:]) == {"new"}
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,60 @@
+"""
+Test the MCP bridge's incremental JSON-RPC framing and tool call capture
+Run: python -m pytest -q test_mcp_proxy.py   (or python test_mcp_proxy.py)
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_bridge"))
+from server_draft import TO_CLIENT, TO_SERVER, ForwardingStats, FrameSplitter, TrafficInspector
+
+def frames(splitter, data: bytes, chunk: int):
+    out = []
+    for i in range(0, len(data), chunk):
+        out.extend(splitter.feed(data[i:i + chunk]))
+    return out
+
+CALL = {"jsonrpc": "2.0", "id": 7, "method": "tools/call",
+        "params": {"name": "call_agent", "arguments": {"task": "vector databases", "api_key": "sk-secret"}}}
+RESULT = {"jsonrpc": "2.0", "id": 7, "result": {"content": [{"type": "text", "text": "# Report\n" + "x" * 5000}], "isError": False}}
+STREAM = b"".join(json.dumps(m).encode() + b"\n" for m in (CALL, {"jsonrpc": "2.0", "method": "ping"}, RESULT))
+
+def test_frames_survive_any_chunking():
+    expected = STREAM.split(b"\n")[:-1]
+    for chunk in (1, 7, 64, 4096, len(STREAM)):
+        assert frames(FrameSplitter(), STREAM, chunk) == expected
+
+def test_oversize_and_resync_skip_to_next_frame():
+    splitter = FrameSplitter(max_frame=100)
+    assert frames(splitter, b"x" * 500 + b"\n" + b'{"ok":1}\n', 50) == [b'{"ok":1}']
+    assert splitter.oversize == 1
+    splitter.feed(b'{"partial"')
+    splitter.resync()
+    assert list(splitter.feed(b'tail of lost frame\n{"ok":2}\n')) == [b'{"ok":2}']
+
+def test_tool_call_and_result_events():
+    events = []
+    inspector = TrafficInspector(events.append, ForwardingStats())
+    for line in STREAM.split(b"\n")[:-1]:
+        direction = TO_CLIENT if b'"result"' in line else TO_SERVER
+        inspector.inspect(direction, line)
+    call, result = events
+    assert call["type"] == "mcp_tool_call" and call["data"]["tool"] == "call_agent"
+    assert call["data"]["arguments"] == {"task": "vector databases", "has_api_key": True}
+    assert "sk-secret" not in json.dumps(events)
+    assert result["type"] == "mcp_tool_result" and result["data"]["id"] == 7
+    assert result["data"]["content_length"] == len(RESULT["result"]["content"][0]["text"])
+    assert result["latency_ms"] >= 0 and not inspector.pending
+
+def test_unrelated_responses_are_not_decoded():
+    events = []
+    inspector = TrafficInspector(events.append, ForwardingStats())
+    inspector.inspect(TO_CLIENT, json.dumps(RESULT).encode())
+    assert events == []
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
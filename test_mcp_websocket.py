@@ -1,5 +1,5 @@
 """
-Test WebSocket event streaming from MCP Server
+Test WebSocket event streaming from MCP Server (via the event gateway)
 """
 import asyncio
 import websockets
@@ -8,7 +8,7 @@ import json
 async def test_mcp_websocket():
     uri = "ws://localhost:9000/events"
     
-    print("Connecting to MCP Server WebSocket...")
+    print("Connecting to event gateway, filtering MCP events...")
     print(f"URI: {uri}\n")
     
     try:
@@ -20,23 +20,27 @@ async def test_mcp_websocket():
             # Listen for events
             event_count = 0
             async for message in websocket:
-                event = json.loads(message)
-                event_count += 1
+                frame = json.loads(message)
+                # Publishers send batched frames (JSON arrays of events)
+                for event in (frame if isinstance(frame, list) else [frame]):
+                    if event.get('source') != 'MCP':
+                        continue
+                    event_count += 1
                 
-                print(f"\n📡 Event #{event_count}")
-                print(f"Type: {event['type']}")
-                print(f"Source: {event['source']}")
-                print(f"Hop: {event['hop']}")
-                print(f"Transport: {event['transport']}")
-                print(f"Timestamp: {event['timestamp']}")
+                    print(f"\n📡 Event #{event_count}")
+                    print(f"Type: {event['type']}")
+                    print(f"Source: {event['source']}")
+                    print(f"Hop: {event['hop']}")
+                    print(f"Transport: {event['transport']}")
+                    print(f"Timestamp: {event['timestamp']}")
                 
-                print(f"Data: {json.dumps(event['data'], indent=2)}")
-                print("=" * 60)
+                    print(f"Data: {json.dumps(event['data'], indent=2)}")
+                    print("=" * 60)
                 
     except ConnectionRefusedError:
-        print("❌ Connection refused. Is the MCP Server running?")
-        print("Note: The MCP Server is usually run by the client via stdio.")
-        print("To test this, you need to run the demo client which starts the MCP server.")
+        print("❌ Connection refused. Is the event gateway running on port 9000?")
+        print("Start it with: .venv\\Scripts\\python run_event_server.py")
+        print("MCP events appear once the demo client has started the MCP server.")
     except Exception as e:
         print(f"❌ Error: {e}")
 
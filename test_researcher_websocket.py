@@ -1,14 +1,14 @@
 """
-Test WebSocket event streaming from Researcher Agent
+Test WebSocket event streaming from Researcher Agent (via the event gateway)
 """
 import asyncio
 import websockets
 import json
 
 async def test_researcher_websocket():
-    uri = "ws://localhost:8001/events"
+    uri = "ws://localhost:9000/events"
     
-    print("Connecting to Researcher Agent WebSocket...")
+    print("Connecting to event gateway, filtering RESEARCHER events...")
     print(f"URI: {uri}\n")
     
     try:
@@ -20,31 +20,36 @@ async def test_researcher_websocket():
             # Listen for events
             event_count = 0
             async for message in websocket:
-                event = json.loads(message)
-                event_count += 1
+                frame = json.loads(message)
+                # Publishers send batched frames (JSON arrays of events)
+                for event in (frame if isinstance(frame, list) else [frame]):
+                    if event.get('source') != 'RESEARCHER':
+                        continue
+                    event_count += 1
                 
-                print(f"\n📡 Event #{event_count}")
-                print(f"Type: {event['type']}")
-                print(f"Source: {event['source']}")
-                print(f"Hop: {event['hop']}")
-                print(f"Transport: {event['transport']}")
-                print(f"Timestamp: {event['timestamp']}")
+                    print(f"\n📡 Event #{event_count}")
+                    print(f"Type: {event['type']}")
+                    print(f"Source: {event['source']}")
+                    print(f"Hop: {event['hop']}")
+                    print(f"Transport: {event['transport']}")
+                    print(f"Timestamp: {event['timestamp']}")
                 
-                if 'latency_ms' in event:
-                    print(f"Latency: {event['latency_ms']}ms")
+                    if 'latency_ms' in event:
+                        print(f"Latency: {event['latency_ms']}ms")
                 
-                if 'a2a_schema' in event:
-                    print(f"A2A Schema: {event['a2a_schema']}")
+                    if 'a2a_schema' in event:
+                        print(f"A2A Schema: {event['a2a_schema']}")
                 
-                if 'error_origin' in event:
-                    print(f"❌ Error Origin: {event['error_origin']}")
+                    if 'error_origin' in event:
+                        print(f"❌ Error Origin: {event['error_origin']}")
                 
-                print(f"Data: {json.dumps(event['data'], indent=2)}")
-                print("=" * 60)
+                    print(f"Data: {json.dumps(event['data'], indent=2)}")
+                    print("=" * 60)
                 
     except ConnectionRefusedError:
-        print("❌ Connection refused. Is the Researcher Agent running on port 8001?")
+        print("❌ Connection refused. Is the event gateway running on port 9000?")
         print("\nStart it with:")
+        print("  .venv\\Scripts\\python run_event_server.py")
         print("  .venv\\Scripts\\python backend/researcher_agent.py")
     except Exception as e:
         print(f"❌ Error: {e}")
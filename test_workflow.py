@@ -0,0 +1,133 @@
+"""
+Test the workflow engine: concurrent branches, bounded parallelism, per-node
+memoization and hops derived from the graph
+Run: python -m pytest -q test_workflow.py   (or python test_workflow.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import event_broadcaster
+from prompts import research_prompt
+from workflow import RESEARCH_AND_DRAFT, A2ANode, LLMNode, Workflow, WorkflowEngine
+
+def review_workflow() -> Workflow:
+    """research, then draft, fact-check and review side by side, then a summary."""
+    research = LLMNode("research", lambda i: research_prompt(i["topic"]))
+    branches = [A2ANode(name, f"{name}_report", name.upper(), lambda i: i["research"])
+                for name in ("draft", "fact_check", "review")]
+    summary = LLMNode("summary", lambda i: research_prompt(i["draft"]))
+    return Workflow(
+        name="review", owner="RESEARCHER", caller="MCP",
+        nodes=[summary, research, *branches],  # any order; the engine sorts them
+        edges=[("research", b.id) for b in branches] + [(b.id, "summary") for b in branches],
+        output="summary",
+    )
+
+class Executor:
+    """Stands in for the agent: each node sleeps and records what ran concurrently."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.runs = []
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, node, inputs):
+        self.runs.append(node.id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        upstream = sorted(k for k in inputs if k != "topic")
+        return f"{node.id}({','.join(upstream)})"
+
+def test_branches_run_concurrently_in_dependency_order():
+    executor = Executor()
+    start = time.perf_counter()
+    result = asyncio.run(WorkflowEngine(max_parallel=4).run(review_workflow(), {"topic": "t"}, executor))
+    elapsed = time.perf_counter() - start
+    assert result == "summary(draft,fact_check,review)"
+    assert executor.runs[0] == "research" and executor.runs[-1] == "summary"
+    assert executor.peak == 3
+    assert elapsed < 4 * executor.delay  # three levels, not five serial nodes
+
+def test_parallelism_is_bounded():
+    executor = Executor()
+    asyncio.run(WorkflowEngine(max_parallel=2).run(review_workflow(), {"topic": "t"}, executor))
+    assert executor.peak == 2
+
+def test_nodes_are_memoized_per_scope_and_inputs():
+    async def scenario():
+        engine, executor = WorkflowEngine(), Executor(delay=0)
+        await engine.run(RESEARCH_AND_DRAFT, {"topic": "a"}, executor, scope="tenant-a")
+        await engine.run(RESEARCH_AND_DRAFT, {"topic": "a"}, executor, scope="tenant-a")
+        assert executor.runs == ["research", "draft"]
+        await engine.run(RESEARCH_AND_DRAFT, {"topic": "a"}, executor, scope="tenant-b")
+        await engine.run(RESEARCH_AND_DRAFT, {"topic": "b"}, executor, scope="tenant-a")
+        assert len(executor.runs) == 6
+    asyncio.run(scenario())
+
+def test_failure_cancels_the_rest_and_is_not_memoized():
+    async def scenario():
+        engine, executor = WorkflowEngine(), Executor()
+
+        async def flaky(node, inputs):
+            if node.id == "fact_check":
+                raise RuntimeError("fact checker down")
+            return await executor(node, inputs)
+
+        try:
+            await engine.run(review_workflow(), {"topic": "t"}, flaky)
+            assert False, "expected the node failure to propagate"
+        except RuntimeError as e:
+            assert "fact checker down" in str(e)
+        assert "summary" not in executor.runs
+        assert engine.memo.stats()["stored"] == 1  # research; draft and review are still running
+    asyncio.run(scenario())
+
+def test_error_replies_are_not_memoized():
+    async def scenario():
+        engine, executor = WorkflowEngine(), Executor(delay=0)
+
+        async def failing_writer(node, inputs):
+            await executor(node, inputs)
+            return "Error: upstream timed out" if node.id == "draft" else f"{node.id} ok"
+
+        await engine.run(RESEARCH_AND_DRAFT, {"topic": "a"}, failing_writer)
+        await engine.run(RESEARCH_AND_DRAFT, {"topic": "a"}, executor)
+        assert executor.runs == ["research", "draft", "draft"]  # research reused, the failed draft rerun
+    asyncio.run(scenario())
+
+def test_invalid_graphs_are_rejected():
+    node = lambda name: LLMNode(name, lambda i: research_prompt(""))
+    for nodes, edges, output in (
+        ([node("a"), node("b")], [("a", "b"), ("b", "a")], "b"),
+        ([node("a")], [("a", "missing")], "a"),
+        ([node("a"), node("a")], [], "a"),
+    ):
+        try:
+            Workflow("bad", "RESEARCHER", "MCP", nodes, edges, output)
+            assert False, f"accepted {edges}"
+        except ValueError:
+            pass
+
+def test_hops_are_derived_from_the_graph():
+    event_broadcaster.register_hops(review_workflow().hops())
+    hop = event_broadcaster.infer_hop
+    assert hop("RESEARCHER", "a2a_outgoing", "out", "FACT_CHECK") == "researcher→fact_check"
+    assert hop("FACT_CHECK", "rpc_request", "in") == "researcher→fact_check"
+    assert hop("REVIEW", "openai_call", "out") == "review→openai"
+    assert hop("RESEARCHER", "node_started", "out", "summary") == "researcher→openai"
+    event_broadcaster.register_hops(RESEARCH_AND_DRAFT.hops())
+    assert hop("RESEARCHER", "rpc_request", "in") == "mcp→researcher"
+    assert hop("WRITER", "rpc_response", "out") == "writer→researcher"
+    assert hop("RESEARCHER", "a2a_incoming", "in", "WRITER") == "writer→researcher"
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")